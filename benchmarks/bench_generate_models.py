@@ -0,0 +1,147 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Dict, Any, List, Callable
+
+from lib.generate_models import GenerationContext, generate_models, write_models, generate_model, collect_models, topological_sort, render_models
+from lib.ref_index import RefIndex
+from lib.lazy_spec import load_lazy_spec
+from benchmarks.synthetic_spec import synthesize_spec
+
+# Run from the repository root:
+#   python -m benchmarks.bench_generate_models --preset medium --output bench.json
+
+PRESETS: Dict[str, Dict[str, Any]] = {
+    'small': {'paths': 50, 'schemas': 100, 'depth': 2, 'one_of': 2, 'ref_density': 0.3},
+    'medium': {'paths': 500, 'schemas': 1000, 'depth': 3, 'one_of': 3, 'ref_density': 0.3},
+    'gateway': {'paths': 4000, 'schemas': 9000, 'depth': 3, 'one_of': 4, 'ref_density': 0.3},
+    # most request/response bodies $ref a component, which is generated again for every operation using it
+    'shared_bodies': {'paths': 500, 'schemas': 1000, 'depth': 3, 'one_of': 3, 'ref_density': 0.6},
+    # thousands of paths whose class names all collide after sanitizing
+    'collisions': {'paths': 50, 'schemas': 100, 'depth': 2, 'one_of': 2, 'ref_density': 0.3, 'collisions': 2000},
+}
+
+def time_runs(fn: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return {
+        'min_s': min(timings),
+        'median_s': statistics.median(timings),
+        'mean_s': statistics.mean(timings),
+        'runs': len(timings),
+    }
+
+def run_generate_model_phase(ref_index: RefIndex) -> None:
+    # mirrors the schema phase of collect_models: every component schema through generate_model with shared state.
+    # The index is built once outside the timing, building it is the 'ref_index' phase
+    context = GenerationContext(ref_index)
+    for schema_name, schema in context.ref_index.component_schemas.items():
+        model_code, model_name = generate_model(schema, schema_name, context, reuse_shape=False, class_name=context.component_classes[schema_name])
+        context.models.append((model_name, model_code))
+
+def write_to_devnull(openapi_spec: Dict[str, Any]) -> None:
+    with open(os.devnull, 'w') as output_file:
+        write_models(openapi_spec, output_file)
+
+def write_lazy_to_devnull(spec_path: str) -> None:
+    # as generate_openapi.py --lazy: the spec is decoded one path / component at a time from the file
+    openapi_spec = load_lazy_spec(spec_path)
+    with open(os.devnull, 'w') as output_file:
+        write_models(openapi_spec, output_file, ref_index=RefIndex(openapi_spec, prebuild=False))
+
+def lazy_peak_memory(openapi_spec: Dict[str, Any]) -> int:
+    with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as spec_file:
+        json.dump(openapi_spec, spec_file)
+    try:
+        return peak_memory(lambda: write_lazy_to_devnull(spec_file.name))
+    finally:
+        os.remove(spec_file.name)
+
+def peak_memory(fn: Callable[[], Any]) -> int:
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+def run_benchmark(config: Dict[str, Any], repeat: int) -> Dict[str, Any]:
+    openapi_spec = synthesize_spec(**config)
+    models, model_dependencies, model_mapping = collect_models(openapi_spec)
+    sorted_models = topological_sort(models, model_dependencies)
+    output = render_models(sorted_models, model_mapping)
+    ref_index = RefIndex(openapi_spec)
+
+    phases = {
+        'generate_models': time_runs(lambda: generate_models(openapi_spec), repeat),
+        'ref_index': time_runs(lambda: RefIndex(openapi_spec), repeat),
+        'generate_model': time_runs(lambda: run_generate_model_phase(ref_index), repeat),
+        'collect_models': time_runs(lambda: collect_models(openapi_spec), repeat),
+        'topological_sort': time_runs(lambda: topological_sort(models, model_dependencies), repeat),
+        'render_models': time_runs(lambda: render_models(sorted_models, model_mapping), repeat),
+    }
+
+    return {
+        'config': config,
+        'phases': phases,
+        'peak_memory_bytes': peak_memory(lambda: generate_models(openapi_spec)),
+        'peak_memory_streaming_bytes': peak_memory(lambda: write_to_devnull(openapi_spec)),
+        'peak_memory_lazy_bytes': lazy_peak_memory(openapi_spec),
+        'model_count': len(models),
+        'output_bytes': len(output.encode('utf-8')),
+        'output_lines': output.count('\n'),
+    }
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark generate_models on synthetic OpenAPI specs.')
+    parser.add_argument('--preset', choices=sorted(PRESETS), action='append', help='size preset, may be repeated')
+    parser.add_argument('--paths', type=int, default=100)
+    parser.add_argument('--schemas', type=int, default=200)
+    parser.add_argument('--depth', type=int, default=2)
+    parser.add_argument('--one-of', type=int, default=3)
+    parser.add_argument('--ref-density', type=float, default=0.3)
+    parser.add_argument('--collisions', type=int, default=0, help='extra paths whose class names collide after sanitizing')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help='write JSON results to this file instead of stdout')
+    args = parser.parse_args(argv)
+
+    if args.preset:
+        configs = [dict(PRESETS[preset], seed=args.seed) for preset in args.preset]
+    else:
+        configs = [{
+            'paths': args.paths,
+            'schemas': args.schemas,
+            'depth': args.depth,
+            'one_of': args.one_of,
+            'ref_density': args.ref_density,
+            'collisions': args.collisions,
+            'seed': args.seed,
+        }]
+
+    results = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'benchmarks': [run_benchmark(config, args.repeat) for config in configs],
+    }
+
+    serialized = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            output_file.write(serialized + '\n')
+    else:
+        print(serialized)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
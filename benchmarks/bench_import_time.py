@@ -0,0 +1,84 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+from typing import Dict, Any, List
+
+from benchmarks.synthetic_spec import synthesize_spec
+from lib.generate_models import build_context, iter_render_context
+from lib.generate_package import render_package
+from lib.generation_cache import write_chunks_if_changed, write_package_if_changed
+
+# Run from the repository root:
+#   python -m benchmarks.bench_import_time --paths 2000 --schemas 4000 --output bench_import.json
+#
+# Times, in a fresh interpreter each, importing the generated types as one module and as a lazily
+# imported package, and using a single endpoint of the package.
+
+REPOSITORY_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SCRIPT = '''
+import sys, time
+start = time.perf_counter()
+import {module} as types
+imported = time.perf_counter()
+{access}
+print(imported - start, time.perf_counter() - imported, sum(name.startswith('{module}.') for name in sys.modules))
+'''
+
+def time_import(directory: str, module: str, access: str, bytecode: bool) -> Dict[str, Any]:
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([directory, REPOSITORY_ROOT]))
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    command = [sys.executable] + ([] if bytecode else ['-B']) + ['-c', IMPORT_SCRIPT.format(module=module, access=access)]
+    if bytecode:
+        # a first run writes the .pyc files the measured run loads
+        subprocess.run(command, env=env, check=True, capture_output=True)
+    output = subprocess.run(command, env=env, check=True, capture_output=True, text=True).stdout.split()
+    return {'import_ms': float(output[0]) * 1000, 'access_ms': float(output[1]) * 1000, 'submodules_loaded': int(output[2])}
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description='Compare import time of the generated types as one module and as a lazy package.')
+    parser.add_argument('--paths', type=int, default=1000)
+    parser.add_argument('--schemas', type=int, default=2000)
+    parser.add_argument('--depth', type=int, default=2)
+    parser.add_argument('--one-of', type=int, default=3)
+    parser.add_argument('--ref-density', type=float, default=0.3)
+    parser.add_argument('--no-bytecode', action='store_true', help='compile the sources on every import instead of loading .pyc files')
+    parser.add_argument('--output', help='write JSON results to this file instead of stdout')
+    args = parser.parse_args(argv)
+
+    spec = synthesize_spec(paths=args.paths, schemas=args.schemas, depth=args.depth, one_of=args.one_of, ref_density=args.ref_density)
+    bytecode = not args.no_bytecode
+    with tempfile.TemporaryDirectory() as directory:
+        write_chunks_if_changed(os.path.join(directory, 'bench_flat_types.py'), iter_render_context(build_context(spec)))
+        context = build_context(spec)
+        # the first path, like a tool that calls a single endpoint
+        path_key = next(iter(context.model_mapping))
+        write_package_if_changed(os.path.join(directory, 'bench_package_types'), render_package(context))
+        benchmarks = {
+            'module': time_import(directory, 'bench_flat_types', f'types.ModelMapping.{path_key}', bytecode),
+            'package': time_import(directory, 'bench_package_types', '', bytecode),
+            'package_one_endpoint': time_import(directory, 'bench_package_types', f'types.ModelMapping.{path_key}', bytecode),
+        }
+
+    results = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'spec': {'paths': args.paths, 'schemas': args.schemas, 'depth': args.depth, 'one_of': args.one_of, 'ref_density': args.ref_density},
+        'bytecode': bytecode,
+        'benchmarks': benchmarks,
+    }
+
+    serialized = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            output_file.write(serialized + '\n')
+    else:
+        print(serialized)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
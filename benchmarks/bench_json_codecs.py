@@ -0,0 +1,110 @@
+import argparse
+import glob
+import json
+import platform
+import sys
+import timeit
+from typing import Dict, Any, List, Optional
+
+from lib.json_codec import CODEC_NAMES, JsonCodec, load_codec
+from lib.ref_index import RefIndex
+
+# Run from the repository root:
+#   python -m benchmarks.bench_json_codecs --output bench_json.json
+
+DEFAULT_FIXTURES = 'tests/*/openapi.json'
+# array properties of sample values hold this many items
+ARRAY_ITEMS = 3
+MAX_DEPTH = 4
+
+def sample_value(schema: Dict[str, Any], ref_index: RefIndex, index: int, depth: int = 0) -> Any:
+    # a value shaped like schema, varied by index so that list payloads are not all alike
+    if '$ref' in schema:
+        schema = ref_index.resolve(schema['$ref'])
+    if 'enum' in schema:
+        return schema['enum'][index % len(schema['enum'])]
+    schema_type = schema.get('type', 'object' if 'properties' in schema else None)
+    if schema_type == 'object':
+        if depth >= MAX_DEPTH:
+            return {}
+        return {name: sample_value(prop, ref_index, index, depth + 1) for name, prop in schema.get('properties', {}).items()}
+    if schema_type == 'array':
+        if depth >= MAX_DEPTH:
+            return []
+        return [sample_value(schema.get('items', {}), ref_index, index + item, depth + 1) for item in range(ARRAY_ITEMS)]
+    if schema_type == 'integer':
+        return 1000 + index
+    if schema_type == 'number':
+        return index * 1.25
+    if schema_type == 'boolean':
+        return index % 2 == 0
+    if schema.get('format') == 'date-time':
+        return f'2024-01-{index % 28 + 1:02d}T12:00:00Z'
+    return f'value {index} with ünïcode'
+
+def fixture_payloads(spec_path: str, items: int) -> Dict[str, Any]:
+    # one list-endpoint payload per component schema of the fixture, plus the spec itself
+    with open(spec_path, 'rb') as spec_file:
+        spec = json.load(spec_file)
+    ref_index = RefIndex(spec)
+    payloads = {f'{name}[{items}]': [sample_value(schema, ref_index, index) for index in range(items)] for name, schema in ref_index.component_schemas.items()}
+    payloads['spec'] = spec
+    return payloads
+
+def ms_per_call(statement: Any, number: int, repeat: int) -> float:
+    return min(timeit.repeat(statement, number=number, repeat=repeat)) / number * 1000
+
+def run_codec(codec: JsonCodec, payload: Any, number: int, repeat: int) -> Dict[str, float]:
+    encoded = codec.dumps(payload)
+    text = encoded.decode('utf-8')
+    assert codec.loads(encoded) == payload
+    return {
+        'loads_bytes_ms': ms_per_call(lambda: codec.loads(encoded), number, repeat),
+        'loads_str_ms': ms_per_call(lambda: codec.loads(text), number, repeat),
+        'dumps_ms': ms_per_call(lambda: codec.dumps(payload), number, repeat),
+    }
+
+def available_codecs(names: Optional[List[str]]) -> List[JsonCodec]:
+    codecs = []
+    for name in names or CODEC_NAMES:
+        try:
+            codecs.append(load_codec(name))
+        except ImportError:
+            print(f'{name} is not installed, skipped', file=sys.stderr)
+    return codecs
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark the JSON codecs on payloads shaped like the fixture schemas.')
+    parser.add_argument('fixtures', nargs='*', help=f'spec files (default: {DEFAULT_FIXTURES})')
+    parser.add_argument('--codec', choices=CODEC_NAMES, action='append', help='codec to run, may be repeated (default: every installed one)')
+    parser.add_argument('--items', type=int, default=1000, help='objects per list payload')
+    parser.add_argument('--number', type=int, default=20, help='calls per timing run')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', help='write JSON results to this file instead of stdout')
+    args = parser.parse_args(argv)
+
+    codecs = available_codecs(args.codec)
+    benchmarks = {}
+    for spec_path in args.fixtures or sorted(glob.glob(DEFAULT_FIXTURES)):
+        for name, payload in fixture_payloads(spec_path, args.items).items():
+            benchmarks[f'{spec_path}:{name}'] = {
+                'bytes': len(json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')),
+                'codecs': {codec.name: run_codec(codec, payload, args.number, args.repeat) for codec in codecs},
+            }
+
+    results = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'benchmarks': benchmarks,
+    }
+
+    serialized = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            output_file.write(serialized + '\n')
+    else:
+        print(serialized)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,95 @@
+import argparse
+import glob
+import importlib.util
+import json
+import os
+import platform
+import sys
+import tempfile
+import timeit
+import tracemalloc
+from typing import Dict, Any, List
+
+from benchmarks.bench_json_codecs import sample_value
+from lib.dataclass_conversion import compile_converter
+from lib.generate_models import generate_models, MODEL_STYLE_DATACLASS
+from lib.ref_index import RefIndex
+
+# Run from the repository root:
+#   python -m benchmarks.bench_model_styles --items 100000 --output bench_styles.json
+
+DEFAULT_FIXTURES = 'tests/*/openapi.json'
+
+def load_generated_module(code: str, directory: str, name: str) -> Any:
+    path = os.path.join(directory, f'{name}.py')
+    with open(path, 'w') as module_file:
+        module_file.write(code)
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)  # type: ignore
+    # dataclasses look their module up while the class is created
+    sys.modules[name] = module
+    spec.loader.exec_module(module)  # type: ignore
+    return module
+
+def retained_bytes(build: Any) -> int:
+    # memory still held by the result of build() once it returned
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    result = build()
+    size = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    del result
+    return size
+
+def ms_per_call(statement: Any, number: int, repeat: int) -> float:
+    return min(timeit.repeat(statement, number=number, repeat=repeat)) / number * 1000
+
+def run_schema(class_type: Any, payload: List[Any], number: int, repeat: int) -> Dict[str, Any]:
+    converter = compile_converter(List[class_type])
+    if converter is None:
+        return {'dataclass': False}
+    encoded = json.dumps(payload)
+    return {
+        'dataclass': True,
+        'dict_bytes': retained_bytes(lambda: json.loads(encoded)),
+        'dataclass_bytes': retained_bytes(lambda: converter(json.loads(encoded))),
+        'loads_ms': ms_per_call(lambda: json.loads(encoded), number, repeat),
+        'loads_convert_ms': ms_per_call(lambda: converter(json.loads(encoded)), number, repeat),
+    }
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description='Compare memory and decoding time of TypedDict (plain dict) and dataclass responses.')
+    parser.add_argument('fixtures', nargs='*', help=f'spec files (default: {DEFAULT_FIXTURES})')
+    parser.add_argument('--items', type=int, default=10000, help='objects per list payload')
+    parser.add_argument('--number', type=int, default=3, help='calls per timing run')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help='write JSON results to this file instead of stdout')
+    args = parser.parse_args(argv)
+
+    benchmarks = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for fixture_index, spec_path in enumerate(args.fixtures or sorted(glob.glob(DEFAULT_FIXTURES))):
+            with open(spec_path, 'rb') as spec_file:
+                spec = json.load(spec_file)
+            ref_index = RefIndex(spec)
+            module = load_generated_module(generate_models(spec, model_style=MODEL_STYLE_DATACLASS), directory, f'_bench_styles_{fixture_index}')
+            for name, schema in ref_index.component_schemas.items():
+                payload = [sample_value(schema, ref_index, index) for index in range(args.items)]
+                benchmarks[f'{spec_path}:{name}[{args.items}]'] = run_schema(getattr(module, name), payload, args.number, args.repeat)
+
+    results = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'benchmarks': benchmarks,
+    }
+
+    serialized = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            output_file.write(serialized + '\n')
+    else:
+        print(serialized)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
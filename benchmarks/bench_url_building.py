@@ -0,0 +1,77 @@
+import argparse
+import json
+import platform
+import sys
+import timeit
+from typing import Dict, Any, List, Optional
+
+from lib.fetch_common import build_url
+from lib.url_builder import ParameterStyle, compile_url
+
+# Run from the repository root:
+#   python -m benchmarks.bench_url_building --output bench_url.json
+
+# (url template, path, query, query styles) as a generated client would pass them
+CASES: Dict[str, Dict[str, Any]] = {
+    'static': {'template': '/store/inventory', 'path': None, 'query': None},
+    'path': {'template': '/pet/{petId}', 'path': {'petId': 10}, 'query': None},
+    'path_query': {'template': '/user/{username}/orders/{orderId}', 'path': {'username': 'john doe', 'orderId': 7}, 'query': {'status': 'available', 'limit': 50, 'offset': None}},
+    'array_query': {'template': '/pet/findByTags', 'path': None, 'query': {'tags': ['tag1', 'tag 2', 'tag/3']}, 'query_styles': {'tags': ParameterStyle('form', False)}},
+}
+
+def legacy_build_url(domain: str, url_template: str, path: Optional[Dict[str, Any]] = None, query: Optional[Dict[str, Any]] = None) -> str:
+    # build_url before lib/url_builder.py: str.replace per path value, nothing encoded, styles ignored
+    url = url_template
+    if path:
+        for key, value in path.items():
+            placeholder = f'{{{key}}}'
+            if placeholder in url:
+                url = url.replace(placeholder, str(value))
+    if not query:
+        return domain + url
+    return domain + url + '?' + '&'.join([f'{key}={value}' for key, value in query.items()])
+
+def ns_per_call(statement: Any, number: int, repeat: int) -> float:
+    return min(timeit.repeat(statement, number=number, repeat=repeat)) / number * 1e9
+
+def run_case(case: Dict[str, Any], number: int, repeat: int) -> Dict[str, Any]:
+    template, path, query = case['template'], case['path'], case['query']
+    formatter = compile_url(template, query_styles=case.get('query_styles'))
+    return {
+        'template': template,
+        'url': formatter(path, query),
+        'legacy_url': legacy_build_url('', template, path, query),
+        'ns_per_call': {
+            'legacy_build_url': ns_per_call(lambda: legacy_build_url('', template, path, query), number, repeat),
+            # formatter looked up by template on every call, as typed_fetch does
+            'build_url': ns_per_call(lambda: build_url('', template, path, query), number, repeat),
+            # formatter compiled once, as generated clients do
+            'compiled': ns_per_call(lambda: formatter(path, query), number, repeat),
+            'compile_url': ns_per_call(lambda: compile_url(template, query_styles=case.get('query_styles')), max(number // 10, 1), repeat),
+        },
+    }
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark URL building for typed_fetch and generated clients.')
+    parser.add_argument('--case', choices=sorted(CASES), action='append', help='case to run, may be repeated')
+    parser.add_argument('--number', type=int, default=100000, help='calls per timing run')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', help='write JSON results to this file instead of stdout')
+    args = parser.parse_args(argv)
+
+    results = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'benchmarks': {name: run_case(CASES[name], args.number, args.repeat) for name in (args.case or sorted(CASES))},
+    }
+
+    serialized = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            output_file.write(serialized + '\n')
+    else:
+        print(serialized)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,105 @@
+import random
+from typing import Dict, Any, List
+
+PRIMITIVE_TYPES = ['string', 'integer', 'boolean']
+# path characters that sanitize_class_name maps to '_'
+SEPARATORS = "-.~!$&'()*+,;=:@"
+
+def synthesize_spec(
+    paths: int = 100,
+    schemas: int = 200,
+    depth: int = 2,
+    one_of: int = 3,
+    ref_density: float = 0.3,
+    properties: int = 6,
+    collisions: int = 0,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    schema_names = [f'Model{idx}' for idx in range(schemas)]
+
+    def ref_to(idx: int) -> Dict[str, Any]:
+        return {'$ref': f'#/components/schemas/{schema_names[idx]}'}
+
+    def random_ref(min_idx: int) -> Dict[str, Any]:
+        # refs only point "forward" so the generated dependency graph stays acyclic
+        return ref_to(rng.randrange(min_idx, schemas))
+
+    def inline_object(level: int, min_ref_idx: int) -> Dict[str, Any]:
+        props: Dict[str, Any] = {}
+        for prop_idx in range(properties):
+            prop_name = f'field{prop_idx}'
+            roll = rng.random()
+            if min_ref_idx < schemas and roll < ref_density:
+                props[prop_name] = random_ref(min_ref_idx)
+            elif level < depth and roll < ref_density + 0.15:
+                props[prop_name] = inline_object(level + 1, min_ref_idx)
+            elif level < depth and roll < ref_density + 0.25:
+                props[prop_name] = {'type': 'array', 'items': inline_object(level + 1, min_ref_idx)}
+            elif level < depth and one_of and roll < ref_density + 0.3:
+                props[prop_name] = {'oneOf': [inline_object(level + 1, min_ref_idx) for _ in range(one_of)]}
+            elif roll < ref_density + 0.4:
+                props[prop_name] = {'type': 'string', 'enum': [f'value{n}' for n in range(rng.randint(2, 6))]}
+            else:
+                props[prop_name] = {'type': rng.choice(PRIMITIVE_TYPES), 'nullable': roll > 0.9}
+        required = [name for name in props if rng.random() < 0.5]
+        return {'type': 'object', 'properties': props, 'required': required}
+
+    component_schemas = {name: inline_object(0, idx + 1) for idx, name in enumerate(schema_names)}
+
+    def body_schema() -> Dict[str, Any]:
+        if schemas and rng.random() < ref_density:
+            return random_ref(0)
+        return inline_object(0, 0)
+
+    spec_paths: Dict[str, Any] = {}
+    for idx in range(paths):
+        resource = f'/resource{idx % 50}/sub{idx}/{{itemId}}'
+        parameters: List[Dict[str, Any]] = [
+            {'name': 'itemId', 'in': 'path', 'required': True, 'schema': {'type': 'integer'}},
+            {'name': 'limit', 'in': 'query', 'schema': {'type': 'integer'}},
+            {'name': 'cursor', 'in': 'query', 'schema': {'type': 'string'}},
+        ]
+        get_response = body_schema()
+        if one_of and idx % 4 == 0:
+            get_response = {'oneOf': [body_schema() for _ in range(one_of)]}
+        spec_paths[resource] = {
+            'get': {
+                'tags': [f'tag{idx % 10}'],
+                'parameters': parameters,
+                'responses': {'200': {'description': 'ok', 'content': {'application/json': {'schema': get_response}}}},
+            },
+            'post': {
+                'tags': [f'tag{idx % 10}'],
+                'parameters': parameters[:1],
+                'requestBody': {'content': {'application/json': {'schema': body_schema()}}},
+                'responses': {'200': {'description': 'ok', 'content': {'application/json': {'schema': body_schema()}}}},
+            },
+        }
+
+    # paths that differ only in punctuation all sanitize to the same key, and so do the names of
+    # every class generated for them
+    width = 1
+    while len(SEPARATORS) ** width < collisions:
+        width += 1
+    for idx in range(collisions):
+        separators = ''
+        for _ in range(width):
+            idx, digit = divmod(idx, len(SEPARATORS))
+            separators += SEPARATORS[digit]
+        spec_paths[f'/collide{separators}'] = {
+            'get': {
+                'responses': {'200': {'description': 'ok', 'content': {'application/json': {'schema': inline_object(0, schemas)}}}},
+            },
+            'post': {
+                'requestBody': {'content': {'application/json': {'schema': inline_object(0, schemas)}}},
+                'responses': {'200': {'description': 'ok', 'content': {'application/json': {'schema': inline_object(0, schemas)}}}},
+            },
+        }
+
+    return {
+        'openapi': '3.0.0',
+        'info': {'title': 'Synthetic API', 'version': '1.0.0'},
+        'paths': spec_paths,
+        'components': {'schemas': component_schemas},
+    }
@@ -0,0 +1,86 @@
+# fixtures shared by the test_*.py modules
+import importlib
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import ModuleType
+from typing import Callable, Dict, Iterator, List, NamedTuple, Tuple
+
+import pytest
+
+class Request(NamedTuple):
+    method: str
+    path: str
+    headers: Dict[str, str]
+    body: bytes
+    # (host, port) of the connection it came on
+    client: Tuple[str, int]
+
+# request -> (status, headers, body)
+Handler = Callable[[Request], Tuple[int, Dict[str, str], bytes]]
+
+class LocalServer:
+    # An HTTP/1.1 server on a free local port, a thread per connection. Requests are answered by the
+    # handler registered for their method and path (query excluded) in routes, 404 otherwise, and
+    # recorded in requests.
+    def __init__(self):
+        self.routes: Dict[Tuple[str, str], Handler] = {}
+        self.requests: List[Request] = []
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self.handler_class())
+        self.server.daemon_threads = True
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}'
+        self.thread = threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True)
+        self.thread.start()
+
+    def handler_class(self) -> type:
+        server = self
+
+        class RequestHandler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def handle_request(self) -> None:
+                body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+                request = Request(self.command, self.path, dict(self.headers), body, self.client_address)
+                server.requests.append(request)
+                handler = server.routes.get((self.command, self.path.split('?', 1)[0]))
+                status, headers, content = handler(request) if handler else (404, {}, b'{"error": "not found"}')
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = handle_request
+
+            def log_message(self, *args: object) -> None:
+                pass
+
+        return RequestHandler
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+@pytest.fixture
+def local_server() -> Iterator[LocalServer]:
+    server = LocalServer()
+    try:
+        yield server
+    finally:
+        server.close()
+
+@pytest.fixture
+def import_code(tmp_path, monkeypatch) -> Callable[..., ModuleType]:
+    # import_code(code, name) imports generated code as the module name, from a file of its own as
+    # get_type_hints and the converters need; removed from sys.modules after the test
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    def import_code(code: str, name: str = 'generated_types') -> ModuleType:
+        (tmp_path / f'{name}.py').write_text(code)
+        monkeypatch.delitem(sys.modules, name, raising=False)
+        importlib.invalidate_caches()
+        module = importlib.import_module(name)
+        monkeypatch.setitem(sys.modules, name, module)
+        return module
+    return import_code
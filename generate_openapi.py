@@ -1,36 +1,359 @@
+import argparse
+import fnmatch
+import glob
 import json
 import os
-from lib.generate_models import generate_models
-
-print('--- start generating openapi ---')
-
-# Define the root directory where your test folders are located
-root_dir = 'tests'
-
-# Iterate over each folder within the root directory
-for folder_name in os.listdir(root_dir):
-    folder_path = os.path.join(root_dir, folder_name)
-    
-    # Check if the path is a directory
-    if os.path.isdir(folder_path):
-        openapi_file_path = os.path.join(folder_path, 'openapi.json')
-        
-        # Check if the openapi.json file exists in the directory
-        if os.path.exists(openapi_file_path):
-            with open(openapi_file_path, 'r') as file:
-                openapi_spec = json.load(file)
-                generated_code = generate_models(openapi_spec)
-
-                # The generated code is already pretty formatted
-                pretty_generated_code = generated_code
-                
-                # Save the pretty printed generated code to a file in the same directory
-                output_file_path = os.path.join(folder_path, '__generated_api_types.py')
-                with open(output_file_path, 'w') as output_file:
-                    output_file.write(pretty_generated_code)
-
-            print(f'Generated types for {folder_name}')
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Dict, Any, List, NamedTuple, Optional, Set, Union
+from lib.generation_stats import GenerationStats
+from lib.generate_models import build_context, iter_render_context, DEDUPE_MODES, DEDUPE_OFF, MODEL_STYLES, MODEL_STYLE_TYPEDDICT
+from lib.generate_client import render_client
+from lib.generate_package import render_package, split_entries, PACKAGE_INIT, SPLIT_MODES, SPLIT_ENTRY
+from lib.ref_index import RefIndex
+from lib.lazy_spec import load_lazy_spec
+from lib.json_codec import CODEC_NAMES, load_json_file, set_default_codec
+from lib.file_watcher import InotifyWatcher, PollingWatcher, create_watcher
+from lib.generation_cache import spec_cache_key, file_digest, load_cache, save_cache, write_chunks_if_changed, write_package_if_changed, remove_generated, fragment_cache_path, load_fragments, save_fragments
+
+SPEC_FILE_NAME = 'openapi.json'
+OUTPUT_FILE_NAME = '__generated_api_types.py'
+# --package output, a directory of lazily imported submodules
+OUTPUT_PACKAGE_NAME = '__generated_api_types'
+CLIENT_FILE_NAME = '__generated_api_client.py'
+
+# Default spec location when no paths are given on the command line
+DEFAULT_ROOT_DIR = 'tests'
+DEFAULT_CACHE_FILE = '.generate_openapi_cache.json'
+
+# --watch: how long to wait for further changes once one arrived, editors often save in several
+# steps (write a temporary file, rename it over the spec)
+DEFAULT_DEBOUNCE_MS = 50
+# directories below a target that are not watched for new specs (besides hidden ones)
+UNWATCHED_DIRECTORIES = {'__pycache__', 'node_modules', OUTPUT_PACKAGE_NAME}
+
+# Statuses reported per spec
+GENERATED = 'generated'
+UNCHANGED = 'unchanged'  # regenerated, but the output was identical and not rewritten
+CACHED = 'cached'  # spec and generator unchanged, generation skipped entirely
+FAILED = 'failed'
+
+class SpecResult(NamedTuple):
+    spec_path: str
+    output_path: str
+    elapsed: float
+    status: str
+    cache_entry: Optional[Dict[str, Any]]
+    error: Optional[str]
+    # --stats / --flamegraph, for specs that were generated
+    stats: Optional[GenerationStats] = None
+
+def find_spec_files(targets: List[str]) -> List[str]:
+    spec_paths = set()
+    for target in targets:
+        if os.path.isdir(target):
+            # every openapi.json below the directory, like the old tests/<folder>/openapi.json walk
+            matches = glob.glob(os.path.join(target, '**', SPEC_FILE_NAME), recursive=True)
+        elif os.path.isfile(target):
+            matches = [target]
         else:
-            print(f'No openapi.json found in {folder_name}')
+            # treat anything else as a glob pattern, e.g. 'services/*/openapi.json'
+            matches = [path for path in glob.glob(target, recursive=True) if os.path.isfile(path)]
+        if not matches:
+            print(f'No {SPEC_FILE_NAME} found for {target}')
+        spec_paths.update(os.path.normpath(path) for path in matches)
+    # sorted so that output ordering does not depend on the filesystem or on worker scheduling
+    return sorted(spec_paths)
+
+def generate_spec(spec_path: str, cache_entry: Optional[Dict[str, Any]] = None, options: Optional[Dict[str, Any]] = None, fragment_dir: Optional[str] = None, lazy: bool = False, client: bool = False, json_codec: Optional[str] = None, package: bool = False, split: str = SPLIT_ENTRY, fragment_cache: Optional[Dict[str, Any]] = None, document_cache: Optional[Dict[str, Any]] = None, stats: bool = False) -> SpecResult:
+    # options are passed through to generate_models and are part of the cache key;
+    # lazy and json_codec only change how the spec is loaded, not the output.
+    # fragment_cache and document_cache keep the spec's fragments and the documents of external $refs
+    # in memory between calls (watch mode); fragment_cache is used instead of the one in fragment_dir.
+    # stats: time the phases and entries of the run into SpecResult.stats.
+    options = options or {}
+    run_stats = GenerationStats() if stats else None
+    output_path = os.path.join(os.path.dirname(spec_path), OUTPUT_PACKAGE_NAME if package else OUTPUT_FILE_NAME)
+    client_path = os.path.join(os.path.dirname(spec_path), CLIENT_FILE_NAME)
+    # a package's submodules are only known once it is generated, the cache entry lists them
+    types_path = os.path.join(output_path, PACKAGE_INIT) if package else output_path
+    output_paths = [types_path, client_path] if client else [types_path]
+    start = time.perf_counter()
+    try:
+        cache_key = spec_cache_key(spec_path, dict(options, client=client, package=package, split=split))
+
+        # skip parsing and generation when neither the spec nor the generator changed
+        # and the outputs on disk are still the ones we produced last time
+        if cache_entry and cache_entry.get('key') == cache_key and outputs_unchanged(cache_entry, output_paths) and external_refs_unchanged(cache_entry):
+            return SpecResult(spec_path, output_path, time.perf_counter() - start, CACHED, cache_entry, None)
+
+        # external $refs are resolved relative to the spec's directory
+        base_dir = os.path.dirname(os.path.abspath(spec_path))
+        if json_codec:
+            set_default_codec(json_codec)
+        if run_stats is not None:
+            run_stats.start_phase('load')
+        # lazy: paths and components are decoded one at a time from an index of the file
+        openapi_spec = load_lazy_spec(spec_path) if lazy else load_json_file(spec_path)
+        if run_stats is not None:
+            run_stats.end_phase('load')
+            run_stats.start_phase('ref_index')
+        ref_index = RefIndex(openapi_spec, base_dir=base_dir, document_cache=document_cache, prebuild=not lazy)
+        if run_stats is not None:
+            run_stats.end_phase('ref_index')
+        fragments = fragment_cache
+        if fragments is None and fragment_dir:
+            # the spec changed: reuse the classes of every schema/path that did not
+            fragment_path = fragment_cache_path(fragment_dir, spec_path)
+            fragments = load_fragments(fragment_path, options)
+        context = build_context(openapi_spec, fragment_cache=fragments, ref_index=ref_index, stats=run_stats, **options)
+        if package:
+            remove_generated(os.path.join(os.path.dirname(spec_path), OUTPUT_FILE_NAME))
+            if run_stats is not None:
+                run_stats.start_phase('render_package')
+            package_files = render_package(context, split_entries(openapi_spec, split))
+            if run_stats is not None:
+                run_stats.end_phase('render_package')
+            written = bool(write_package_if_changed(output_path, package_files))
+            output_paths = [os.path.join(output_path, name) for name in sorted(package_files)] + output_paths[1:]
+        else:
+            remove_generated(os.path.join(os.path.dirname(spec_path), OUTPUT_PACKAGE_NAME))
+            written = write_chunks_if_changed(output_path, iter_render_context(context))
+        if client:
+            if run_stats is not None:
+                run_stats.start_phase('render_client')
+            client_code = render_client(context.operations, validators=context.validators, model_style=context.model_style)
+            if run_stats is not None:
+                run_stats.end_phase('render_client')
+            written = write_chunks_if_changed(client_path, [client_code]) or written
+        if fragment_cache is None and fragment_dir:
+            save_fragments(fragment_path, options, fragments)
+        new_entry = {
+            'key': cache_key,
+            'outputs': {path: file_digest(path) or '' for path in output_paths},
+            'externals': {path: file_digest(path) or '' for path in sorted(ref_index.loaded_paths)},
+        }
+    except Exception:
+        return SpecResult(spec_path, output_path, time.perf_counter() - start, FAILED, None, traceback.format_exc())
+    return SpecResult(spec_path, output_path, time.perf_counter() - start, GENERATED if written else UNCHANGED, new_entry, None, run_stats)
+
+def outputs_unchanged(cache_entry: Dict[str, Any], output_paths: List[str]) -> bool:
+    # every output the entry recorded, and at least the expected ones
+    outputs = cache_entry.get('outputs', {})
+    return all(path in outputs and file_digest(path) == outputs[path] for path in set(output_paths) | set(outputs))
+
+def external_refs_unchanged(cache_entry: Dict[str, Any]) -> bool:
+    # files pulled in through external $refs are part of the input too
+    return all(file_digest(path) == digest for path, digest in cache_entry.get('externals', {}).items())
+
+def generate_specs(spec_paths: List[str], workers: int, cache: Optional[Dict[str, Dict[str, Any]]] = None, options: Optional[Dict[str, Any]] = None, fragment_dir: Optional[str] = None, lazy: bool = False, client: bool = False, json_codec: Optional[str] = None, package: bool = False, split: str = SPLIT_ENTRY, stats: bool = False) -> List[SpecResult]:
+    cache_entries = [cache.get(os.path.abspath(spec_path)) if cache is not None else None for spec_path in spec_paths]
+    generate = partial(generate_spec, options=options, fragment_dir=fragment_dir, lazy=lazy, client=client, json_codec=json_codec, package=package, split=split, stats=stats)
+    if workers <= 1 or len(spec_paths) <= 1:
+        return list(map(generate, spec_paths, cache_entries))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # executor.map yields results in submission order
+        return list(executor.map(generate, spec_paths, cache_entries))
+
+def watch_specs(targets: List[str], spec_paths: List[str], entries: Dict[str, Dict[str, Any]], cache: Optional[Dict[str, Dict[str, Any]]] = None, cache_file: Optional[str] = None, options: Optional[Dict[str, Any]] = None, fragment_dir: Optional[str] = None, lazy: bool = False, client: bool = False, json_codec: Optional[str] = None, package: bool = False, split: str = SPLIT_ENTRY, debounce: float = DEFAULT_DEBOUNCE_MS / 1000, poll: bool = False) -> int:
+    # Regenerates specs as they are saved, until interrupted. entries holds the cache entry of every
+    # spec generated so far (whether or not the cache is in use), for the external files each one
+    # reads. Everything stays loaded in this process: each spec's fragments and the documents of
+    # external $refs are kept in memory, so a save costs parsing the changed spec and regenerating
+    # the schemas and paths that changed. Changes to the generator itself need a restart.
+    options = options or {}
+    generate = partial(generate_spec, options=options, fragment_dir=fragment_dir, lazy=lazy, client=client, json_codec=json_codec, package=package, split=split)
+    fragment_caches: Dict[str, Dict[str, Any]] = {}
+    document_cache: Dict[str, Any] = {}
+    # watched before the message, so a change saved once it is printed is seen
+    watcher = watch_directories(create_watcher(poll), watched_directories(targets, spec_paths, entries))
+    print(f'--- watching for changes ({"inotify" if isinstance(watcher, InotifyWatcher) else "polling"}), Ctrl+C to stop ---', flush=True)
+    try:
+        while True:
+            # new specs and the external files of regenerated ones may add directories
+            watcher = watch_directories(watcher, watched_directories(targets, spec_paths, entries))
+            changed = watcher.wait()
+            # until the burst of writes is over
+            while True:
+                more = watcher.wait(debounce)
+                if not more:
+                    break
+                changed |= more
+
+            start = time.perf_counter()
+            for path in changed:
+                document_cache.pop(path, None)
+            known = {os.path.abspath(spec_path) for spec_path in spec_paths}
+            if any(path not in known and (os.path.isdir(path) or is_spec_candidate(path, targets)) or path in known and not os.path.isfile(path) for path in changed):
+                spec_paths = find_spec_files(targets)
+                for removed in known - {os.path.abspath(spec_path) for spec_path in spec_paths}:
+                    entries.pop(removed, None)
+                    fragment_caches.pop(removed, None)
+                    if cache is not None:
+                        cache.pop(removed, None)
+            changed_directories = [path for path in changed if os.path.isdir(path)]
+            affected = [spec_path for spec_path in spec_paths if spec_affected(os.path.abspath(spec_path), known, changed, changed_directories, entries)]
+            if not affected:
+                continue
+
+            failures = 0
+            for spec_path in affected:
+                key = os.path.abspath(spec_path)
+                if key not in fragment_caches:
+                    # the fragments of the last run, from then on they stay in memory
+                    fragment_caches[key] = load_fragments(fragment_cache_path(fragment_dir, spec_path), options) if fragment_dir else {}
+                result = generate(spec_path, cache.get(key) if cache is not None else None, fragment_cache=fragment_caches[key], document_cache=document_cache)
+                print_result(result)
+                if result.error:
+                    failures += 1
+                    print(result.error, file=sys.stderr)
+                    entries.pop(key, None)
+                    if cache is not None:
+                        cache.pop(key, None)
+                else:
+                    entries[key] = result.cache_entry  # type: ignore
+                    if cache is not None:
+                        cache[key] = result.cache_entry  # type: ignore
+            if cache is not None and cache_file:
+                save_cache(cache_file, cache)
+            print(f'{len(affected)} specs in {(time.perf_counter() - start) * 1000:.1f} ms{f", {failures} failed" if failures else ""}')
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+        if fragment_dir:
+            # one-shot runs pick up where watch mode left off
+            for spec_path in spec_paths:
+                key = os.path.abspath(spec_path)
+                if key in fragment_caches:
+                    save_fragments(fragment_cache_path(fragment_dir, spec_path), options, fragment_caches[key])
+    print('--- stopped watching ---')
+    return 0
+
+def watch_directories(watcher: Union[InotifyWatcher, PollingWatcher], directories: Set[str]) -> Union[InotifyWatcher, PollingWatcher]:
+    try:
+        watcher.watch(directories)
+        return watcher
+    except OSError as error:
+        # e.g. more directories than inotify watches allowed
+        print(f'{error}, polling instead')
+        watcher.close()
+        polling_watcher = PollingWatcher()
+        polling_watcher.watch(directories)
+        return polling_watcher
+
+def watched_directories(targets: List[str], spec_paths: List[str], entries: Dict[str, Dict[str, Any]]) -> Set[str]:
+    # the directories new specs can appear in, and those of every spec and of the external files
+    # they read
+    directories = set()
+    for target in targets:
+        if os.path.isfile(target):
+            continue
+        root = target
+        while glob.has_magic(root):
+            root = os.path.dirname(root)
+        for directory, subdirectories, _ in os.walk(root or '.'):
+            subdirectories[:] = [name for name in subdirectories if not name.startswith('.') and name not in UNWATCHED_DIRECTORIES]
+            directories.add(os.path.abspath(directory))
+    for spec_path in spec_paths:
+        directories.add(os.path.dirname(os.path.abspath(spec_path)))
+        entry = entries.get(os.path.abspath(spec_path)) or {}
+        directories.update(os.path.dirname(path) for path in entry.get('externals', {}))
+    return directories
+
+def is_spec_candidate(path: str, targets: List[str]) -> bool:
+    # whether a new file at path could be a spec find_spec_files picks up
+    return os.path.basename(path) == SPEC_FILE_NAME or any(glob.has_magic(target) and fnmatch.fnmatch(path, os.path.abspath(target)) for target in targets)
+
+def spec_affected(spec_key: str, known: Set[str], changed: Set[str], changed_directories: List[str], entries: Dict[str, Dict[str, Any]]) -> bool:
+    # the spec or one of the external files it read changed, or it is new, or a directory above it
+    # changed as a whole (created, moved, or too many events to tell)
+    if spec_key in changed or spec_key not in known:
+        return True
+    if any(path in changed for path in (entries.get(spec_key) or {}).get('externals', {})):
+        return True
+    return any(spec_key.startswith(directory + os.sep) for directory in changed_directories)
+
+def write_stats(results: List[SpecResult], stats_path: Optional[str], flamegraph_path: Optional[str]) -> None:
+    # specs restored from the cache were not generated and have no stats
+    measured = [result for result in results if result.stats is not None]
+    if stats_path:
+        with open(stats_path, 'w') as stats_file:
+            json.dump({result.spec_path: result.stats.to_dict() for result in measured}, stats_file, indent=2)
+            stats_file.write('\n')
+    if flamegraph_path:
+        with open(flamegraph_path, 'w') as flamegraph_file:
+            for result in measured:
+                for line in result.stats.folded_stacks(root=result.spec_path):
+                    flamegraph_file.write(line + '\n')
+
+def print_result(result: SpecResult) -> None:
+    print(f'{result.status:>9} {result.spec_path} ({result.elapsed * 1000:.1f} ms)')
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description='Generate typed API models from OpenAPI specs.')
+    parser.add_argument('targets', nargs='*', default=[DEFAULT_ROOT_DIR], help=f'spec files, directories containing {SPEC_FILE_NAME} files, or glob patterns (default: {DEFAULT_ROOT_DIR})')
+    parser.add_argument('-j', '--workers', type=int, default=os.cpu_count() or 1, help='number of worker processes (default: CPU count)')
+    parser.add_argument('--cache-file', default=DEFAULT_CACHE_FILE, help=f'incremental build cache (default: {DEFAULT_CACHE_FILE})')
+    parser.add_argument('--dedupe', choices=DEDUPE_MODES, default=DEDUPE_OFF, help="structurally identical inline schemas: 'alias' emits `Name = FirstClass`, 'reuse' references the first class directly (default: off)")
+    parser.add_argument('--no-cache', action='store_true', help='regenerate every spec, ignoring and not updating the cache')
+    parser.add_argument('--validators', action='store_true', help='emit a validate_<Class> function after every class, used by the generated client to check responses')
+    parser.add_argument('--model-style', choices=MODEL_STYLES, default=MODEL_STYLE_TYPEDDICT, help="classes with properties: 'typeddict', or 'dataclass' for slotted dataclasses the generated client converts responses into (Python 3.10+) (default: typeddict)")
+    parser.add_argument('--package', action='store_true', help=f'write {OUTPUT_PACKAGE_NAME}/ as a package of submodules (one per schema and path) that are imported on first use, instead of {OUTPUT_FILE_NAME}')
+    parser.add_argument('--split', choices=SPLIT_MODES, default=SPLIT_ENTRY, help="submodules of a --package: 'entry' one per path and schema, 'tag' per OpenAPI tag, 'prefix' per first path segment; with tag and prefix, schemas used by several groups share a 'schemas' module (default: entry)")
+    parser.add_argument('--client', action='store_true', help=f'also generate {CLIENT_FILE_NAME} with an endpoint wrapper per operation')
+    parser.add_argument('--lazy', action='store_true', help='index each spec and decode paths and schemas on demand instead of loading it whole (for specs too large to hold in memory)')
+    parser.add_argument('--json-codec', choices=CODEC_NAMES, help='JSON library used to read specs (default: the first of these that is installed)')
+    parser.add_argument('--watch', action='store_true', help='after generating, keep running and regenerate specs as they (or files they $ref) are saved; new specs below the targets are picked up')
+    parser.add_argument('--debounce-ms', type=float, default=DEFAULT_DEBOUNCE_MS, help=f'--watch: wait this long for further changes before regenerating (default: {DEFAULT_DEBOUNCE_MS})')
+    parser.add_argument('--poll', action='store_true', help='--watch: poll the spec directories instead of using inotify, for filesystems that do not deliver inotify events')
+    parser.add_argument('--stats', metavar='PATH', help='write the time spent per phase and per schema/path, and counters, of every generated spec to PATH as JSON (combine with --no-cache to measure every spec)')
+    parser.add_argument('--flamegraph', metavar='PATH', help='write the time spent per phase, schema/path and class of every generated spec to PATH as folded stacks, for flamegraph.pl, speedscope or inferno')
+    args = parser.parse_args(argv)
+
+    print('--- start generating openapi ---')
+
+    options: Dict[str, Any] = {'dedupe': args.dedupe, 'validators': args.validators, 'model_style': args.model_style}
+    cache = None if args.no_cache else load_cache(args.cache_file)
+    # per-schema fragments of each spec live next to the cache file, one file per spec
+    fragment_dir = None if args.no_cache else f'{args.cache_file}.d'
+
+    spec_paths = find_spec_files(args.targets)
+    start = time.perf_counter()
+    results = generate_specs(spec_paths, args.workers, cache, options, fragment_dir, args.lazy, args.client, args.json_codec, args.package, args.split, bool(args.stats or args.flamegraph))
+    elapsed = time.perf_counter() - start
+    write_stats(results, args.stats, args.flamegraph)
+
+    if cache is not None:
+        for result in results:
+            if result.cache_entry:
+                cache[os.path.abspath(result.spec_path)] = result.cache_entry
+        save_cache(args.cache_file, cache)
+
+    failures = [result for result in results if result.error]
+    for result in results:
+        print_result(result)
+
+    counts = ', '.join(f'{sum(result.status == status for result in results)} {status}' for status in (GENERATED, UNCHANGED, CACHED, FAILED))
+    print(f'{len(results)} specs in {elapsed:.2f}s: {counts}')
+
+    if failures:
+        print(f'\n{len(failures)} spec(s) failed:', file=sys.stderr)
+        for result in failures:
+            print(f'\n--- {result.spec_path} ---\n{result.error}', file=sys.stderr)
+
+    if args.watch:
+        entries = {os.path.abspath(result.spec_path): result.cache_entry for result in results if result.cache_entry}
+        return watch_specs(args.targets, spec_paths, entries, cache, args.cache_file, options, fragment_dir, args.lazy, args.client, args.json_codec, args.package, args.split, args.debounce_ms / 1000, args.poll)
+
+    if failures:
+        return 1
+
+    print('DONE')
+    return 0
 
-print('DONE')
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
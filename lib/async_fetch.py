@@ -0,0 +1,252 @@
+import asyncio
+import time
+from types import SimpleNamespace
+from typing import Any, Awaitable, Callable, Collection, Dict, Iterable, List, Optional, Tuple, Type, TypeVar
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from lib.fetch_common import Timeout, DEFAULT_TIMEOUT, DEFAULT_RETRY_STATUSES, IDEMPOTENT_METHODS, build_url
+from lib.fetch_metrics import FetchCall, FetchObserver, url_path
+from lib.response_cache import CachedResponse, ResponseCache
+from lib.json_codec import JsonCodec, get_default_codec
+from lib.validation import Validator
+from lib.dataclass_conversion import Converter
+
+T = TypeVar('T')
+
+class AsyncFetchError(aiohttp.ClientError):
+    pass
+
+class RetryableStatus(Exception):
+    def __init__(self, status: int):
+        super().__init__(f'HTTP status {status}')
+        self.status = status
+
+class AsyncApiClient:
+    # asyncio counterpart of lib/typed_fetch.ApiClient, over one aiohttp.ClientSession. Connections are
+    # pooled and kept alive by the connector (limit in total, limit_per_host per host, 0 for no limit, as
+    # in aiohttp); on top of that a semaphore per host bounds the requests in flight, so a burst of
+    # thousands of calls queues here instead of piling up inside the connector. Retries follow ApiClient: failed connects for every
+    # method, errors and retry_statuses only for idempotent methods. JSON goes through codec, as in ApiClient.
+    # observer as in ApiClient; DNS and connect times are traced by sessions created while it is set.
+    # cache as in ApiClient, one ResponseCache can be shared by both.
+    def __init__(self, domain: str = '', limit: int = 100, limit_per_host: int = 10, keepalive_timeout: float = 15.0, retries: int = 3, backoff_factor: float = 0.1, retry_statuses: Collection[int] = DEFAULT_RETRY_STATUSES, timeout: Timeout = DEFAULT_TIMEOUT, codec: Optional[JsonCodec] = None, observer: Optional[FetchObserver] = None, cache: Optional[ResponseCache] = None):
+        if limit < 0 or limit_per_host < 0:
+            raise ValueError(f'limit and limit_per_host must be 0 (no limit) or more, got {limit} and {limit_per_host}')
+        self.domain = domain
+        self.codec = codec or get_default_codec()
+        self.observer = observer
+        self.cache = cache
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.retry_statuses = frozenset(retry_statuses)
+        if isinstance(timeout, tuple):
+            self.timeout = aiohttp.ClientTimeout(total=None, connect=timeout[0], sock_read=timeout[1])
+        else:
+            self.timeout = aiohttp.ClientTimeout(total=timeout)
+        # created on first use, aiohttp sessions have to be created inside the running event loop. The
+        # session and the semaphores belong to that loop: a client used from another loop (a second
+        # asyncio.run with the default client) gets new ones
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def bind_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # the previous loop is gone or busy elsewhere, its session cannot be closed from here
+            self._session = None
+            self._host_semaphores = {}
+            self._loop = loop
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        self.bind_loop()
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.limit, limit_per_host=self.limit_per_host, keepalive_timeout=self.keepalive_timeout)
+            # without an observer there is nothing to trace, and aiohttp skips its trace signals
+            trace_configs = [connection_trace_config()] if self.observer is not None else None
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout, headers={'Content-Type': 'application/json'}, trace_configs=trace_configs)
+        return self._session
+
+    def host_semaphore(self, url: str) -> Optional[asyncio.Semaphore]:
+        # None with limit_per_host=0, requests to a host are not limited then
+        if not self.limit_per_host:
+            return None
+        self.bind_loop()
+        host = urlsplit(url).netloc
+        semaphore = self._host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = self._host_semaphores[host] = asyncio.Semaphore(self.limit_per_host)
+        return semaphore
+
+    async def fetch(self, url_template: str, method: str, response_200: Type[T], query: Optional[Dict[str, Any]] = None, path: Any = None, body: Any = None, domain: Optional[str] = None, validator: Optional[Validator] = None, converter: Optional[Converter] = None) -> T:
+        return await self.send(method, build_url('', url_template, path, query), response_200, body=body, domain=domain, validator=validator, converter=converter, url_template=url_template)
+
+    async def send(self, method: str, url: str, response_200: Type[T], body: Any = None, domain: Optional[str] = None, validator: Optional[Validator] = None, converter: Optional[Converter] = None, url_template: Optional[str] = None) -> T:
+        # url is already formatted (path and query filled in), e.g. by a compile_url formatter;
+        # validator, converter and url_template as in ApiClient.send
+        full_url = (self.domain if domain is None else domain) + url
+        json_body = self.codec.dumps(body) if body else None
+
+        observer = self.observer
+        if observer is None:
+            return await self.send_request(method, full_url, json_body, validator, converter, None, url_template)
+        call = FetchCall(method, url_template or url_path(url), full_url)
+        call.bytes_out = len(json_body) if json_body else 0
+        observer.call_started(call)
+        try:
+            return await self.send_request(method, full_url, json_body, validator, converter, call, url_template)
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            call.total = time.perf_counter() - call.start
+            observer.call_finished(call)
+
+    async def send_request(self, method: str, full_url: str, json_body: Any, validator: Optional[Validator], converter: Optional[Converter], call: Optional[FetchCall], url_template: Optional[str] = None) -> Any:
+        # send without the observer, call is filled in when there is one
+        headers = call.headers if call is not None and call.headers else None
+
+        cache = self.cache
+        cached: Optional[CachedResponse] = None
+        if cache is not None:
+            cached = cache.lookup(method, full_url, url_template)
+            if cached is not None and cached.fresh():
+                if call is not None:
+                    call.cache = 'hit'
+                return self.decode_response(cached.content, validator, converter, call)
+            if cached is not None:
+                # stale: the server answers 304 Not Modified instead of the response when it did not change
+                headers = dict(headers or {}, **cached.validators())
+            if call is not None and cache.caches(method, url_template):
+                call.cache = 'miss'
+
+        semaphore = self.host_semaphore(full_url)
+        if semaphore is None:
+            status, content, response_headers = await self.request(method, full_url, json_body, headers, call)
+        else:
+            async with semaphore:
+                status, content, response_headers = await self.request(method, full_url, json_body, headers, call)
+
+        if call is not None:
+            call.bytes_in = len(content)
+        if cached is not None and status == 304:
+            cache.revalidated(cached, response_headers, url_template)  # type: ignore[union-attr]
+            if call is not None:
+                call.cache = 'revalidated'
+            return self.decode_response(cached.content, validator, converter, call)
+        if status >= 200 and status < 300:
+            if cache is not None:
+                cache.update(method, full_url, url_template, status, content, response_headers)
+            return self.decode_response(content, validator, converter, call)
+        try:
+            error_response = self.codec.loads(content)
+        except ValueError:
+            error_response = content.decode('utf-8', 'replace')
+        raise AsyncFetchError(f"HTTP Error: {status} - {error_response}")
+
+    async def request(self, method: str, full_url: str, json_body: Any, headers: Optional[Dict[str, str]], call: Optional[FetchCall]) -> Tuple[int, bytes, Any]:
+        # status, body and headers of the response, after retries
+        retry_any_error = method.upper() in IDEMPOTENT_METHODS
+        attempt = 0
+        while True:
+            try:
+                request_start = time.perf_counter() if call is not None else 0.0
+                async with self.session.request(method, full_url, data=json_body, headers=headers, trace_request_ctx=call) as response:
+                    if call is not None:
+                        call.ttfb = time.perf_counter() - request_start
+                        call.status = response.status
+                    if attempt < self.retries and retry_any_error and response.status in self.retry_statuses:
+                        raise RetryableStatus(response.status)
+                    return response.status, await response.read(), response.headers
+            except (RetryableStatus, aiohttp.ClientError, asyncio.TimeoutError) as error:
+                # a connect error means the request never reached the server
+                retryable = isinstance(error, (aiohttp.ClientConnectorError, RetryableStatus)) or retry_any_error
+                if attempt >= self.retries or not retryable:
+                    raise AsyncFetchError(f"Request failed: {error}") from error
+                await asyncio.sleep(self.backoff_factor * (2 ** attempt))
+                attempt += 1
+
+    def decode_response(self, content: bytes, validator: Optional[Validator], converter: Optional[Converter], call: Optional[FetchCall]) -> Any:
+        # a success response's body, from the server or the cache
+        decode_start = time.perf_counter() if call is not None else 0.0
+        try:
+            result: Any = { "data": self.codec.loads(content) }
+        except ValueError:
+            result = content.decode('utf-8', 'replace')
+        if validator is not None:
+            validator(result)
+        if converter is not None:
+            result = converter(result)
+        if call is not None:
+            call.decode = time.perf_counter() - decode_start
+        return result
+
+    async def close(self) -> None:
+        if self._session is not None and self._loop is asyncio.get_running_loop():
+            await self._session.close()
+        self._session = None
+
+    async def __aenter__(self) -> 'AsyncApiClient':
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+def connection_trace_config() -> aiohttp.TraceConfig:
+    # adds the DNS and connect times of a request to its FetchCall, passed as trace_request_ctx
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_dns_resolvehost_start.append(trace_start)
+    trace_config.on_dns_resolvehost_end.append(trace_dns_end)
+    trace_config.on_connection_create_start.append(trace_start)
+    trace_config.on_connection_create_end.append(trace_connect_end)
+    return trace_config
+
+async def trace_start(session: aiohttp.ClientSession, trace_config_ctx: SimpleNamespace, params: Any) -> None:
+    # DNS resolution happens inside connection creation, each has its own start
+    trace_config_ctx.starts = getattr(trace_config_ctx, 'starts', [])
+    trace_config_ctx.starts.append(time.perf_counter())
+
+async def trace_dns_end(session: aiohttp.ClientSession, trace_config_ctx: SimpleNamespace, params: Any) -> None:
+    call = trace_config_ctx.trace_request_ctx
+    elapsed = time.perf_counter() - trace_config_ctx.starts.pop()
+    if call is not None:
+        call.dns = (call.dns or 0.0) + elapsed
+
+async def trace_connect_end(session: aiohttp.ClientSession, trace_config_ctx: SimpleNamespace, params: Any) -> None:
+    call = trace_config_ctx.trace_request_ctx
+    elapsed = time.perf_counter() - trace_config_ctx.starts.pop()
+    if call is not None:
+        call.connect = (call.connect or 0.0) + elapsed
+
+async def gather_fetch(call: Callable[..., Awaitable[T]], calls: Iterable[Dict[str, Any]], limit: Optional[int] = None, return_exceptions: bool = False) -> List[Any]:
+    # Runs call(**kwargs) for every kwargs in calls concurrently and returns the results in the same
+    # order, e.g. gather_fetch(services.GET_pet_petId, [{'path': {'petId': i}} for i in ids]).
+    # limit caps how many of them are started at once, on top of the client's per-host limit.
+    semaphore = asyncio.Semaphore(limit) if limit else None
+
+    async def run(kwargs: Dict[str, Any]) -> T:
+        if semaphore is None:
+            return await call(**kwargs)
+        async with semaphore:
+            return await call(**kwargs)
+
+    return await asyncio.gather(*(run(kwargs) for kwargs in calls), return_exceptions=return_exceptions)
+
+_default_client: Optional[AsyncApiClient] = None
+
+def get_default_async_client() -> AsyncApiClient:
+    # shared by generated async services that are not given a client of their own
+    global _default_client
+    if _default_client is None:
+        _default_client = AsyncApiClient()
+    return _default_client
+
+def set_default_async_client(client: AsyncApiClient) -> None:
+    global _default_client
+    _default_client = client
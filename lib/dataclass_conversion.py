@@ -0,0 +1,223 @@
+import dataclasses
+import sys
+from typing import Annotated, Any, Callable, Dict, List, Literal, Optional, Tuple, Union, get_args, get_origin, get_type_hints
+
+# Runtime side of generate_models(..., model_style='dataclass'): turns decoded JSON (dicts and lists)
+# into the generated dataclasses. A converter is compiled once per type from its type hints; fields
+# whose hints need no conversion (str, int, Literal, Dict, TypedDict, ...) are copied as they are, so
+# converting a payload costs about one constructor call per object.
+
+Converter = Callable[[Any], Any]
+
+class Discriminator:
+    # Annotated[Union[...], Discriminator(property, {value: class name})] in generated classes: the
+    # member a value converts to is the one its property's value selects, as in the validators'
+    # dispatch tables. Classes are named, so the table does not depend on the order classes are defined in.
+    __slots__ = ('property', 'members')
+
+    def __init__(self, property: str, members: Dict[Any, str]):
+        self.property = property
+        self.members = members
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, Discriminator) and (self.property, self.members) == (other.property, other.members)
+
+    def __hash__(self) -> int:
+        return hash((self.property, tuple(self.members.items())))
+
+    def __repr__(self) -> str:
+        return f'Discriminator({self.property!r}, {self.members!r})'
+
+# type -> its converter, None when values of the type are used as they are
+_converters: Dict[Any, Optional[Converter]] = {}
+
+def compile_converter(type_hint: Any, namespace: Optional[Dict[str, Any]] = None) -> Optional[Converter]:
+    # None when nothing inside type_hint is a dataclass. namespace: where the class names of a
+    # Discriminator are looked up, the module of the class whose field has type_hint
+    try:
+        return _converters[type_hint]
+    except KeyError:
+        pass
+    except TypeError:
+        # unhashable hints are not cached
+        return _compile(type_hint, namespace)
+    converter = _converters[type_hint] = _compile(type_hint, namespace)
+    return converter
+
+def deferred_converter(resolve: Callable[[], Any]) -> Converter:
+    # compile_converter(resolve()) on the first call, so a converter can be set up before the type
+    # exists or is imported
+    converter: Optional[Converter] = None
+
+    def convert(value: Any) -> Any:
+        nonlocal converter
+        if converter is None:
+            converter = compile_converter(resolve()) or _identity
+        return converter(value)
+    return convert
+
+def _identity(value: Any) -> Any:
+    return value
+
+def _compile(type_hint: Any, namespace: Optional[Dict[str, Any]] = None) -> Optional[Converter]:
+    if isinstance(type_hint, type) and dataclasses.is_dataclass(type_hint):
+        return _compile_dataclass(type_hint)
+    if _is_typed_dict(type_hint):
+        return _compile_typed_dict(type_hint)
+    origin = get_origin(type_hint)
+    if origin is Annotated:
+        inner, *metadata = get_args(type_hint)
+        discriminator = next((item for item in metadata if isinstance(item, Discriminator)), None)
+        if discriminator is not None and namespace is not None:
+            return _compile_discriminated(discriminator, namespace)
+        return compile_converter(inner, namespace)
+    if origin is list:
+        args = get_args(type_hint)
+        item_converter = compile_converter(args[0], namespace) if args else None
+        if item_converter is None:
+            return None
+
+        def convert_list(value: Any) -> Any:
+            if type(value) is not list:
+                raise ValueError(f'expected list, got {type(value).__name__}')
+            return [item if item is None else item_converter(item) for item in value]
+        return convert_list
+    if origin is Union:
+        return _compile_union([arg for arg in get_args(type_hint) if arg is not type(None)], namespace)
+    return None
+
+def _compile_dataclass(cls: type) -> Converter:
+    # One constructor call with every field as an argument, generated as source like the validators
+    # of lib/generate_validators.py; fields that need no conversion are plain lookups. Absent optional
+    # fields are passed as None, their default.
+    namespace: Dict[str, Any] = {'cls': cls}
+    # recursive fields find this trampoline until the converter itself exists
+    _converters[cls] = lambda value: namespace['convert_dataclass'](value)
+    hints = get_type_hints(cls, include_extras=True)
+    module_namespace = _module_namespace(cls)
+    arguments = []
+    for index, field in enumerate(dataclasses.fields(cls)):
+        required = field.default is dataclasses.MISSING and field.default_factory is dataclasses.MISSING  # type: ignore
+        item = f'value[{field.name!r}]' if required else f'get({field.name!r})'
+        converter = compile_converter(hints[field.name], module_namespace)
+        if converter is None:
+            arguments.append(f'{field.name}={item}')
+        else:
+            namespace[f'convert_{index}'] = converter
+            arguments.append(f'{field.name}=convert_{index}(item) if (item := {item}) is not None else None')
+    source = (
+        'def convert_dataclass(value):\n'
+        '    if type(value) is not dict:\n'
+        '        raise ValueError(f"expected object for {cls.__name__}, got {type(value).__name__}")\n'
+        '    get = value.get\n'
+        '    try:\n'
+        f'        return cls({", ".join(arguments)})\n'
+        '    except KeyError as error:\n'
+        '        raise ValueError(f"{cls.__name__}: missing required field {error}") from None\n'
+    )
+    exec(source, namespace)
+    return namespace['convert_dataclass']
+
+def _compile_typed_dict(cls: type) -> Optional[Converter]:
+    # only the keys whose values need converting are replaced, in a copy
+    _converters[cls] = None
+    hints = get_type_hints(cls, include_extras=True)
+    module_namespace = _module_namespace(cls)
+    converters = [(name, converter) for name, converter in ((name, compile_converter(hint, module_namespace)) for name, hint in hints.items()) if converter is not None]
+    if not converters:
+        return None
+
+    def convert_typed_dict(value: Any) -> Any:
+        if type(value) is not dict:
+            return value
+        value = dict(value)
+        for name, converter in converters:
+            item = value.get(name)
+            if item is not None:
+                value[name] = converter(item)
+        return value
+
+    _converters[cls] = convert_typed_dict
+    return convert_typed_dict
+
+def _compile_discriminated(discriminator: Discriminator, namespace: Dict[str, Any]) -> Converter:
+    # one dict lookup selects the member
+    prop = discriminator.property
+    converters = {value: compile_converter(namespace[class_name], namespace) or _identity for value, class_name in discriminator.members.items()}
+
+    def convert_discriminated(value: Any) -> Any:
+        if type(value) is not dict:
+            raise ValueError(f'expected object, got {type(value).__name__}')
+        tag = value.get(prop)
+        # exact types only, as in the validators: True would find the member of 1
+        converter = converters.get(tag) if type(tag) is str or type(tag) is int else None
+        if converter is None:
+            raise ValueError(f'unknown {prop} {tag!r}, expected one of {", ".join(map(repr, converters))}')
+        return converter(value)
+    return convert_discriminated
+
+def _compile_union(members: List[Any], namespace: Optional[Dict[str, Any]] = None) -> Optional[Converter]:
+    converters = [compile_converter(member, namespace) for member in members]
+    if all(converter is None for converter in converters):
+        return None
+    if len(converters) == 1:
+        return converters[0]
+    candidates = [(_member_test(member), converter) for member, converter in zip(members, converters)]
+
+    def convert_union(value: Any) -> Any:
+        # Without a discriminator: the first member the value matches, one without keys the member
+        # lacks and whose Literal fields all hold one of their values
+        for matches, converter in candidates:
+            if not matches(value):
+                continue
+            if converter is None:
+                return value
+            try:
+                return converter(value)
+            except ValueError:
+                continue
+        raise ValueError(f'no member of the union matches {type(value).__name__}')
+    return convert_union
+
+def _member_test(type_hint: Any) -> Callable[[Any], bool]:
+    # whether a decoded value can be of type_hint, judged by its type, keys and Literal values only
+    if isinstance(type_hint, type) and (dataclasses.is_dataclass(type_hint) or _is_typed_dict(type_hint)):
+        hints = get_type_hints(type_hint)
+        if not hints:
+            # a class without properties (a oneOf of its own, a free-form object) takes any object
+            return lambda value: type(value) is dict
+        keys = frozenset(hints)
+        # generated Literals list enum values as strings, only string values are held against them
+        literals = [(name, get_args(hint)) for name, hint in ((name, _strip_optional(hint)) for name, hint in hints.items()) if get_origin(hint) is Literal]
+
+        def matches_class(value: Any) -> bool:
+            if type(value) is not dict or not keys.issuperset(value):
+                return False
+            return all(type(item) is not str or item in values for item, values in ((value.get(name), values) for name, values in literals))
+        return matches_class
+    origin = get_origin(type_hint)
+    if origin is Literal:
+        values = get_args(type_hint)
+        return lambda value: type(value) is not str or value in values
+    if origin is list:
+        return lambda value: type(value) is list
+    if type_hint is float:
+        return lambda value: type(value) is float or type(value) is int
+    if isinstance(type_hint, type) and type_hint is not object:
+        # exact types: bool is not an int here either
+        return lambda value: type(value) is type_hint
+    return lambda value: True
+
+def _strip_optional(type_hint: Any) -> Any:
+    if get_origin(type_hint) is Union:
+        args = [arg for arg in get_args(type_hint) if arg is not type(None)]
+        if len(args) == 1:
+            return args[0]
+    return type_hint
+
+def _module_namespace(cls: type) -> Optional[Dict[str, Any]]:
+    module = sys.modules.get(cls.__module__)
+    return vars(module) if module is not None else None
+
+def _is_typed_dict(type_hint: Any) -> bool:
+    return isinstance(type_hint, type) and issubclass(type_hint, dict) and hasattr(type_hint, '__annotations__') and hasattr(type_hint, '__total__')
@@ -0,0 +1,17 @@
+from typing import Any, Dict, Optional, Tuple, Union
+
+from lib.url_builder import cached_url_formatter
+
+# shared by the sync (lib/typed_fetch.py) and async (lib/async_fetch.py) clients
+
+# seconds, or (connect, read) seconds; None waits forever
+Timeout = Optional[Union[float, Tuple[float, float]]]
+
+DEFAULT_TIMEOUT: Timeout = (3.05, 30)
+DEFAULT_RETRY_STATUSES = (429, 502, 503, 504)
+# methods that may be sent again after the server could have seen them
+IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'PUT', 'DELETE', 'OPTIONS', 'TRACE'])
+
+def build_url(domain: str, url_template: str, path: Optional[Dict[str, Any]] = None, query: Optional[Dict[str, Any]] = None) -> str:
+    # values are serialized with the default OpenAPI styles, see lib/url_builder.py
+    return domain + cached_url_formatter(url_template)(path, query)
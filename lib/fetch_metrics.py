@@ -0,0 +1,196 @@
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Observing the calls of the sync (lib/typed_fetch.py) and async (lib/async_fetch.py) clients. A client
+# given an observer (ApiClient(observer=...), AsyncApiClient(observer=...)) records every call in a
+# FetchCall and hands it to the observer when the call starts and when it is done. Without an observer
+# (the default) the clients skip all of it: no FetchCall, no timing.
+
+# upper bounds of the latency histogram buckets, seconds; the last bucket takes everything slower
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class FetchCall:
+    # One call of an endpoint. Durations are seconds, None when they did not apply or were not measured.
+    __slots__ = ('method', 'url_template', 'url', 'start', 'headers', 'status', 'error', 'bytes_out', 'bytes_in', 'dns', 'connect', 'ttfb', 'decode', 'total', 'cache', 'context')
+
+    def __init__(self, method: str, url_template: str, url: str):
+        # method and url_template identify the endpoint: the METHOD and URL of its generated *_Method class
+        self.method = method.upper()
+        self.url_template = url_template
+        self.url = url
+        self.start = time.perf_counter()
+        # sent with the request; observers can add to it in call_started, e.g. a traceparent header
+        self.headers: Dict[str, str] = {}
+        # None when no response arrived
+        self.status: Optional[int] = None
+        # the exception the call raised, if any
+        self.error: Optional[BaseException] = None
+        self.bytes_out = 0
+        self.bytes_in = 0
+        # resolving the host; only the async client measures it separately, and only on a DNS cache miss
+        self.dns: Optional[float] = None
+        # opening connections, DNS included; None when a pooled connection was reused
+        self.connect: Optional[float] = None
+        # sending the request (connecting included) until the response headers arrived
+        self.ttfb: Optional[float] = None
+        # decoding, validating and converting a success response
+        self.decode: Optional[float] = None
+        self.total = 0.0
+        # with a ResponseCache (lib/response_cache.py): 'hit' served without a request, 'revalidated'
+        # after a 304 Not Modified, 'miss' otherwise; None for calls the cache does not handle
+        self.cache: Optional[str] = None
+        # free for observers, e.g. a tracing span opened in call_started and ended in call_finished
+        self.context: Any = None
+
+    @property
+    def endpoint(self) -> Tuple[str, str]:
+        return (self.method, self.url_template)
+
+class FetchObserver:
+    # Subclass and override either method. They run inline in the calling thread / task, so keep them
+    # cheap; an exception raised by them propagates to the caller.
+    def call_started(self, call: FetchCall) -> None:
+        pass
+
+    def call_finished(self, call: FetchCall) -> None:
+        pass
+
+class ObserverChain(FetchObserver):
+    # several observers on one client: started in order, finished in reverse order
+    def __init__(self, observers: Iterable[FetchObserver]):
+        self.observers = list(observers)
+
+    def call_started(self, call: FetchCall) -> None:
+        for observer in self.observers:
+            observer.call_started(call)
+
+    def call_finished(self, call: FetchCall) -> None:
+        for observer in reversed(self.observers):
+            observer.call_finished(call)
+
+class EndpointMetrics:
+    # totals of the finished calls of one endpoint
+    __slots__ = ('calls', 'errors', 'statuses', 'latency_buckets', 'total', 'max_total', 'ttfb', 'responses', 'dns', 'connect', 'connects', 'decode', 'decodes', 'cache_hits', 'cache_revalidations', 'bytes_out', 'bytes_in')
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        # status code -> calls
+        self.statuses: Dict[int, int] = {}
+        # calls per LATENCY_BUCKETS bucket, by total duration
+        self.latency_buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        # summed durations, seconds
+        self.total = 0.0
+        self.max_total = 0.0
+        self.ttfb = 0.0
+        # calls that got a response
+        self.responses = 0
+        self.dns = 0.0
+        self.connect = 0.0
+        # calls that opened a connection
+        self.connects = 0
+        self.decode = 0.0
+        # success responses decoded
+        self.decodes = 0
+        self.cache_hits = 0
+        self.cache_revalidations = 0
+        self.bytes_out = 0
+        self.bytes_in = 0
+
+    def add(self, call: FetchCall) -> None:
+        self.calls += 1
+        if call.error is not None:
+            self.errors += 1
+        if call.status is not None:
+            self.statuses[call.status] = self.statuses.get(call.status, 0) + 1
+        total = call.total
+        bucket = 0
+        while bucket < len(LATENCY_BUCKETS) and total > LATENCY_BUCKETS[bucket]:
+            bucket += 1
+        self.latency_buckets[bucket] += 1
+        self.total += total
+        if total > self.max_total:
+            self.max_total = total
+        if call.ttfb is not None:
+            self.ttfb += call.ttfb
+            self.responses += 1
+        if call.dns is not None:
+            self.dns += call.dns
+        if call.connect is not None:
+            self.connect += call.connect
+            self.connects += 1
+        if call.decode is not None:
+            self.decode += call.decode
+            self.decodes += 1
+        if call.cache == 'hit':
+            self.cache_hits += 1
+        elif call.cache == 'revalidated':
+            self.cache_revalidations += 1
+        self.bytes_out += call.bytes_out
+        self.bytes_in += call.bytes_in
+
+    def percentile(self, fraction: float) -> float:
+        # upper bound of the bucket holding the fraction (0-1) of calls, max_total for the last bucket
+        wanted = fraction * self.calls
+        seen = 0
+        for bucket, count in enumerate(self.latency_buckets):
+            seen += count
+            if count and seen >= wanted:
+                return LATENCY_BUCKETS[bucket] if bucket < len(LATENCY_BUCKETS) else self.max_total
+        return 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        calls = self.calls or 1
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'statuses': dict(sorted(self.statuses.items())),
+            'mean_s': self.total / calls,
+            'max_s': self.max_total,
+            'p50_s': self.percentile(0.5),
+            'p90_s': self.percentile(0.9),
+            'p99_s': self.percentile(0.99),
+            'mean_ttfb_s': self.ttfb / self.responses if self.responses else 0.0,
+            'mean_decode_s': self.decode / self.decodes if self.decodes else 0.0,
+            'connects': self.connects,
+            'mean_connect_s': self.connect / self.connects if self.connects else 0.0,
+            'dns_s': self.dns,
+            'cache_hits': self.cache_hits,
+            'cache_revalidations': self.cache_revalidations,
+            'bytes_out': self.bytes_out,
+            'bytes_in': self.bytes_in,
+            'latency_buckets': dict(zip([str(bound) for bound in LATENCY_BUCKETS] + ['inf'], self.latency_buckets)),
+        }
+
+class MetricsAggregator(FetchObserver):
+    # In-process totals per endpoint, safe to share between threads and clients. Adding a call is a
+    # dict lookup and a few additions under a lock; read with snapshot() or endpoint(), e.g. from a
+    # periodic reporter or a /metrics handler.
+    def __init__(self):
+        self._endpoints: Dict[Tuple[str, str], EndpointMetrics] = {}
+        self._lock = threading.Lock()
+
+    def call_finished(self, call: FetchCall) -> None:
+        with self._lock:
+            metrics = self._endpoints.get(call.endpoint)
+            if metrics is None:
+                metrics = self._endpoints[call.endpoint] = EndpointMetrics()
+            metrics.add(call)
+
+    def endpoint(self, method_class: Any) -> Optional[EndpointMetrics]:
+        # the metrics of a generated *_Method class, e.g. ModelMapping._store_order.POST
+        return self._endpoints.get((method_class.METHOD.upper(), method_class.URL))
+
+    def snapshot(self, reset: bool = False) -> Dict[str, Dict[str, Any]]:
+        # 'METHOD /url/{template}' -> EndpointMetrics.to_dict(); reset starts counting from zero again
+        with self._lock:
+            endpoints = self._endpoints
+            if reset:
+                self._endpoints = {}
+            items: List[Tuple[Tuple[str, str], Dict[str, Any]]] = [(key, metrics.to_dict()) for key, metrics in endpoints.items()]
+        return {f'{method} {url_template}': metrics for (method, url_template), metrics in sorted(items)}
+
+def url_path(url: str) -> str:
+    # the endpoint key of a call made without its URL template: the url without its query
+    return url.split('?', 1)[0]
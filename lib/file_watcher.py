@@ -0,0 +1,161 @@
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import time
+from typing import Dict, Iterable, Optional, Set, Tuple, Union
+
+# Change notification for generate_openapi.py --watch. Both watchers are given a set of directories
+# and report the paths below them that were created, written, moved or deleted; they do not recurse,
+# the caller lists every directory it cares about. InotifyWatcher uses Linux inotify through ctypes,
+# so nothing has to be installed; PollingWatcher compares directory listings and is used everywhere
+# else, or where inotify events do not arrive (some network and container filesystems).
+
+# inotify(7) constants
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+# a file is reported once it is closed after writing, not on every write; editors that save by
+# renaming a temporary file show up as a move
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+EVENT_HEADER = struct.Struct('iIII')
+READ_SIZE = 1 << 16
+
+DEFAULT_POLL_INTERVAL = 0.2
+
+class InotifyWatcher:
+    def __init__(self):
+        # raises OSError where inotify is not available
+        libc_name = ctypes.util.find_library('c')
+        if libc_name is None:
+            raise OSError(errno.ENOSYS, 'libc not found')
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(libc, 'inotify_init1'):
+            raise OSError(errno.ENOSYS, 'inotify is not available')
+        self._libc = libc
+        self._fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        # watch descriptor -> directory, and back
+        self._directories: Dict[int, str] = {}
+        self._descriptors: Dict[str, int] = {}
+
+    def watch(self, directories: Iterable[str]) -> None:
+        # watch exactly these directories from now on
+        wanted = {os.path.abspath(directory) for directory in directories}
+        for directory in set(self._descriptors) - wanted:
+            self._libc.inotify_rm_watch(self._fd, self._descriptors.pop(directory))
+        for directory in wanted - set(self._descriptors):
+            descriptor = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), WATCH_MASK)
+            if descriptor < 0:
+                error = ctypes.get_errno()
+                if error in (errno.ENOENT, errno.ENOTDIR):
+                    # removed in the meantime
+                    continue
+                # e.g. ENOSPC: the per-user watch limit (fs.inotify.max_user_watches) is reached
+                raise OSError(error, f'inotify_add_watch failed for {directory}')
+            self._directories[descriptor] = directory
+            self._descriptors[directory] = descriptor
+
+    def wait(self, timeout: Optional[float] = None) -> Set[str]:
+        # the paths changed since the last call, waiting up to timeout seconds (None: until something
+        # changes) for the first one; an empty set when nothing changed in time
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return set()
+        changed: Set[str] = set()
+        while True:
+            try:
+                data = os.read(self._fd, READ_SIZE)
+            except BlockingIOError:
+                return changed
+            offset = 0
+            while offset < len(data):
+                descriptor, mask, _, name_length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = data[offset:offset + name_length].rstrip(b'\0')
+                offset += name_length
+                if mask & IN_Q_OVERFLOW:
+                    # events were dropped: everything watched may have changed
+                    changed.update(self._directories.values())
+                    continue
+                directory = self._directories.get(descriptor)
+                if directory is None:
+                    continue
+                if mask & IN_IGNORED:
+                    # the directory is gone, or was unwatched
+                    del self._directories[descriptor]
+                    self._descriptors.pop(directory, None)
+                changed.add(os.path.join(directory, os.fsdecode(name)) if name else directory)
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+class PollingWatcher:
+    def __init__(self, interval: float = DEFAULT_POLL_INTERVAL):
+        self.interval = interval
+        # directory -> entry name -> (mtime_ns, size) of files, None for directories
+        self._listings: Dict[str, Dict[str, Optional[Tuple[int, int]]]] = {}
+
+    def watch(self, directories: Iterable[str]) -> None:
+        wanted = {os.path.abspath(directory) for directory in directories}
+        self._listings = {directory: self._listings[directory] if directory in self._listings else list_directory(directory) for directory in wanted}
+
+    def wait(self, timeout: Optional[float] = None) -> Set[str]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            changed: Set[str] = set()
+            for directory, listing in self._listings.items():
+                current = list_directory(directory)
+                if current != listing:
+                    changed.update(os.path.join(directory, name) for name in set(listing) | set(current) if name not in listing or name not in current or listing[name] != current[name])
+                    self._listings[directory] = current
+            if changed:
+                return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return changed
+            time.sleep(self.interval if deadline is None else max(0.0, min(self.interval, deadline - time.monotonic())))
+
+    def close(self) -> None:
+        self._listings = {}
+
+def list_directory(directory: str) -> Dict[str, Optional[Tuple[int, int]]]:
+    # subdirectories are only reported when they appear or disappear, like with inotify, not whenever
+    # a file in them is written
+    listing: Dict[str, Optional[Tuple[int, int]]] = {}
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        listing[entry.name] = None
+                    else:
+                        stat = entry.stat(follow_symlinks=False)
+                        listing[entry.name] = (stat.st_mtime_ns, stat.st_size)
+                except FileNotFoundError:
+                    continue
+    except (FileNotFoundError, NotADirectoryError):
+        pass
+    return listing
+
+def create_watcher(poll: bool = False) -> Union[InotifyWatcher, PollingWatcher]:
+    # inotify where available, unless poll is set
+    if not poll:
+        try:
+            return InotifyWatcher()
+        except OSError:
+            pass
+    return PollingWatcher()
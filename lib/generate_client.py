@@ -0,0 +1,154 @@
+from typing import Dict, Any, Optional, List, Tuple
+from lib.generate_models import Operation, build_context, DEDUPE_OFF, MODEL_STYLE_TYPEDDICT, MODEL_STYLE_DATACLASS
+from lib.name_allocator import NameAllocator
+from lib.ref_index import RefIndex
+from lib.url_builder import ParameterStyle, DEFAULT_PATH_STYLE, DEFAULT_QUERY_STYLE
+
+# module the client imports the generated types from, relative to its own package
+TYPES_MODULE = '__generated_api_types'
+
+def generate_client(openapi_spec: Dict[str, Any], fragment_cache: Optional[Dict[str, Any]] = None, ref_index: Optional[RefIndex] = None, dedupe: str = DEDUPE_OFF, validators: bool = False, model_style: str = MODEL_STYLE_TYPEDDICT, types_module: str = TYPES_MODULE) -> str:
+    # The client for the module generate_models produces from the same spec and options.
+    context = build_context(openapi_spec, fragment_cache, ref_index, dedupe, validators, model_style)
+    return render_client(context.operations, types_module, validators, model_style)
+
+def render_client(operations: List[Operation], types_module: str = TYPES_MODULE, validators: bool = False, model_style: str = MODEL_STYLE_TYPEDDICT) -> str:
+    # validators: the types module has validate_<Class> functions, the services can check responses
+    # model_style: dataclass responses are converted from the decoded JSON before they are returned
+    converters = model_style == MODEL_STYLE_DATACLASS
+    output = []
+
+    # annotations name generated classes, they are not evaluated so importing the client does not
+    # import the types (which may be a lazily imported package)
+    output.append("from __future__ import annotations\n")
+    if validators:
+        output.append("from typing import TYPE_CHECKING, Any, Collection, Dict, Optional, Union\n")
+        output.append("from lib.validation import select_validators\n")
+    else:
+        output.append("from typing import TYPE_CHECKING, Any, Dict, Optional\n")
+    output.append("from lib.url_builder import ParameterStyle, compile_url\n")
+    if converters:
+        output.append("from lib.dataclass_conversion import deferred_converter\n")
+    # aliased: a name starting with '__' would be mangled inside the class bodies below
+    output.append(f"from . import {types_module} as api_types\n\n")
+    # the transports are imported when a client is created, so only the one in use has to be installed
+    output.append("if TYPE_CHECKING:\n")
+    output.append("    from lib.typed_fetch import ApiClient\n")
+    output.append("    from lib.async_fetch import AsyncApiClient\n\n")
+
+    operation_names = NameAllocator()
+    named_operations = [(operation_names.allocate(f'{operation.method}{operation.path_key}'), operation) for operation in operations]
+
+    # every URL template is parsed once, at import, with a serializer per parameter style
+    for name, operation in named_operations:
+        output.append(f'_{name}_url = compile_url({operation.path!r}{style_arguments(operation.parameters)})\n')
+
+    if converters:
+        # the conversion of every typed response, compiled when the operation is first called
+        output.append('\n')
+        for name, operation in named_operations:
+            response_name = response_class_name(operation)
+            if response_name:
+                output.append(f'_{name}_converter = deferred_converter(lambda: api_types.{response_name})\n')
+
+    validate_parameter = ''
+    if validators:
+        # the response validator of every operation with a typed response, by name
+        output.append("\n_VALIDATORS = {\n")
+        for name, operation in named_operations:
+            response_name = response_class_name(operation)
+            if response_name:
+                output.append(f"    '{name}': 'validate_{response_name}',\n")
+        output.append("}\n")
+        validate_parameter = ', validate: Union[bool, Collection[str]] = False'
+
+    # validate: True for every operation, or the names of the operations whose responses are checked
+    select_validators_line = "        self.validators = select_validators(api_types, _VALIDATORS, validate)\n" if validators else ''
+
+    output.append("\n\nclass Services:\n")
+    output.append(f"    def __init__(self, client: Optional['ApiClient'] = None, domain: Optional[str] = None{validate_parameter}):\n")
+    output.append("        if client is None:\n")
+    output.append("            from lib.typed_fetch import get_default_client\n")
+    output.append("            client = get_default_client()\n")
+    output.append("        self.client = client\n")
+    output.append("        self.domain = domain\n")
+    output.append(select_validators_line)
+    for name, operation in named_operations:
+        output.append('\n')
+        output.append(generate_operation(name, operation, asynchronous=False, validators=validators, converters=converters))
+
+    output.append("\n\nclass AsyncServices:\n")
+    output.append(f"    def __init__(self, client: Optional['AsyncApiClient'] = None, domain: Optional[str] = None{validate_parameter}):\n")
+    output.append("        if client is None:\n")
+    output.append("            from lib.async_fetch import get_default_async_client\n")
+    output.append("            client = get_default_async_client()\n")
+    output.append("        self.client = client\n")
+    output.append("        self.domain = domain\n")
+    output.append(select_validators_line)
+    for name, operation in named_operations:
+        output.append('\n')
+        output.append(generate_operation(name, operation, asynchronous=True, validators=validators, converters=converters))
+
+    return "".join(output)
+
+def generate_operation(name: str, operation: Operation, asynchronous: bool, validators: bool = False, converters: bool = False) -> str:
+    parameters = operation_parameters(operation)
+    response_type = response_class(operation)
+    url_arguments = ', '.join(['path' if takes_parameters(operation, 'path') else 'None', 'query' if takes_parameters(operation, 'query') else 'None'])
+    body_argument = ', body=request_body' if operation.request_body_class else ''
+    validator_argument = f", validator=self.validators.get('{name}')" if validators and response_class_name(operation) else ''
+    converter_argument = f', converter=_{name}_converter' if converters and response_class_name(operation) else ''
+    definition, call = ('async def', 'await self.client.send') if asynchronous else ('def', 'self.client.send')
+    lines = [
+        f'    # {operation.method} {operation.path}\n',
+        f'    {definition} {name}(self{parameters}) -> {response_type}:\n',
+        f'        return {call}("{operation.method}", _{name}_url({url_arguments}), {response_type}{body_argument}, domain=self.domain{validator_argument}{converter_argument}, url_template={operation.path!r})\n',
+    ]
+    return "".join(lines)
+
+def style_arguments(parameters: List[Tuple[str, str, ParameterStyle]]) -> str:
+    # compile_url keyword arguments for a generated client: the (name, location, style) parameters of
+    # an operation whose style differs from the default for their location
+    arguments = []
+    for location, default in (('path', DEFAULT_PATH_STYLE), ('query', DEFAULT_QUERY_STYLE)):
+        styles = []
+        for name, parameter_location, style in parameters:
+            style = ParameterStyle(*style)
+            if parameter_location == location and style != default:
+                styles.append(f'{name!r}: ParameterStyle({style.style!r}, {style.explode}, {style.allow_reserved})')
+        if styles:
+            arguments.append(f'{location}_styles={{{", ".join(styles)}}}')
+    return ''.join(f', {argument}' for argument in arguments)
+
+def takes_parameters(operation: Operation, location: str) -> bool:
+    # whether the operation has 'path' / 'query' parameters, with or without a class for them
+    return any(parameter_location == location for _, parameter_location, _ in operation.parameters)
+
+def operation_parameters(operation: Operation) -> str:
+    # keyword-only parameters of an operation method; parameters whose schemas gave no class (no type
+    # declared) are still taken, as plain dicts
+    parameters = []
+    if operation.path_class:
+        parameters.append(f'path: api_types.{operation.path_class}')
+    elif takes_parameters(operation, 'path'):
+        parameters.append('path: Dict[str, Any]')
+    if operation.request_body_class:
+        parameters.append(f'request_body: api_types.{operation.request_body_class}')
+    if operation.query_class:
+        parameters.append(f'query: Optional[api_types.{operation.query_class}] = None')
+    elif takes_parameters(operation, 'query'):
+        parameters.append('query: Optional[Dict[str, Any]] = None')
+    if not parameters:
+        return ''
+    return ', *, ' + ', '.join(parameters)
+
+def response_class(operation: Operation) -> str:
+    response_name = response_class_name(operation)
+    return f'api_types.{response_name}' if response_name else 'Any'
+
+def response_class_name(operation: Operation) -> Optional[str]:
+    # the success response typed_fetch returns ({"data": ...}), 200 or else the first 2xx
+    for status in ['200'] + sorted(operation.response_classes):
+        if status.startswith('2') and status in operation.response_classes:
+            return operation.response_classes[status]
+    return None
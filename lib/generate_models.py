@@ -1,36 +1,209 @@
+import hashlib
+import json
 import re
-from typing import Dict, Any, Optional, List, Set, Union, Tuple, Type, Literal
+from typing import Dict, Any, Optional, List, Set, Union, Tuple, Type, Literal, Iterable, Iterator, TextIO, NamedTuple
 from typing_extensions import TypedDict
-
-def sanitize_class_name(name: str) -> str:
-    name = re.sub(r'\W|^(?=\d)', '_', name)
-    if name.startswith('__'):
-        name = '_' + name.lstrip('_')
-    return name
-
-def generate_models(openapi_spec: Dict[str, Any]) -> str:
-    models = []
-    generated_class_names: Set[str] = set()
-    model_dependencies: Dict[str, Set[str]] = {}
-
-    model_mapping = {}
-    component_schemas = openapi_spec.get('components', {}).get('schemas', {}) or openapi_spec.get('definitions', {})
-
+from lib.ref_index import RefIndex, UnresolvedRefError
+from lib.lazy_spec import LazyMapping
+from lib.name_allocator import NameAllocator, sanitize_class_name
+from lib.generation_stats import GenerationStats
+from lib.url_builder import ParameterStyle, parameter_style
+from lib.generate_validators import Check, Field, type_check, schema_check, union_discriminator, generate_object_validator, generate_value_validator, generate_alias_validator, generate_dispatch_table
+
+# How structurally identical inline schemas are handled (dedupe option)
+DEDUPE_OFF = 'off'  # every occurrence gets its own class
+DEDUPE_ALIAS = 'alias'  # later occurrences keep their name as an alias of the first class (`X = First`)
+DEDUPE_REUSE = 'reuse'  # later occurrences reference the first class directly
+DEDUPE_MODES = (DEDUPE_OFF, DEDUPE_ALIAS, DEDUPE_REUSE)
+
+# What classes with properties are generated as (model_style option)
+MODEL_STYLE_TYPEDDICT = 'typeddict'  # TypedDicts, responses stay the decoded dicts
+MODEL_STYLE_DATACLASS = 'dataclass'  # slotted dataclasses, the client converts responses (lib/dataclass_conversion.py)
+MODEL_STYLES = (MODEL_STYLE_TYPEDDICT, MODEL_STYLE_DATACLASS)
+
+# schema keywords that do not change the generated class
+DOCUMENTATION_KEYWORDS = {'description', 'title', 'example', 'examples', 'xml', 'externalDocs', 'format'}
+
+# Swagger 2 collectionFormat of an array parameter -> OpenAPI 3 style, explode
+COLLECTION_FORMATS = {'csv': ('form', False), 'ssv': ('spaceDelimited', False), 'pipes': ('pipeDelimited', False), 'multi': ('form', True)}
+
+class Operation(NamedTuple):
+    # one path + method and the classes generated for it, used to generate clients (lib/generate_client.py)
+    path_key: str
+    path: str
+    method: str
+    method_class: str
+    query_class: Optional[str]
+    path_class: Optional[str]
+    request_body_class: Optional[str]
+    response_classes: Dict[str, str]
+    # (name, 'path' | 'query', style) of every path and query parameter
+    parameters: List[Tuple[str, str, ParameterStyle]]
+
+# One property of an object schema as compile_fields analysed it: (property, required, nullable, class
+# line, validator check (None without validators), component class its type refers to, nested kind,
+# class name suffix). The nested kind is set for a property whose type is a class of its own, 'object',
+# 'array' (of objects) or 'oneOf'; the line and check are left to generate_model then. Plain tuples of
+# strings, which the garbage collector stops tracking, as plans are kept for the whole run.
+FieldPlan = Tuple[str, bool, bool, Optional[str], Optional[Check], Optional[str], Optional[str], str]
+
+class GenerationContext:
+    # state shared by one collect_models run and all generate_model calls made during it
+    def __init__(self, ref_index: RefIndex, dedupe: str = DEDUPE_OFF, validators: bool = False, model_style: str = MODEL_STYLE_TYPEDDICT, stats: Optional[GenerationStats] = None):
+        if dedupe not in DEDUPE_MODES:
+            raise ValueError(f"Unknown dedupe mode '{dedupe}', expected one of {', '.join(DEDUPE_MODES)}")
+        if model_style not in MODEL_STYLES:
+            raise ValueError(f"Unknown model style '{model_style}', expected one of {', '.join(MODEL_STYLES)}")
+        self.ref_index = ref_index
+        self.dedupe = dedupe
+        self.model_style = model_style
+        # emit a validate_<Class> function after every class (lib/generate_validators.py)
+        self.validators = validators
+        # instrumentation, None unless asked for (lib/generation_stats.py)
+        self.stats = stats
+        self.models: List[Tuple[str, str]] = []
+        self.names = NameAllocator()
+        # ModelMapping attributes, a namespace of their own
+        self.path_keys = NameAllocator()
+        # component schemas claim their names before any inline schema can take them, so a $ref always
+        # finds the component's class under component_classes[name]
+        self.component_classes: Dict[str, str] = {name: self.names.allocate(name) for name in ref_index.component_schemas}
+        self.model_dependencies: Dict[str, Set[str]] = {}
+        self.model_mapping: Dict[str, Tuple[str, str]] = {}
+        self.operations: List[Operation] = []
+        # (index of its first model, entry key) for every component schema / path, in order; the
+        # models up to the next start were generated for that entry (see model_entries)
+        self.entry_starts: List[Tuple[int, str]] = []
+        # structural key of a schema -> the class generated for its first occurrence
+        self.shapes: Dict[str, str] = {}
+        # (shape key, class name, reused) for every shapes lookup, in order; replayed by restore_fragment
+        self.shape_log: List[Tuple[str, str, bool]] = []
+        # id(schema) -> (schema, structural key); the schema is kept so its id cannot be reused, lazily
+        # loaded specs decode a new object on every access
+        self.shape_keys: Dict[int, Tuple[Any, str]] = {}
+        # id(schema) -> its properties as compile_fields analysed them; the schemas are kept so their ids
+        # cannot be reused, like in shape_keys
+        self.field_plans: Dict[int, Tuple[FieldPlan, ...]] = {}
+        self.field_plan_schemas: List[Any] = []
+        # whether compile_fields keeps what it analyses: only while the component schemas are
+        # generated, schemas reached from paths do not repeat unless a $ref leads back to a component
+        self.keep_field_plans = False
+
+def generate_models(openapi_spec: Dict[str, Any], fragment_cache: Optional[Dict[str, Any]] = None, ref_index: Optional[RefIndex] = None, dedupe: str = DEDUPE_OFF, validators: bool = False, model_style: str = MODEL_STYLE_TYPEDDICT, stats: Optional[GenerationStats] = None) -> str:
+    return "".join(iter_generate_models(openapi_spec, fragment_cache, ref_index, dedupe, validators, model_style, stats))
+
+def write_models(openapi_spec: Dict[str, Any], output: TextIO, fragment_cache: Optional[Dict[str, Any]] = None, ref_index: Optional[RefIndex] = None, dedupe: str = DEDUPE_OFF, validators: bool = False, model_style: str = MODEL_STYLE_TYPEDDICT, stats: Optional[GenerationStats] = None) -> None:
+    for chunk in iter_generate_models(openapi_spec, fragment_cache, ref_index, dedupe, validators, model_style, stats):
+        output.write(chunk)
+
+def iter_generate_models(openapi_spec: Dict[str, Any], fragment_cache: Optional[Dict[str, Any]] = None, ref_index: Optional[RefIndex] = None, dedupe: str = DEDUPE_OFF, validators: bool = False, model_style: str = MODEL_STYLE_TYPEDDICT, stats: Optional[GenerationStats] = None) -> Iterator[str]:
+    # The output in chunks (one per class), in the order generate_models would join them.
+    yield from iter_render_context(build_context(openapi_spec, fragment_cache, ref_index, dedupe, validators, model_style, stats))
+
+def iter_render_context(context: GenerationContext) -> Iterator[str]:
+    # Classes can only be ordered once every class is known, so the code of all of them is collected
+    # and held until the last chunk; only the module text is never assembled in one piece. Consumes
+    # context.models and context.model_dependencies.
+    stats = context.stats
+    if stats is not None:
+        stats.start_phase('topological_sort')
+    sorted_models = topological_sort(context.models, context.model_dependencies)
+    context.models, context.model_dependencies = [], {}
+    if stats is not None:
+        stats.end_phase('topological_sort')
+        # including whatever the consumer does with each chunk, e.g. writing it
+        stats.start_phase('render')
+    yield from iter_render_models(sorted_models, context.model_mapping, context.validators, context.model_style)
+    if stats is not None:
+        stats.end_phase('render')
+
+def collect_models(openapi_spec: Dict[str, Any], fragment_cache: Optional[Dict[str, Any]] = None, ref_index: Optional[RefIndex] = None, dedupe: str = DEDUPE_OFF, validators: bool = False, model_style: str = MODEL_STYLE_TYPEDDICT, stats: Optional[GenerationStats] = None) -> Tuple[List[Tuple[str, str]], Dict[str, Set[str]], Dict[str, Tuple[str, str]]]:
+    context = build_context(openapi_spec, fragment_cache, ref_index, dedupe, validators, model_style, stats)
+    return context.models, context.model_dependencies, context.model_mapping
+
+def build_context(openapi_spec: Dict[str, Any], fragment_cache: Optional[Dict[str, Any]] = None, ref_index: Optional[RefIndex] = None, dedupe: str = DEDUPE_OFF, validators: bool = False, model_style: str = MODEL_STYLE_TYPEDDICT, stats: Optional[GenerationStats] = None) -> GenerationContext:
+    if ref_index is None:
+        if stats is not None:
+            stats.start_phase('ref_index')
+        ref_index = RefIndex(openapi_spec)
+        if stats is not None:
+            stats.end_phase('ref_index')
+    if ref_index.unresolved:
+        raise UnresolvedRefError(ref_index.unresolved)
+    component_schemas = ref_index.component_schemas
+    resolutions = ref_index.resolutions
+
+    context = GenerationContext(ref_index, dedupe, validators, model_style, stats)
+    models = context.models
+    model_dependencies = context.model_dependencies
+    model_mapping = context.model_mapping
+
+    # fragment_cache holds the classes generated per component schema / path on a previous run;
+    # entries whose fingerprint still matches are replayed instead of regenerated
+    incremental = fragment_cache is not None
+    previous_fragments: Dict[str, Any] = dict(fragment_cache) if fragment_cache else {}
+    fragments: Dict[str, Any] = {}
+    ref_hashes: Dict[str, str] = {}
+
+    if stats is not None:
+        stats.start_phase('schemas')
+    # a lazily loaded spec decodes a fresh copy of every component here, which no $ref resolves to: its
+    # plans would never be reused, only keep every schema alive
+    context.keep_field_plans = not isinstance(component_schemas, LazyMapping)
     for schema_name, schema in component_schemas.items():
+        fragment_key = f'schemas/{schema_name}'
+        context.entry_starts.append((len(models), fragment_key))
+        if stats is not None:
+            stats.start_entry(fragment_key)
+        if incremental:
+            fingerprint = entry_fingerprint(schema, context, ref_hashes)
+            fragment = previous_fragments.get(fragment_key)
+            if restore_fragment(fragment, fingerprint, context):
+                fragments[fragment_key] = fragment
+                if stats is not None:
+                    stats.count('fragments_restored')
+                    stats.end_entry(fragment_key)
+                continue
+            start = fragment_start(context)
+
+        # component schemas always get their own class, inline schemas may reuse theirs
         model_code, model_name = generate_model(
             schema,
             schema_name,
-            generated_class_names,
-            models,
-            component_schemas,
-            model_dependencies
+            context,
+            reuse_shape=False,
+            class_name=context.component_classes[schema_name]
         )
         if model_code:
             models.append((model_name, model_code))
 
+        if incremental:
+            fragments[fragment_key] = capture_fragment(fingerprint, context, start)
+        if stats is not None:
+            stats.end_entry(fragment_key)
+
+    context.keep_field_plans = False
+    if stats is not None:
+        stats.end_phase('schemas')
+        stats.start_phase('paths')
     for path, methods in openapi_spec.get('paths', {}).items():
-        path_key = sanitize_class_name(path.replace('/', '_').replace('{', '').replace('}', ''))
-        
+        fragment_key = f'paths/{path}'
+        context.entry_starts.append((len(models), fragment_key))
+        if stats is not None:
+            stats.start_entry(fragment_key)
+        if incremental:
+            fingerprint = entry_fingerprint({'path': path, 'methods': methods}, context, ref_hashes)
+            fragment = previous_fragments.get(fragment_key)
+            if restore_fragment(fragment, fingerprint, context):
+                fragments[fragment_key] = fragment
+                if stats is not None:
+                    stats.count('fragments_restored')
+                    stats.end_entry(fragment_key)
+                continue
+            start = fragment_start(context)
+
+        # '/a-b' and '/a_b' sanitize alike, the later path gets a suffixed key
+        path_key = context.path_keys.allocate(path_key_base(path))
         method_classes = {}
 
         for method, details in methods.items():
@@ -40,19 +213,32 @@ def generate_models(openapi_spec: Dict[str, Any]) -> str:
             query_parameters_class = None
             path_parameters_class = None
             request_body_class = None
+            request_body_schema = None
             response_classes = {}
+            parameters = []
 
             if 'parameters' in details:
                 query_param_fields = {}
                 path_param_fields = {}
 
                 for param in details['parameters']:
+                    if '$ref' in param:
+                        param = ref_index.resolve(param['$ref'])
                     param_in = param['in']
                     param_name = param['name']
                     param_schema = param.get('schema')
+                    if param_in in ('path', 'query'):
+                        parameters.append((param_name, param_in, parameter_style_of(param)))
+                        if param_schema is None and 'type' in param:
+                            # Swagger 2 declares the type on the parameter itself
+                            param_schema = param
                     if param_schema:
                         if '$ref' in param_schema:
-                            param_schema = resolve_ref(param_schema['$ref'], component_schemas)
+                            param_schema = ref_index.resolve(param_schema['$ref'])
+                        if param_in == 'body':
+                            # Swagger 2: the JSON request body is a parameter
+                            request_body_schema = param_schema
+                            continue
                         required = param.get('required', False)
                         type_hint = map_type(param_schema.get('type')) # type: ignore
                         
@@ -62,208 +248,564 @@ def generate_models(openapi_spec: Dict[str, Any]) -> str:
                             path_param_fields[param_name] = (type_hint, required)
                 
                 if query_param_fields:
-                    query_param_class_name = sanitize_class_name(f"{method_key}_QueryParams")
+                    query_param_class_name = context.names.allocate(f"{method_key}_QueryParams")
                     query_param_class_code = generate_parameter_class(query_param_class_name, query_param_fields, base_class="TypedDict")
                     models.append((query_param_class_name, query_param_class_code))
                     query_parameters_class = query_param_class_name
 
                 if path_param_fields:
-                    path_param_class_name = sanitize_class_name(f"{method_key}_PathParams")
+                    path_param_class_name = context.names.allocate(f"{method_key}_PathParams")
                     path_param_class_code = generate_parameter_class(path_param_class_name, path_param_fields, base_class="TypedDict")
                     models.append((path_param_class_name, path_param_class_code))
                     path_parameters_class = path_param_class_name
 
             if 'requestBody' in details:
-                schema = details['requestBody']['content']['application/json']['schema']
-                if '$ref' in schema:
-                    schema = resolve_ref(schema['$ref'], component_schemas)
+                request_body = details['requestBody']
+                if '$ref' in request_body:
+                    request_body = ref_index.resolve(request_body['$ref'])
+                request_body_schema = request_body['content']['application/json']['schema']
+                if '$ref' in request_body_schema:
+                    request_body_schema = ref_index.resolve(request_body_schema['$ref'])
+
+            if request_body_schema is not None:
                 model_code, model_name = generate_model(
-                    schema,
+                    request_body_schema,
                     sanitize_class_name(f"{method_key}_RequestBody"),
-                    generated_class_names,
-                    models,
-                    component_schemas,
-                    model_dependencies,
+                    context,
                     base_class="TypedDict"
                 )
                 if model_code:
                     models.append((model_name, model_code))
-                    request_body_class = model_name
+                request_body_class = model_name
 
             if 'responses' in details:
                 for status, response in details['responses'].items():
-                    if 'content' in response and 'application/json' in response['content']:
-                        schema = response['content']['application/json']['schema']
+                    if '$ref' in response:
+                        response = ref_index.resolve(response['$ref'])
+                    schema = response_schema(response)
+                    if schema is not None:
                         if '$ref' in schema:
-                            schema = resolve_ref(schema['$ref'], component_schemas)
+                            schema = ref_index.resolve(schema['$ref'])
                         if 'oneOf' in schema:
+                            response_class_name = context.names.allocate(f"{method_key}_Response_{status}")
+                            model_dependencies[response_class_name] = set()
                             one_of_models = []
                             for idx, sub_schema in enumerate(schema['oneOf']):
                                 sub_model_code, sub_model_name = generate_model(
                                     sub_schema,
                                     sanitize_class_name(f"{method_key}_Response_{status}_OneOf_{idx}"),
-                                    generated_class_names,
-                                    models,
-                                    component_schemas,
-                                    model_dependencies
+                                    context
                                 )
                                 if sub_model_code:
                                     models.append((sub_model_name, sub_model_code))
-                                    one_of_models.append(sub_model_name)
-                                    model_dependencies[model_name].add(sub_model_name)
-                            type_hint = 'Union[\n    {}\n]'.format(",\n    ".join(one_of_models))
-                            response_class_name = sanitize_class_name(f"{method_key}_Response_{status}")
+                                one_of_models.append(sub_model_name)
+                                model_dependencies[response_class_name].add(sub_model_name)
+                            type_hint = union_hint(schema, one_of_models, context)
                             response_class_code = generate_union_response_class(response_class_name, type_hint)
+                            if context.validators:
+                                response_class_code += '\n\n' + generate_object_validator(response_class_name, [('data', True, False, union_check(schema, one_of_models, response_class_name, context))])
                             models.append((response_class_name, response_class_code))
                             response_classes[status] = response_class_name
                         else:
                             model_code, model_name = generate_model(
                                 schema,
                                 sanitize_class_name(f"{method_key}_Response_Status{status}"),
-                                generated_class_names,
-                                models,
-                                component_schemas,
-                                model_dependencies
+                                context
                             )
                             if model_code:
                                 models.append((model_name, model_code))
-                                response_class_name = sanitize_class_name(f"{method_key}_Response_{status}")
-                                response_class_code = generate_typed_dict_response_class(response_class_name, model_name)
-                                models.append((response_class_name, response_class_code))
-                                response_classes[status] = response_class_name
+                            response_class_name = context.names.allocate(f"{method_key}_Response_{status}")
+                            response_class_code = generate_typed_dict_response_class(response_class_name, model_name)
+                            if context.validators:
+                                response_class_code += '\n\n' + generate_object_validator(response_class_name, [('data', True, False, ('model', model_name))])
+                            models.append((response_class_name, response_class_code))
+                            response_classes[status] = response_class_name
 
-            method_class_name = sanitize_class_name(f"{method_key}_Method")
+            method_class_name = context.names.allocate(f"{method_key}_Method")
             method_class_code = generate_method_class(method_class_name, query_parameters_class, path_parameters_class, request_body_class, response_classes, path, method_name)
             models.append((method_class_name, method_class_code))
             method_classes[method_name] = method_class_name
+            context.operations.append(Operation(path_key, path, method_name, method_class_name, query_parameters_class, path_parameters_class, request_body_class, response_classes, parameters))
         
-        path_class_name = sanitize_class_name(f"{path_key}_API")
+        path_class_name = context.names.allocate(f"{path_key}_API")
         path_class_code = generate_path_class(path_class_name, method_classes)
         models.append((path_class_name, path_class_code))
         model_mapping[path_key] = (path_class_name, path)  # store path for comment generation
 
-    sorted_models = topological_sort(models, model_dependencies)
-
-    output = []
+        if incremental:
+            fragments[fragment_key] = capture_fragment(fingerprint, context, start, (path_key, path_class_name, path))
+        if stats is not None:
+            stats.end_entry(fragment_key)
+
+    if stats is not None:
+        stats.end_phase('paths')
+        stats.count('classes', len(models))
+        stats.count('operations', len(context.operations))
+        stats.count('ref_resolutions', ref_index.resolutions - resolutions)
+        if incremental:
+            stats.count('fragments_generated', len(fragments) - stats.counts.get('fragments_restored', 0))
+
+    # refs resolved lazily (e.g. without prebuild) are only known to be broken at this point
+    if ref_index.unresolved:
+        raise UnresolvedRefError(ref_index.unresolved)
+
+    if fragment_cache is not None:
+        fragment_cache.clear()
+        fragment_cache.update(fragments)
+
+    return context
+
+def model_entries(context: GenerationContext) -> Dict[str, str]:
+    # class name -> key of the component schema / path entry it was generated for
+    entries = {}
+    ends = [start for start, _ in context.entry_starts[1:]] + [len(context.models)]
+    for (start, entry_key), end in zip(context.entry_starts, ends):
+        for name, _ in context.models[start:end]:
+            entries[name] = entry_key
+    return entries
+
+def response_schema(response: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    # the JSON schema of a response, None when it has none
+    if 'content' in response:
+        media = response['content'].get('application/json')
+        return media.get('schema') if media else None
+    # Swagger 2 declares it on the response itself
+    return response.get('schema')
+
+def path_key_base(path: str) -> str:
+    return path.replace('/', '_').replace('{', '').replace('}', '')
+
+def parameter_style_of(param: Dict[str, Any]) -> ParameterStyle:
+    if param.get('type') == 'array':
+        # Swagger 2 array parameter
+        style, explode = COLLECTION_FORMATS.get(param.get('collectionFormat', 'csv'), ('form', False))
+        return ParameterStyle('simple' if param['in'] == 'path' else style, explode)
+    return parameter_style(param['in'], param.get('style'), param.get('explode'), param.get('allowReserved', False))
+
+def entry_fingerprint(entry: Any, context: GenerationContext, ref_hashes: Dict[str, str]) -> str:
+    # An entry's generated code depends on its own schema and on the content of every schema reachable
+    # through its $refs, however deep: refs that are not component schemas are inlined, and validators
+    # read the enums of referenced properties for their discriminator tables.
+    entry_json = canonical_json(entry)
+    digest = hashlib.sha256(f'{context.dedupe}\0{context.validators}\0{context.model_style}\0{entry_json}'.encode('utf-8'))
+    for ref in sorted(json_refs(entry_json)):
+        digest.update(f'\0{ref}\0{closure_digest(ref, context, ref_hashes)}'.encode('utf-8'))
+    return digest.hexdigest()
+
+def closure_digest(ref: str, context: GenerationContext, ref_hashes: Dict[str, str]) -> str:
+    # Hash of the class name and content of the schema ref points to and of every schema reachable from
+    # it, computed once per run. The refs are walked depth first as in Tarjan's algorithm: schemas that
+    # reference each other (a strongly connected component) share one digest, over their own contents
+    # and the digests of the components they reference.
+    known = ref_hashes.get(ref)
+    if known is not None:
+        return known
+    index: Dict[str, int] = {}
+    lowlink: Dict[str, int] = {}
+    contents: Dict[str, Tuple[str, List[str]]] = {}
+    stack: List[str] = []
+    # (ref, position of the next of its refs to visit)
+    work = [(ref, 0)]
+    while work:
+        node, position = work.pop()
+        if position == 0:
+            index[node] = lowlink[node] = len(index)
+            stack.append(node)
+            contents[node] = ref_content(node, context)
+        refs = contents[node][1]
+        while position < len(refs):
+            child = refs[position]
+            position += 1
+            if child in ref_hashes:
+                continue
+            if child not in index:
+                work.append((node, position))
+                work.append((child, 0))
+                break
+            # on the stack: refs seen in this walk but not in ref_hashes are in an unfinished component
+            lowlink[node] = min(lowlink[node], index[child])
+        else:
+            if lowlink[node] == index[node]:
+                members = stack[stack.index(node):]
+                del stack[stack.index(node):]
+                member_set = set(members)
+                digest = hashlib.sha256()
+                for member in sorted(members):
+                    digest.update(f'\0{member}\0{contents[member][0]}'.encode('utf-8'))
+                for child_digest in sorted({ref_hashes[child] for member in members for child in contents[member][1] if child not in member_set}):
+                    digest.update(f'\0{child_digest}'.encode('utf-8'))
+                for member in members:
+                    ref_hashes[member] = digest.hexdigest()
+            if work:
+                parent = work[-1][0]
+                lowlink[parent] = min(lowlink[parent], lowlink[node])
+    return ref_hashes[ref]
+
+def ref_content(ref: str, context: GenerationContext) -> Tuple[str, List[str]]:
+    # (hash of the class name and content of the schema ref points to, the refs in that content)
+    component_name = context.ref_index.component_name(ref)
+    class_name = context.component_classes[component_name] if component_name is not None else ''
+    target_json = canonical_json(context.ref_index.resolve(ref))
+    return hashlib.sha256(f'{class_name}\0{target_json}'.encode('utf-8')).hexdigest(), json_refs(target_json)
+
+def json_refs(value_json: str) -> List[str]:
+    # the distinct $ref strings in canonical_json output
+    refs = []
+    for ref in set(REF_PATTERN.findall(value_json)):
+        if '\\' in ref:
+            ref = json.loads(f'"{ref}"')
+        refs.append(ref)
+    return refs
+
+# what sanitize_class_name replaces, past the first character
+NON_IDENTIFIER_PATTERN = re.compile(r'\W')
+
+# "$ref" members as they appear in canonical_json output
+REF_PATTERN = re.compile(r'"\$ref":"((?:[^"\\]|\\.)*)"')
+
+def canonical_json(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, separators=(',', ':'))
+
+def fragment_start(context: GenerationContext) -> Tuple[int, int, int, int]:
+    return len(context.models), len(context.shape_log), len(context.names.log), len(context.operations)
+
+def capture_fragment(fingerprint: str, context: GenerationContext, start: Tuple[int, int, int, int], mapping: Optional[Tuple[str, str, str]] = None) -> Dict[str, Any]:
+    first_model, first_shape, first_name, first_operation = start
+    fragment_models = context.models[first_model:]
+    return {
+        'fingerprint': fingerprint,
+        'models': [[name, code] for name, code in fragment_models],
+        'names': [list(entry) for entry in context.names.log[first_name:]],
+        'shapes': [list(entry) for entry in context.shape_log[first_shape:]],
+        'dependencies': {name: sorted(context.model_dependencies[name]) for name, _ in fragment_models if name in context.model_dependencies},
+        'mapping': list(mapping) if mapping else None,
+        'operations': [list(operation) for operation in context.operations[first_operation:]],
+    }
 
-    output.append("from typing import Optional, List, Dict, Any, Union, Type, Literal\n")
-    output.append("from typing_extensions import TypedDict\n\n")
-    output.append("\n\n".join([model_code for _, model_code in sorted_models]))
-    
-    output.append("\n\nclass ModelMapping:\n")
+def restore_fragment(fragment: Optional[Dict[str, Any]], fingerprint: str, context: GenerationContext) -> bool:
+    if not fragment or fragment.get('fingerprint') != fingerprint:
+        return False
+    names = context.names
+
+    # Class names depend on what was allocated before this entry, so the fragment is only reusable if
+    # regenerating it now would allocate exactly the same names.
+    claimed: Dict[str, str] = {}
+    for name, base_name in fragment['names']:
+        if names.peek(base_name, claimed) != name:
+            return False
+        claimed[name] = base_name
+    path_key = None
+    if fragment['mapping']:
+        path_key, path_class_name, path = fragment['mapping']
+        if context.path_keys.peek(path_key_base(path)) != path_key:
+            return False
+
+    # The same goes for deduplicated shapes: every shape it reused must still map to the same class,
+    # and every shape it generated must still be new.
+    added_shapes: Dict[str, str] = {}
+    for shape_key, shape_name, reused in fragment['shapes']:
+        current = context.shapes.get(shape_key) or added_shapes.get(shape_key)
+        if current != (shape_name if reused else None):
+            return False
+        if not reused:
+            added_shapes[shape_key] = shape_name
+
+    for name, base_name in fragment['names']:
+        names.allocate(base_name)
+    context.shapes.update(added_shapes)
+    context.shape_log.extend((shape_key, shape_name, reused) for shape_key, shape_name, reused in fragment['shapes'])
+    context.models.extend((name, code) for name, code in fragment['models'])
+    for name, dependencies in fragment['dependencies'].items():
+        context.model_dependencies[name] = set(dependencies)
+    if path_key is not None:
+        context.path_keys.allocate(path_key_base(path))
+        context.model_mapping[path_key] = (path_class_name, path)
+    context.operations.extend(Operation(*operation) for operation in fragment['operations'])
+    return True
+
+def schema_shape_key(schema: Any, shape_keys: Dict[int, Tuple[Any, str]]) -> Any:
+    # Merkle-style structural hash: a schema's key is built from its children's keys, memoized per
+    # schema object, so hashing a whole nested tree is linear however deep generate_model descends.
+    # Scalars stand for themselves.
+    if isinstance(schema, dict):
+        memo = shape_keys.get(id(schema))
+        if memo is not None:
+            key = memo[1]
+        else:
+            parts = {
+                name: schema_shape_key(value, shape_keys) if isinstance(value, (dict, list)) else value
+                for name, value in schema.items() if name not in DOCUMENTATION_KEYWORDS
+            }
+            key = 'o' + hashlib.sha1(canonical_json(parts).encode('utf-8')).hexdigest()
+            shape_keys[id(schema)] = (schema, key)
+        return key
+    if isinstance(schema, list):
+        return [schema_shape_key(value, shape_keys) if isinstance(value, (dict, list)) else value for value in schema]
+    return schema
+
+def render_models(sorted_models: List[Tuple[str, str]], model_mapping: Dict[str, Tuple[str, str]], validators: bool = False, model_style: str = MODEL_STYLE_TYPEDDICT) -> str:
+    return "".join(iter_render_models(sorted_models, model_mapping, validators, model_style))
+
+def iter_render_models(sorted_models: Iterable[Tuple[str, str]], model_mapping: Dict[str, Tuple[str, str]], validators: bool = False, model_style: str = MODEL_STYLE_TYPEDDICT) -> Iterator[str]:
+    yield models_header(validators, model_style)
+    yield "\n"
+    for idx, (_, model_code) in enumerate(sorted_models):
+        if idx:
+            yield "\n\n"
+        yield model_code
+
+    yield "\n\nclass ModelMapping:\n"
     for key, (class_name, path) in model_mapping.items():
-        output.append(f'\n')
-        output.append(f'    # {path}\n')
-        output.append(f'    {key} = {class_name}\n')
+        yield f'\n    # {path}\n    {key} = {class_name}\n'
+    if not model_mapping:
+        yield '    pass\n'
+
+def models_header(validators: bool = False, model_style: str = MODEL_STYLE_TYPEDDICT) -> str:
+    # the imports every module of generated classes starts with
+    header = "from dataclasses import dataclass\n" if model_style == MODEL_STYLE_DATACLASS else ""
+    header += "from typing import Optional, List, Dict, Any, Union, Type, Literal\n"
+    header += "from typing_extensions import TypedDict\n"
+    if model_style == MODEL_STYLE_DATACLASS:
+        header += "from typing import Annotated\n"
+        header += "from lib.dataclass_conversion import Discriminator\n"
+    if validators:
+        header += "from lib.validation import ValidationError\n"
+    return header
+
+def generate_model(schema: Dict[str, Any], base_name: str, context: GenerationContext, base_class: Optional[str] = "TypedDict", reuse_shape: bool = True, class_name: Optional[str] = None) -> Tuple[str, str]:
+    # class_name: a name allocated up front (component schemas), base_name is ignored then
+    stats = context.stats
+    if stats is None:
+        return generate_model_code(schema, base_name, context, base_class, reuse_shape, class_name)
+    stats.start_model(class_name or base_name)
+    try:
+        return generate_model_code(schema, base_name, context, base_class, reuse_shape, class_name)
+    finally:
+        stats.end_model()
+
+def generate_model_code(schema: Dict[str, Any], base_name: str, context: GenerationContext, base_class: Optional[str] = "TypedDict", reuse_shape: bool = True, class_name: Optional[str] = None) -> Tuple[str, str]:
+    # generate_model without the instrumentation
+    names = context.names
+    models = context.models
+    ref_index = context.ref_index
+    model_dependencies = context.model_dependencies
 
-    return "".join(output)
-
-def resolve_ref(ref: str, component_schemas: Dict[str, Any]) -> Dict[str, Any]:
-    ref_name = ref.split('/')[-1]
-    return component_schemas.get(ref_name, {})
-
-def generate_model(schema: Dict[str, Any], base_name: str, generated_class_names: Set[str], models: List[Tuple[str, str]], component_schemas: Dict[str, Any], model_dependencies: Dict[str, Set[str]], base_class: Optional[str] = "TypedDict") -> (str, str):
     if '$ref' in schema:
-        schema = resolve_ref(schema['$ref'], component_schemas)
+        schema = ref_index.resolve(schema['$ref'])
 
     properties = schema.get('properties', {})
-    required = schema.get('required', [])
-    
-    model_name = sanitize_class_name(base_name)
-    count = 1
-    while model_name in generated_class_names:
-        model_name = sanitize_class_name(f"{base_name}_{count}")
-        count += 1
-    
-    generated_class_names.add(model_name)
+
+    shape_key = None
+    if context.dedupe != DEDUPE_OFF:
+        shape_key = f'{base_class}:{schema_shape_key(schema, context.shape_keys)}'
+        shape_name = context.shapes.get(shape_key)
+        if shape_name and reuse_shape:
+            context.shape_log.append((shape_key, shape_name, True))
+            if context.stats is not None:
+                context.stats.count('deduplicated')
+            if context.dedupe == DEDUPE_REUSE:
+                # nothing to emit, callers reference the existing class
+                return '', shape_name
+            alias_name = class_name or names.allocate(base_name)
+            model_dependencies[alias_name] = {shape_name}
+            alias_code = f'{alias_name} = {shape_name}\n'
+            if context.validators:
+                alias_code += generate_alias_validator(alias_name, shape_name)
+            return alias_code, alias_name
+
+    model_name = class_name or names.allocate(base_name)
     model_dependencies[model_name] = set()
+    if shape_key and not shape_name:
+        context.shapes[shape_key] = model_name
+        context.shape_log.append((shape_key, model_name, False))
+    elif shape_key:
+        # not reused, but whether this class becomes the canonical one still depends on the earlier one
+        context.shape_log.append((shape_key, shape_name, True))
 
     class_inheritance = f'({base_class})' if base_class else ''
     model_code = f'class {model_name}{class_inheritance}:\n'
+    optional_default = ''
+    if properties and context.model_style == MODEL_STYLE_DATACLASS:
+        # keyword-only, so optional fields (defaulting to None) can come before required ones
+        model_code = f'@dataclass(slots=True, kw_only=True)\nclass {model_name}:\n'
+        optional_default = ' = None'
     lines = []
+    # what the validator checks: the whole value, or else each of fields
+    value_check: Optional[Check] = None
+    fields: List[Field] = []
 
     if not properties and 'oneOf' not in schema and 'items' not in schema:
         lines.append('    pass\n')
+        value_check = schema_check(schema)
     elif 'items' in schema and 'oneOf' in schema['items']:
         one_of_models = []
         for idx, sub_schema in enumerate(schema['items']['oneOf']):
-            sub_model_code, sub_model_name = generate_model(sub_schema, sanitize_class_name(f"{model_name}_OneOf_{idx}"), generated_class_names, models, component_schemas, model_dependencies)
+            sub_model_code, sub_model_name = generate_model(sub_schema, sanitize_class_name(f"{model_name}_OneOf_{idx}"), context)
             if sub_model_code:
                 models.append((sub_model_name, sub_model_code))
-                one_of_models.append(sub_model_name)
-                model_dependencies[model_name].add(sub_model_name)
+            one_of_models.append(sub_model_name)
+            model_dependencies[model_name].add(sub_model_name)
         type_hint = 'Union[\n    {}\n]'.format(",\n    ".join(one_of_models))
         model_code = f'class {model_name}(List[{type_hint}]):\n'
         lines.append('    pass\n')
+        value_check = ('list', union_check(schema['items'], one_of_models, model_name, context))
     elif 'oneOf' in schema:
         one_of_models = []
         for idx, sub_schema in enumerate(schema['oneOf']):
-            sub_model_code, sub_model_name = generate_model(sub_schema, sanitize_class_name(f"{model_name}_OneOf_{idx}"), generated_class_names, models, component_schemas, model_dependencies)
+            sub_model_code, sub_model_name = generate_model(sub_schema, sanitize_class_name(f"{model_name}_OneOf_{idx}"), context)
             if sub_model_code:
                 models.append((sub_model_name, sub_model_code))
-                one_of_models.append(sub_model_name)
-                model_dependencies[model_name].add(sub_model_name)
+            one_of_models.append(sub_model_name)
+            model_dependencies[model_name].add(sub_model_name)
         type_hint = 'Union[\n    {}\n]'.format(",\n    ".join(one_of_models))
         model_code = f'class {model_name}(TypedDict):\n'
         lines.append(f'    pass\n')
+        value_check = union_check(schema, one_of_models, model_name, context)
     else:
-        for prop, details in properties.items():
-            if '$ref' in details:
-                ref_name = details['$ref'].split('/')[-1]
-                type_hint = ref_name
-                model_dependencies[model_name].add(ref_name)
-            elif 'type' not in details and 'oneOf' not in details:
-                continue
-            elif 'enum' in details:
-                literal_values = ", ".join(f'"{value}"' for value in details['enum'])
-                type_hint = f'Literal[{literal_values}]'
-            elif details.get('type') == 'object':
-                nested_model_code, nested_model_name = generate_model(details, sanitize_class_name(f"{model_name}_{prop.capitalize()}"), generated_class_names, models, component_schemas, model_dependencies)
-                if nested_model_code:
-                    models.append((nested_model_name, nested_model_code))
-                    type_hint = nested_model_name
-                    model_dependencies[model_name].add(nested_model_name)
+        for prop, is_required, nullable, line, check, dependency, kind, suffix in compile_fields(schema, context):
+            if kind is None:
+                if dependency:
+                    model_dependencies[model_name].add(dependency)
+            else:
+                nested_schema = properties[prop]
+                if '$ref' in nested_schema:
+                    nested_schema = ref_index.resolve(nested_schema['$ref'])
+                if kind == 'array':
+                    nested_schema = nested_schema['items']
+                if kind == 'oneOf':
+                    one_of_models = []
+                    for idx, sub_schema in enumerate(nested_schema['oneOf']):
+                        sub_model_code, sub_model_name = generate_model(sub_schema, f"{model_name}_{suffix}_OneOf_{idx}", context)
+                        if sub_model_code:
+                            models.append((sub_model_name, sub_model_code))
+                        one_of_models.append(sub_model_name)
+                        model_dependencies[model_name].add(sub_model_name)
+                    type_hint = union_hint(nested_schema, one_of_models, context)
+                    check = union_check(nested_schema, one_of_models, f"{model_name}_{suffix}", context)
                 else:
-                    type_hint = 'Dict[str, Any]'
-            elif details.get('type') == 'array':
-                item_details = details.get('items', {})
-                if item_details.get('type') == 'object':
-                    nested_model_code, nested_model_name = generate_model(item_details, sanitize_class_name(f"{model_name}_{prop.capitalize()}Item"), generated_class_names, models, component_schemas, model_dependencies)
+                    nested_model_code, nested_model_name = generate_model(nested_schema, f"{model_name}_{suffix}", context)
                     if nested_model_code:
                         models.append((nested_model_name, nested_model_code))
+                    model_dependencies[model_name].add(nested_model_name)
+                    if kind == 'array':
                         type_hint = f'List[{nested_model_name}]'
-                        model_dependencies[model_name].add(nested_model_name)
+                        check = ('list', ('model', nested_model_name))
                     else:
-                        type_hint = 'List[Dict[str, Any]]'
-                else:
-                    type_hint = f'List[{map_type(item_details.get("type", "Any"))}]'
-            elif 'oneOf' in details:
-                one_of_models = []
-                for idx, sub_schema in enumerate(details['oneOf']):
-                    sub_model_code, sub_model_name = generate_model(sub_schema, sanitize_class_name(f"{model_name}_{prop.capitalize()}_OneOf_{idx}"), generated_class_names, models, component_schemas, model_dependencies)
-                    if sub_model_code:
-                        models.append((sub_model_name, sub_model_code))
-                        one_of_models.append(sub_model_name)
-                        model_dependencies[model_name].add(sub_model_name)
-                type_hint = 'Union[\n    {}\n]'.format(",\n    ".join(one_of_models))
-            else:
-                type_hint = map_type(details['type'])
-            
-            nullable = details.get('nullable', False)
-            if nullable:
-                type_hint = f'Optional[{type_hint}]'
-            if prop not in required:
-                lines.append(f'    {prop}: Optional[{type_hint}]\n')
-            else:
-                lines.append(f'    {prop}: {type_hint}\n')
+                        type_hint = nested_model_name
+                        check = ('model', nested_model_name)
+                line = field_line(prop, type_hint, is_required, nullable, optional_default)
+            lines.append(line)  # type: ignore
+            fields.append((prop, is_required, nullable, check))
     
     if not lines:
         lines.append('    pass\n')
 
     model_code += "".join(lines)
+
+    if context.validators:
+        if value_check is None and not properties:
+            # 'items' without 'oneOf'
+            value_check = schema_check(schema)
+        if value_check is not None:
+            model_code += '\n\n' + generate_value_validator(model_name, value_check)
+        else:
+            model_code += '\n\n' + generate_object_validator(model_name, fields)
     
     return model_code, model_name
 
+def compile_fields(schema: Dict[str, Any], context: GenerationContext) -> Tuple[FieldPlan, ...]:
+    # The properties of an object schema, analysed once per schema object and run: a component used
+    # as the body of many operations, and the schemas nested in it, are only walked once. Fields
+    # whose type is a nested class are left to the caller, their class names depend on the model name.
+    plan = context.field_plans.get(id(schema))
+    if plan is not None:
+        if context.stats is not None:
+            context.stats.count('field_plans_reused')
+        return plan
+    ref_index = context.ref_index
+    validators = context.validators
+    required = schema.get('required', [])
+    optional_default = ' = None' if context.model_style == MODEL_STYLE_DATACLASS else ''
+    fields: List[FieldPlan] = []
+    for prop, details in schema.get('properties', {}).items():
+        is_required = prop in required
+        component_name = ref_index.component_name(details['$ref']) if '$ref' in details else None
+        if component_name is None and '$ref' in details:
+            # nested pointers and external files have no class of their own, generate them inline
+            details = ref_index.resolve(details['$ref'])
+        nullable = details.get('nullable', False)
+        dependency = None
+        if component_name is not None:
+            dependency = context.component_classes[component_name]
+            type_hint = dependency
+            check: Check = ('model', dependency)
+        elif 'type' not in details and 'oneOf' not in details:
+            continue
+        elif 'enum' in details:
+            literal_values = ", ".join(f'"{value}"' for value in details['enum'])
+            type_hint = f'Literal[{literal_values}]'
+            check = ('enum', tuple(details['enum']))
+        elif details.get('type') == 'object':
+            fields.append((prop, is_required, nullable, None, None, None, 'object', class_suffix(prop)))
+            continue
+        elif details.get('type') == 'array':
+            item_details = details.get('items', {})
+            if item_details.get('type') == 'object':
+                fields.append((prop, is_required, nullable, None, None, None, 'array', f'{class_suffix(prop)}Item'))
+                continue
+            type_hint = f'List[{map_type(item_details.get("type", "Any"))}]'
+            check = ('list', type_check(item_details.get('type')))
+        elif 'oneOf' in details:
+            fields.append((prop, is_required, nullable, None, None, None, 'oneOf', class_suffix(prop)))
+            continue
+        else:
+            type_hint = map_type(details['type'])
+            check = type_check(details['type'])
+        fields.append((prop, is_required, nullable, field_line(prop, type_hint, is_required, nullable, optional_default), check if validators else None, dependency, None, ''))
+    plan = tuple(fields)
+    # plans of schemas that do not repeat would only add to what the garbage collector traverses
+    if context.keep_field_plans:
+        context.field_plans[id(schema)] = plan
+        context.field_plan_schemas.append(schema)
+    return plan
+
+def class_suffix(prop: str) -> str:
+    # nested classes are named '<model name>_<suffix>', and model names are sanitized already
+    return NON_IDENTIFIER_PATTERN.sub('_', prop.capitalize())
+
+def field_line(prop: str, type_hint: str, required: bool, nullable: bool, optional_default: str) -> str:
+    if nullable:
+        type_hint = f'Optional[{type_hint}]'
+    if not required:
+        return f'    {prop}: Optional[{type_hint}]{optional_default}\n'
+    return f'    {prop}: {type_hint}\n'
+
+def union_hint(union_schema: Dict[str, Any], one_of_models: List[str], context: GenerationContext) -> str:
+    # Union of the member classes. Dataclasses are annotated with the discriminator, if there is one,
+    # the converter selects the member by (lib/dataclass_conversion.py).
+    type_hint = 'Union[\n    {}\n]'.format(",\n    ".join(one_of_models))
+    if context.model_style != MODEL_STYLE_DATACLASS:
+        return type_hint
+    dispatch = union_discriminator(union_schema, context.ref_index)
+    if dispatch is None:
+        return type_hint
+    prop, member_values = dispatch
+    members = {value: one_of_models[idx] for value, idx in member_values.items()}
+    return f'Annotated[{type_hint}, Discriminator({prop!r}, {members!r})]'
+
+def union_check(union_schema: Dict[str, Any], one_of_models: List[str], base_name: str, context: GenerationContext) -> Check:
+    # With a discriminator (declared or inferred) the validator looks the member up in a table emitted
+    # next to the classes instead of trying each one.
+    dispatch = union_discriminator(union_schema, context.ref_index) if context.validators else None
+    if dispatch is None:
+        return ('union', one_of_models)
+    prop, member_values = dispatch
+    table_name = context.names.allocate(f'{base_name}_Discriminator')
+    context.models.append((table_name, generate_dispatch_table(table_name, {value: one_of_models[idx] for value, idx in member_values.items()})))
+    # after every member's validator, even when they are part of a cycle
+    context.model_dependencies[table_name] = set(one_of_models)
+    return ('dispatch', one_of_models, table_name, prop)
+
 def generate_union_response_class(class_name: str, union_type: str) -> str:
     return f'class {class_name}(TypedDict):\n    data: {union_type}\n'
 
@@ -311,35 +853,107 @@ def generate_path_class(class_name: str, methods: Dict[str, str]) -> str:
     path_class_code += "".join(lines)
     return path_class_code
 
+TYPE_MAPPING = {
+    'string': 'str',
+    'integer': 'int',
+    'boolean': 'bool',
+    'array': 'List',
+    'object': 'Dict',
+}
+
 def map_type(openapi_type: str) -> str:
-    type_mapping = {
-        'string': 'str',
-        'integer': 'int',
-        'boolean': 'bool',
-        'array': 'List',
-        'object': 'Dict',
-    }
-    return type_mapping.get(openapi_type, 'Any')
+    return TYPE_MAPPING.get(openapi_type, 'Any')
 
 def topological_sort(models: List[Tuple[str, str]], dependencies: Dict[str, Set[str]]) -> List[Tuple[str, str]]:
+    # Dependencies first. Members of a cycle cannot all be defined before each other, so references to
+    # a class that is only defined later (or to the class itself) are turned into string annotations.
+    model_codes = {model: code for model, code in models}
+    components = strongly_connected_components([model for model, _ in models], dependencies)
+
     sorted_models = []
-    visited = set()
-    temp = set()
-
-    def visit(model):
-        if model in temp:
-            raise ValueError("Circular dependency detected")
-        if model not in visited:
-            temp.add(model)
-            for dep in dependencies.get(model, []):
-                visit(dep)
-            temp.remove(model)
-            visited.add(model)
-            sorted_models.append(model)
-
-    for model, _ in models:
-        if model not in visited:
-            visit(model)
-    
-    sorted_model_dict = {model: code for model, code in models}
-    return [(model, sorted_model_dict[model]) for model in sorted_models]
+    for component in components:
+        if len(component) == 1 and component[0] not in dependencies.get(component[0], ()):
+            model = component[0]
+            if model in model_codes:
+                sorted_models.append((model, model_codes[model]))
+            continue
+        # Aliases (`Name = Target`, dedupe='alias') bind the class itself, a quoted target would bind a
+        # str: they come after every class of the cycle, so their targets are always defined already
+        aliases = [model for model in component if ALIAS_PATTERN.match(model_codes.get(model, ''))]
+        if aliases:
+            component = [model for model in component if model not in aliases] + aliases
+        position = {model: idx for idx, model in enumerate(component)}
+        for idx, model in enumerate(component):
+            if model not in model_codes:
+                continue
+            forward_references = {dep for dep in dependencies.get(model, ()) if position.get(dep, -1) >= idx}
+            code = model_codes[model]
+            if forward_references:
+                code = quote_references(code, forward_references)
+            sorted_models.append((model, code))
+    return sorted_models
+
+# the code generate_model emits for an alias, optionally followed by the alias of its validator
+ALIAS_PATTERN = re.compile(r'\w+ = \w+\n')
+
+def strongly_connected_components(roots: List[str], dependencies: Dict[str, Set[str]]) -> List[List[str]]:
+    # Tarjan's algorithm with an explicit stack, so deep dependency chains do not hit the recursion
+    # limit. Components come out dependencies first, their members in the order their visit finished;
+    # on an acyclic graph this is the depth-first postorder over roots and sorted dependencies.
+    index: Dict[str, int] = {}
+    lowlink: Dict[str, int] = {}
+    finished: Dict[str, int] = {}
+    stack: List[str] = []
+    on_stack: Set[str] = set()
+    components: List[List[str]] = []
+    no_dependencies: Set[str] = set()
+
+    for root in roots:
+        if root in index:
+            continue
+        index[root] = lowlink[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(sorted(dependencies.get(root) or no_dependencies)))]
+        while work:
+            model, deps = work[-1]
+            for dep in deps:
+                if dep not in index:
+                    index[dep] = lowlink[dep] = len(index)
+                    stack.append(dep)
+                    on_stack.add(dep)
+                    work.append((dep, iter(sorted(dependencies.get(dep) or no_dependencies))))
+                    break
+                if dep in on_stack and index[dep] < lowlink[model]:
+                    lowlink[model] = index[dep]
+            else:
+                work.pop()
+                finished[model] = len(finished)
+                model_lowlink = lowlink[model]
+                if work:
+                    parent = work[-1][0]
+                    if model_lowlink < lowlink[parent]:
+                        lowlink[parent] = model_lowlink
+                if model_lowlink != index[model]:
+                    continue
+                if stack[-1] == model:
+                    stack.pop()
+                    on_stack.discard(model)
+                    components.append([model])
+                    continue
+                start = len(stack) - 1
+                while stack[start] != model:
+                    start -= 1
+                component = stack[start:]
+                del stack[start:]
+                on_stack.difference_update(component)
+                component.sort(key=finished.__getitem__)
+                components.append(component)
+    return components
+
+def quote_references(code: str, names: Set[str]) -> str:
+    # 'Name' instead of Name wherever a class is referenced; class headers, property names and
+    # string literals (Literal values, URLs) are left alone
+    alternatives = '|'.join(re.escape(name) for name in sorted(names, key=len, reverse=True))
+    pattern = re.compile(r'("(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\')|(?<!class )\b(' + alternatives + r')\b(?!:)')
+    return pattern.sub(lambda match: match.group(1) or f"'{match.group(2)}'", code)
@@ -0,0 +1,190 @@
+import re
+from typing import Any, Dict, List, Optional, Set, Tuple
+from lib.generate_models import GenerationContext, model_entries, models_header, topological_sort, strongly_connected_components
+from lib.name_allocator import NameAllocator, sanitize_class_name
+
+# The generated types as a package of submodules that are imported on first use: the package's
+# __init__ only holds a table of which submodule defines which name, and resolves attributes through a
+# module __getattr__ (lib/lazy_module.py). Importing the package costs about as much as that table,
+# however many classes the spec has; the classes themselves are described to type checkers by a stub.
+
+PACKAGE_INIT = '__init__.py'
+# for type checkers, which do not follow the lazy attributes
+PACKAGE_STUB = '__init__.pyi'
+
+# top-level names a model's code defines: its class, its validator, aliases and dispatch tables
+DEFINITION_PATTERN = re.compile(r'^(?:class|def) (\w+)|^(\w+) =', re.M)
+# string literals (Literal values, URLs, error messages) do not reference anything
+STRING_PATTERN = re.compile(r'"(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\'')
+IDENTIFIER_PATTERN = re.compile(r'\b[A-Za-z_]\w*\b')
+
+# How paths are grouped into submodules (split option)
+SPLIT_ENTRY = 'entry'  # a submodule per path and per component schema
+SPLIT_TAG = 'tag'  # per first OpenAPI tag of a path's operations
+SPLIT_PREFIX = 'prefix'  # per first path segment
+SPLIT_MODES = (SPLIT_ENTRY, SPLIT_TAG, SPLIT_PREFIX)
+# group of untagged paths (tag) and of '/' (prefix)
+DEFAULT_GROUP = 'default'
+# component schemas used by more than one group
+SHARED_MODULE = 'schemas'
+# what the package __init__ defines: importing a submodule binds its name in the package, so no
+# submodule may be named like these or like any generated name
+PACKAGE_NAMES = ('LazyModelMapping', 'lazy_getattr', '_MODULES', 'ModelMapping')
+
+def split_entries(openapi_spec: Dict[str, Any], split: str = SPLIT_ENTRY) -> Optional[Dict[str, str]]:
+    # the entry_groups of render_package for a split mode, None for a submodule per entry. Group names
+    # are tags and path segments made identifiers; render_package makes them unique module names.
+    if split not in SPLIT_MODES:
+        raise ValueError(f"Unknown split mode '{split}', expected one of {', '.join(SPLIT_MODES)}")
+    if split == SPLIT_ENTRY:
+        return None
+    groups = {}
+    for path, methods in openapi_spec.get('paths', {}).items():
+        if split == SPLIT_TAG:
+            tags = [tag for details in methods.values() if isinstance(details, dict) for tag in details.get('tags', [])]
+            group = tags[0] if tags else DEFAULT_GROUP
+        else:
+            segments = [segment for segment in path.split('/') if segment]
+            group = segments[0].strip('{}') if segments else DEFAULT_GROUP
+        groups[f'paths/{path}'] = sanitize_class_name(group)
+    return groups
+
+def schema_entry_groups(entry_groups: Dict[str, str], entry_references: Dict[str, Set[str]], schema_entries: List[str]) -> Dict[str, Set[str]]:
+    # component schema entry -> the groups whose paths use it, directly or through other schemas. Schemas
+    # no path uses belong to the shared module, and so do the schemas they use.
+    used_by: Dict[str, Set[str]] = {}
+
+    def propagate(work: List[Tuple[str, str]]) -> None:
+        while work:
+            entry_key, group = work.pop()
+            groups = used_by.setdefault(entry_key, set())
+            if group in groups:
+                continue
+            groups.add(group)
+            work.extend((referenced, group) for referenced in entry_references.get(entry_key, ()) if referenced not in entry_groups)
+
+    propagate([(referenced, group) for entry_key, group in entry_groups.items() for referenced in entry_references.get(entry_key, ()) if referenced not in entry_groups])
+    # a group name can not be empty, so '' stands for the shared module
+    propagate([(entry_key, '') for entry_key in schema_entries if entry_key not in used_by])
+    return used_by
+
+def render_package(context: GenerationContext, entry_groups: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    # file name -> content. By default every component schema and every path gets a submodule of its
+    # own. entry_groups (see split_entries) maps path entries ('paths/<path>') to a group instead: the
+    # paths of a group share a submodule, together with the component schemas only that group uses;
+    # schemas used by several groups (or none) go to a shared SHARED_MODULE. Entries whose classes
+    # reference each other in a cycle end up in one submodule, so submodules import each other without
+    # cycles. Consumes context.models and context.model_dependencies.
+    entries = model_entries(context)
+    sorted_models = topological_sort(context.models, context.model_dependencies)
+    dependencies = context.model_dependencies
+    context.models, context.model_dependencies = [], {}
+
+    # name -> the entry that defines it
+    defined_by: Dict[str, str] = {}
+    model_names: List[Set[str]] = []
+    for name, code in sorted_models:
+        names = {match.group(1) or match.group(2) for match in DEFINITION_PATTERN.finditer(code)}
+        model_names.append(names)
+        for defined in names:
+            defined_by[defined] = entries[name]
+
+    # the names every model uses from other entries, from its code and its recorded dependencies
+    model_references: List[Set[str]] = []
+    entry_references: Dict[str, Set[str]] = {}
+    for (name, code), names in zip(sorted_models, model_names):
+        entry_key = entries[name]
+        referenced = set(IDENTIFIER_PATTERN.findall(STRING_PATTERN.sub('', code))) | dependencies.get(name, set())
+        references = {reference for reference in referenced - names if reference in defined_by and defined_by[reference] != entry_key}
+        model_references.append(references)
+        entry_references.setdefault(entry_key, set()).update(defined_by[reference] for reference in references)
+
+    module_names = NameAllocator()
+    for reserved in (*PACKAGE_NAMES, *defined_by):
+        module_names.claim(reserved, reserved)
+    entry_modules: Dict[str, str] = {}
+    if entry_groups is None:
+        for name, _ in sorted_models:
+            if entries[name] not in entry_modules:
+                entry_modules[entries[name]] = module_names.allocate(entries[name].replace('/', '_'))
+    else:
+        shared_module = module_names.allocate(SHARED_MODULE)
+        group_modules = {group: module_names.allocate(group) for group in sorted(set(entry_groups.values()))}
+        schema_entries = list(dict.fromkeys(entries[name] for name, _ in sorted_models if entries[name] not in entry_groups))
+        schema_groups = schema_entry_groups(entry_groups, entry_references, schema_entries)
+        for name, _ in sorted_models:
+            entry_key = entries[name]
+            if entry_key in entry_groups:
+                entry_modules[entry_key] = group_modules[entry_groups[entry_key]]
+            else:
+                groups = schema_groups[entry_key]
+                entry_modules[entry_key] = group_modules[next(iter(groups))] if len(groups) == 1 and '' not in groups else shared_module
+
+    defined_in = {defined: entry_modules[entry_key] for defined, entry_key in defined_by.items()}
+    module_dependencies: Dict[str, Set[str]] = {module: set() for module in entry_modules.values()}
+    for entry_key, referenced_entries in entry_references.items():
+        module = entry_modules[entry_key]
+        module_dependencies[module].update(entry_modules[referenced] for referenced in referenced_entries if entry_modules[referenced] != module)
+
+    # modules in a cycle are merged into the first of them
+    merged: Dict[str, str] = {}
+    module_order = {module: idx for idx, module in enumerate(module_dependencies)}
+    for component in strongly_connected_components(list(module_dependencies), module_dependencies):
+        first = min(component, key=module_order.__getitem__)
+        for module in component:
+            merged[module] = first
+
+    module_models: Dict[str, List[str]] = {}
+    module_imports: Dict[str, Dict[str, Set[str]]] = {}
+    for (name, code), references in zip(sorted_models, model_references):
+        module = merged[entry_modules[entries[name]]]
+        module_models.setdefault(module, []).append(code)
+        imports = module_imports.setdefault(module, {})
+        for reference in references:
+            source = merged[defined_in[reference]]
+            if source != module:
+                imports.setdefault(source, set()).add(reference)
+
+    header = models_header(context.validators, context.model_style)
+    files = {}
+    for module, codes in module_models.items():
+        lines = [header]
+        for source, names in sorted(module_imports[module].items()):
+            lines.append(f'from .{source} import {", ".join(sorted(names))}\n')
+        lines.append('\n')
+        lines.append('\n\n'.join(codes))
+        files[f'{module}.py'] = ''.join(lines)
+
+    exports: Dict[str, List[str]] = {}
+    for defined, module in sorted(defined_in.items()):
+        exports.setdefault(merged[module], []).append(defined)
+    files[PACKAGE_INIT] = render_package_init(exports, context.model_mapping)
+    files[PACKAGE_STUB] = render_package_stub(exports, context.model_mapping)
+    return files
+
+def render_package_init(exports: Dict[str, List[str]], model_mapping: Dict[str, Tuple[str, str]]) -> str:
+    lines = [
+        'from lib.lazy_module import LazyModelMapping, lazy_getattr\n',
+        '\n',
+        '# submodule -> the generated names it defines, imported on first access\n',
+        '_MODULES = {\n',
+    ]
+    lines.extend(f'    {module!r}: {tuple(names)!r},\n' for module, names in sorted(exports.items()))
+    lines.append('}\n\n')
+    lines.append('__getattr__ = lazy_getattr(__name__, _MODULES)\n\n')
+    lines.append('ModelMapping = LazyModelMapping(__getattr__, {\n')
+    lines.extend(f'    {key!r}: {class_name!r},\n' for key, (class_name, _) in model_mapping.items())
+    lines.append('})\n')
+    return ''.join(lines)
+
+def render_package_stub(exports: Dict[str, List[str]], model_mapping: Dict[str, Tuple[str, str]]) -> str:
+    # what type checkers see instead of the lazy attributes: plain re-exports and the usual ModelMapping
+    lines = []
+    for module, names in sorted(exports.items()):
+        lines.append(f'from .{module} import {", ".join(f"{name} as {name}" for name in names)}\n')
+    lines.append('\n\nclass ModelMapping:\n')
+    for key, (class_name, path) in model_mapping.items():
+        lines.append(f'\n    # {path}\n    {key} = {class_name}\n')
+    if not model_mapping:
+        lines.append('    pass\n')
+    return ''.join(lines)
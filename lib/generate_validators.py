@@ -0,0 +1,232 @@
+from typing import Any, Dict, List, Optional, Tuple
+from lib.ref_index import RefIndex
+
+# Generates a validate_<Class>(value) function per generated class: straight-line checks of the
+# required keys, types, enum values and nested classes of one schema, which call the functions of the
+# classes they reference. Nothing is interpreted at runtime, so validating a payload costs about as
+# much as walking it. A failed check raises lib.validation.ValidationError.
+#
+# Checks mirror the type hints generate_model emits:
+#   ('any',)                    anything
+#   ('type', ('int', 'float'))  one of these exact Python types
+#   ('enum', [values])          one of these values
+#   ('model', class name)       the class's validator
+#   ('list', check)             a list whose items pass check
+#   ('union', [class names])    any of these classes' validators
+#   ('dispatch', [class names], table, property)
+#                               the validator the discriminator value at property selects from table
+Check = Tuple[Any, ...]
+# (property, required, nullable, check)
+Field = Tuple[str, bool, bool, Check]
+
+ANY: Check = ('any',)
+
+# JSON schema type -> the Python types a decoded value of it can have
+SCHEMA_TYPES = {
+    'string': ('str',),
+    'integer': ('int',),
+    'number': ('int', 'float'),
+    'boolean': ('bool',),
+    'array': ('list',),
+    'object': ('dict',),
+}
+
+def validator_name(class_name: str) -> str:
+    return f'validate_{class_name}'
+
+def type_check(schema_type: Optional[str]) -> Check:
+    types = SCHEMA_TYPES.get(schema_type or '')
+    return ('type', types) if types else ANY
+
+def schema_check(schema: Dict[str, Any]) -> Check:
+    # classes without properties: their schema may well be a string enum, an array or a number
+    if 'enum' in schema:
+        return ('enum', schema['enum'])
+    if schema.get('type') == 'array':
+        return ('list', type_check(schema.get('items', {}).get('type')))
+    if schema.get('type') in SCHEMA_TYPES:
+        return type_check(schema['type'])
+    return ('type', ('dict',))
+
+def generate_object_validator(class_name: str, fields: List[Field]) -> str:
+    lines = [
+        f'def {validator_name(class_name)}(value: Any) -> None:\n',
+        '    if type(value) is not dict:\n',
+        "        raise ValidationError('object', value)\n",
+    ]
+    for prop, required, nullable, check in fields:
+        if required:
+            lines.append(f'    if {prop!r} not in value:\n')
+            lines.append(f'        raise ValidationError.missing({prop!r})\n')
+        if check == ANY:
+            continue
+        lines.append(f'    item = value[{prop!r}]\n' if required else f'    item = value.get({prop!r})\n')
+        may_be_none = nullable or not required
+        condition = value_condition(check, 'item')
+        if condition is not None:
+            # raised right here, the path is known
+            test, expected = condition
+            lines.append(f'    if item is not None and {test}:\n' if may_be_none else f'    if {test}:\n')
+            lines.append(f'        raise ValidationError({expected!r}, item, [{prop!r}])\n')
+            continue
+        indent = '    '
+        if may_be_none:
+            lines.append('    if item is not None:\n')
+            indent += '    '
+        # nested validators raise without a path, it is added on the way up
+        lines.append(f'{indent}try:\n')
+        lines.extend(check_lines(check, 'item', indent + '    '))
+        lines.append(f'{indent}except ValidationError as error:\n')
+        lines.append(f'{indent}    raise error.at({prop!r})\n')
+    return ''.join(lines)
+
+def generate_value_validator(class_name: str, check: Check) -> str:
+    # classes that stand for a single value (unions, lists, enums, ...) rather than an object
+    lines = [f'def {validator_name(class_name)}(value: Any) -> None:\n']
+    lines.extend(check_lines(check, 'value', '    ') or ['    pass\n'])
+    return ''.join(lines)
+
+def generate_dispatch_table(table_name: str, values: Dict[Any, str]) -> str:
+    # discriminator value -> validator of the oneOf member it selects, looked up by 'dispatch' checks
+    lines = [f'{table_name} = {{\n']
+    lines.extend(f'    {value!r}: {validator_name(class_name)},\n' for value, class_name in values.items())
+    lines.append('}\n')
+    return ''.join(lines)
+
+def generate_alias_validator(alias_name: str, class_name: str) -> str:
+    # binds the target's function right away: topological_sort places aliases after every class of
+    # their cycle, so it is always defined by then
+    return f'{validator_name(alias_name)} = {validator_name(class_name)}\n'
+
+def value_condition(check: Check, target: str) -> Optional[Tuple[str, str]]:
+    # (expression that is true when target fails, what was expected) for checks of a single value
+    if check[0] == 'type':
+        types = check[1]
+        test = f'type({target}) is not {types[0]}' if len(types) == 1 else f'type({target}) not in ({", ".join(types)})'
+        return test, ' or '.join(types)
+    if check[0] == 'enum':
+        values = tuple(check[1])
+        return f'{target} not in {values!r}', 'one of ' + ', '.join(map(repr, values))
+    return None
+
+def check_lines(check: Check, target: str, indent: str) -> List[str]:
+    # statements that raise ValidationError unless target passes check
+    kind = check[0]
+    condition = value_condition(check, target)
+    if condition is not None:
+        test, expected = condition
+        return [
+            f'{indent}if {test}:\n',
+            f'{indent}    raise ValidationError({expected!r}, {target})\n',
+        ]
+    if kind == 'model':
+        return [f'{indent}{validator_name(check[1])}({target})\n']
+    if kind == 'list':
+        lines = check_lines(('type', ('list',)), target, indent)
+        item_check = check[1]
+        item_condition = value_condition(item_check, 'element')
+        if item_condition is not None:
+            test, expected = item_condition
+            lines.extend([
+                f'{indent}for index, element in enumerate({target}):\n',
+                f'{indent}    if {test}:\n',
+                f'{indent}        raise ValidationError({expected!r}, element, [index])\n',
+            ])
+        elif item_check != ANY:
+            lines.extend([
+                f'{indent}for index, element in enumerate({target}):\n',
+                f'{indent}    try:\n',
+                *check_lines(item_check, 'element', indent + '        '),
+                f'{indent}    except ValidationError as error:\n',
+                f'{indent}        raise error.at(index)\n',
+            ])
+        return lines
+    if kind == 'dispatch':
+        _, class_names, table_name, prop = check
+        return [
+            f'{indent}if type({target}) is not dict:\n',
+            f"{indent}    raise ValidationError('object', {target})\n",
+            f'{indent}tag = {target}.get({prop!r})\n',
+            # exact types only: True would find the entry of 1
+            f'{indent}validator = {table_name}.get(tag) if type(tag) is str or type(tag) is int else None\n',
+            f'{indent}if validator is None:\n',
+            f'{indent}    raise ValidationError({"discriminator of " + ", ".join(class_names)!r}, tag, [{prop!r}])\n',
+            f'{indent}validator({target})\n',
+        ]
+    if kind == 'union':
+        validators = ', '.join(validator_name(name) for name in check[1])
+        return [
+            f'{indent}for validator in ({validators},):\n' if len(check[1]) == 1 else f'{indent}for validator in ({validators}):\n',
+            f'{indent}    try:\n',
+            f'{indent}        validator({target})\n',
+            f'{indent}        break\n',
+            f'{indent}    except ValidationError:\n',
+            f'{indent}        pass\n',
+            f'{indent}else:\n',
+            f'{indent}    raise ValidationError({"one of " + ", ".join(check[1])!r}, {target})\n',
+        ]
+    return []
+
+def union_discriminator(union_schema: Dict[str, Any], ref_index: RefIndex) -> Optional[Tuple[str, Dict[Any, int]]]:
+    # (property, discriminator value -> index of the oneOf member it selects), or None when the members
+    # can only be told apart by trying each of them.
+    members = union_schema['oneOf']
+    discriminator = union_schema.get('discriminator')
+    if isinstance(discriminator, dict) and 'propertyName' in discriminator:
+        values = declared_discriminator(discriminator, members, ref_index)
+        return (discriminator['propertyName'], values) if values is not None else None
+    return inferred_discriminator(members, ref_index)
+
+def declared_discriminator(discriminator: Dict[str, Any], members: List[Dict[str, Any]], ref_index: RefIndex) -> Optional[Dict[Any, int]]:
+    # OpenAPI discriminator: mapping values are refs or component names, and members that are not
+    # mapped explicitly are selected by their component name
+    member_keys = [ref_key(member['$ref'], ref_index) if '$ref' in member else None for member in members]
+    values: Dict[Any, int] = {}
+    for value, target in discriminator.get('mapping', {}).items():
+        key = ref_key(target, ref_index) if '#' in target or '/' in target else target
+        if key not in member_keys:
+            return None
+        values[value] = member_keys.index(key)
+    mapped = set(values.values())
+    for idx, member in enumerate(members):
+        if idx in mapped:
+            continue
+        component_name = ref_index.component_name(member['$ref']) if '$ref' in member else None
+        if component_name is None:
+            # an inline member that no mapping names
+            return None
+        values.setdefault(component_name, idx)
+    return values
+
+def ref_key(ref: str, ref_index: RefIndex) -> str:
+    # component schemas by name, so '#/definitions/Cat' and 'Cat' match
+    return ref_index.component_name(ref) or ref
+
+def inferred_discriminator(members: List[Dict[str, Any]], ref_index: RefIndex) -> Optional[Tuple[str, Dict[Any, int]]]:
+    # The first property that every member requires and restricts to its own constant values (`const`,
+    # or an `enum` that no other member shares) discriminates them.
+    schemas = [ref_index.resolve(member['$ref']) if '$ref' in member else member for member in members]
+    if not schemas:
+        return None
+    for prop in schemas[0].get('properties', {}):
+        values: Dict[Any, int] = {}
+        for idx, schema in enumerate(schemas):
+            member_values = constant_values(schema, prop, ref_index)
+            if member_values is None or any(value in values for value in member_values):
+                break
+            values.update((value, idx) for value in member_values)
+        else:
+            return prop, values
+    return None
+
+def constant_values(schema: Dict[str, Any], prop: str, ref_index: RefIndex) -> Optional[List[Any]]:
+    if prop not in schema.get('required', []) or prop not in schema.get('properties', {}):
+        return None
+    details = schema['properties'][prop]
+    if '$ref' in details:
+        details = ref_index.resolve(details['$ref'])
+    values = [details['const']] if 'const' in details else details.get('enum')
+    # str and int only, the values the dispatch lookup accepts (bool is not an int there)
+    if not values or any(type(value) not in (str, int) for value in values):
+        return None
+    return values
@@ -0,0 +1,132 @@
+import filecmp
+import glob
+import hashlib
+import json
+import os
+import shutil
+from functools import lru_cache
+from typing import Dict, Any, Optional, Iterable, BinaryIO, List
+
+CACHE_FORMAT_VERSION = 2
+READ_CHUNK_SIZE = 1 << 20
+
+@lru_cache(maxsize=None)
+def generator_fingerprint() -> str:
+    # any change to the generator sources invalidates every cached spec: lib/ and generate_openapi.py,
+    # which assembles the output files (package, client)
+    digest = hashlib.sha256()
+    lib_dir = os.path.dirname(os.path.abspath(__file__))
+    source_paths = sorted(glob.glob(os.path.join(lib_dir, '*.py'))) + glob.glob(os.path.join(os.path.dirname(lib_dir), 'generate_openapi.py'))
+    for source_path in source_paths:
+        digest.update(os.path.basename(source_path).encode('utf-8'))
+        with open(source_path, 'rb') as source_file:
+            digest.update(source_file.read())
+    return digest.hexdigest()
+
+def spec_cache_key(spec_path: str, options: Dict[str, Any]) -> str:
+    digest = hashlib.sha256()
+    digest.update(f'{CACHE_FORMAT_VERSION}:{generator_fingerprint()}:'.encode('utf-8'))
+    digest.update(json.dumps(options, sort_keys=True).encode('utf-8'))
+    digest.update(b'\0')
+    with open(spec_path, 'rb') as spec_file:
+        update_digest(digest, spec_file)
+    return digest.hexdigest()
+
+def file_digest(path: str) -> Optional[str]:
+    try:
+        with open(path, 'rb') as file:
+            return update_digest(hashlib.sha256(), file).hexdigest()
+    except FileNotFoundError:
+        return None
+
+def update_digest(digest: Any, file: BinaryIO) -> Any:
+    # in chunks, specs can be far larger than we want to hold in memory at once
+    for chunk in iter(lambda: file.read(READ_CHUNK_SIZE), b''):
+        digest.update(chunk)
+    return digest
+
+def load_cache(cache_path: str) -> Dict[str, Dict[str, Any]]:
+    try:
+        with open(cache_path, 'r') as cache_file:
+            cache = json.load(cache_file)
+    except (FileNotFoundError, ValueError):
+        return {}
+    if cache.get('version') != CACHE_FORMAT_VERSION:
+        return {}
+    return cache.get('entries', {})
+
+def save_cache(cache_path: str, entries: Dict[str, Dict[str, Any]]) -> None:
+    # write-then-rename so an interrupted build never leaves a truncated cache behind
+    tmp_path = f'{cache_path}.tmp'
+    with open(tmp_path, 'w') as cache_file:
+        json.dump({'version': CACHE_FORMAT_VERSION, 'entries': entries}, cache_file, indent=2, sort_keys=True)
+    os.replace(tmp_path, cache_path)
+
+def fragment_cache_path(fragment_dir: str, spec_path: str) -> str:
+    return os.path.join(fragment_dir, hashlib.sha256(os.path.abspath(spec_path).encode('utf-8')).hexdigest() + '.json')
+
+def load_fragments(path: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    # per-schema / per-path fragments from the previous generate_models(..., fragment_cache=...) run
+    try:
+        with open(path, 'r') as fragment_file:
+            cache = json.load(fragment_file)
+    except (FileNotFoundError, ValueError):
+        return {}
+    if cache.get('version') != CACHE_FORMAT_VERSION or cache.get('generator') != generator_fingerprint() or cache.get('options') != options:
+        return {}
+    return cache.get('fragments', {})
+
+def save_fragments(path: str, options: Dict[str, Any], fragments: Dict[str, Any]) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as fragment_file:
+        json.dump({'version': CACHE_FORMAT_VERSION, 'generator': generator_fingerprint(), 'options': options, 'fragments': fragments}, fragment_file)
+    os.replace(tmp_path, path)
+
+def write_if_changed(path: str, content: str) -> bool:
+    # leaving identical output untouched keeps its mtime, so mypy/pyright caches stay valid
+    encoded = content.encode('utf-8')
+    try:
+        with open(path, 'rb') as existing_file:
+            if existing_file.read() == encoded:
+                return False
+    except FileNotFoundError:
+        pass
+    with open(path, 'wb') as output_file:
+        output_file.write(encoded)
+    return True
+
+def write_chunks_if_changed(path: str, chunks: Iterable[str]) -> bool:
+    # streaming variant of write_if_changed: the chunks go to a temporary file next to path, which
+    # replaces path only if the content differs
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    try:
+        with open(tmp_path, 'w', encoding='utf-8', newline='') as output_file:
+            for chunk in chunks:
+                output_file.write(chunk)
+        if os.path.exists(path) and filecmp.cmp(tmp_path, path, shallow=False):
+            return False
+        os.replace(tmp_path, path)
+        return True
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def write_package_if_changed(directory: str, files: Dict[str, str]) -> List[str]:
+    # Writes a generated package (file name -> content) into directory, which belongs to the generator:
+    # modules left over from a previous run are removed. Returns the paths of the changed files.
+    os.makedirs(directory, exist_ok=True)
+    changed = [os.path.join(directory, name) for name, content in files.items() if write_if_changed(os.path.join(directory, name), content)]
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if name.endswith(('.py', '.pyi')) and name not in files:
+            os.remove(path)
+            changed.append(path)
+    return changed
+
+def remove_generated(path: str) -> None:
+    # the other form of an output (module vs package), which would otherwise shadow the new one
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    elif os.path.exists(path):
+        os.remove(path)
@@ -0,0 +1,80 @@
+import json
+import time
+from typing import Any, Dict, List, Optional
+
+# Opt-in instrumentation of a generation run: build_context / generate_models(..., stats=GenerationStats())
+# record into it, generate_openapi.py --stats / --flamegraph write it out. Without a stats object the
+# generator only pays for `is not None` checks.
+
+class GenerationStats:
+    def __init__(self):
+        # phase ('load', 'ref_index', 'schemas', 'paths', 'topological_sort', 'render', ...) -> seconds
+        self.phases: Dict[str, float] = {}
+        # component schema / path entry ('schemas/<name>', 'paths/<path>') -> seconds
+        self.entries: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+        # deepest generate_model recursion, 1 for a schema without nested classes
+        self.max_depth = 0
+        # 'frame;frame;...' -> seconds spent in the innermost frame itself, for flamegraphs
+        self.stacks: Dict[str, float] = {}
+        # open frames: [label, start, seconds spent in the frames it called]
+        self._frames: List[List[Any]] = []
+        self._depth = 0
+
+    def push(self, label: str) -> None:
+        # ';' separates the frames of a folded stack
+        self._frames.append([label.replace(';', ','), time.perf_counter(), 0.0])
+
+    def pop(self) -> float:
+        # closes the innermost frame, returns its wall time
+        end = time.perf_counter()
+        stack = ';'.join(frame[0] for frame in self._frames)
+        label, start, children = self._frames.pop()
+        elapsed = end - start
+        self.stacks[stack] = self.stacks.get(stack, 0.0) + elapsed - children
+        if self._frames:
+            self._frames[-1][2] += elapsed
+        return elapsed
+
+    def start_phase(self, name: str) -> None:
+        self.push(name)
+
+    def end_phase(self, name: str) -> None:
+        self.phases[name] = self.phases.get(name, 0.0) + self.pop()
+
+    def start_entry(self, entry_key: str) -> None:
+        self.push(entry_key)
+
+    def end_entry(self, entry_key: str) -> None:
+        self.entries[entry_key] = self.entries.get(entry_key, 0.0) + self.pop()
+
+    def start_model(self, base_name: str) -> None:
+        self._depth += 1
+        if self._depth > self.max_depth:
+            self.max_depth = self._depth
+        self.count('generate_model_calls')
+        self.push(base_name)
+
+    def end_model(self) -> None:
+        self._depth -= 1
+        self.pop()
+
+    def count(self, name: str, amount: int = 1) -> None:
+        self.counts[name] = self.counts.get(name, 0) + amount
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'phases': self.phases,
+            'counts': self.counts,
+            'max_depth': self.max_depth,
+            # slowest first
+            'entries': dict(sorted(self.entries.items(), key=lambda item: item[1], reverse=True)),
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=2)
+
+    def folded_stacks(self, root: Optional[str] = None) -> List[str]:
+        # 'frame;frame;... <microseconds>' lines, the input of flamegraph.pl, speedscope and inferno
+        prefix = f'{root};' if root else ''
+        return [f'{prefix}{stack} {round(seconds * 1e6)}' for stack, seconds in self.stacks.items() if seconds > 0]
@@ -0,0 +1,78 @@
+import dataclasses
+import json
+from typing import Any, Callable, NamedTuple, Optional, Union
+
+# JSON backends in order of preference, the first one installed is the default
+CODEC_NAMES = ('orjson', 'msgspec', 'ujson', 'json')
+
+class JsonCodec(NamedTuple):
+    name: str
+    # str or bytes -> value, raises ValueError for invalid JSON. Bytes are parsed as UTF-8 directly,
+    # without decoding them to a str first (except by the stdlib backend).
+    loads: Callable[[Union[str, bytes]], Any]
+    # value -> compact UTF-8 encoded bytes
+    dumps: Callable[[Any], bytes]
+
+def load_codec(name: str) -> JsonCodec:
+    # raises ImportError when the backend is not installed
+    if name == 'orjson':
+        import orjson
+        return JsonCodec(name, orjson.loads, orjson.dumps)
+    if name == 'msgspec':
+        import msgspec
+        decode = msgspec.json.Decoder().decode
+
+        def msgspec_loads(data: Union[str, bytes]) -> Any:
+            try:
+                return decode(data)
+            except msgspec.DecodeError as error:
+                raise ValueError(str(error)) from error
+        return JsonCodec(name, msgspec_loads, msgspec.json.Encoder().encode)
+    if name == 'ujson':
+        import ujson
+
+        def ujson_dumps(value: Any) -> bytes:
+            return ujson.dumps(value, ensure_ascii=False, default=encode_dataclass).encode('utf-8')
+        return JsonCodec(name, ujson.loads, ujson_dumps)
+    if name == 'json':
+        def json_dumps(value: Any) -> bytes:
+            return json.dumps(value, ensure_ascii=False, separators=(',', ':'), default=encode_dataclass).encode('utf-8')
+        return JsonCodec(name, json.loads, json_dumps)
+    raise ValueError(f"Unknown JSON codec '{name}', expected one of {', '.join(CODEC_NAMES)}")
+
+def encode_dataclass(value: Any) -> Any:
+    # request bodies of generate_models(..., model_style='dataclass') classes; orjson and msgspec
+    # encode dataclasses themselves
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return {field.name: getattr(value, field.name) for field in dataclasses.fields(value)}
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+def select_codec(name: Optional[str] = None) -> JsonCodec:
+    # the named backend, or else the first one in CODEC_NAMES that is installed
+    if name:
+        return load_codec(name)
+    for candidate in CODEC_NAMES:
+        try:
+            return load_codec(candidate)
+        except ImportError:
+            continue
+    raise AssertionError('the stdlib json codec is always available')
+
+_default_codec: Optional[JsonCodec] = None
+
+def get_default_codec() -> JsonCodec:
+    # used to load specs and by clients that are not given a codec of their own
+    global _default_codec
+    if _default_codec is None:
+        _default_codec = select_codec()
+    return _default_codec
+
+def set_default_codec(codec: Union[JsonCodec, str]) -> None:
+    global _default_codec
+    _default_codec = load_codec(codec) if isinstance(codec, str) else codec
+
+def load_json_file(path: str, codec: Optional[JsonCodec] = None) -> Any:
+    # the file is read as bytes and handed to the backend as is
+    with open(path, 'rb') as json_file:
+        data = json_file.read()
+    return (codec or get_default_codec()).loads(data)
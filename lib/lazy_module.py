@@ -0,0 +1,42 @@
+import importlib
+import sys
+from typing import Any, Callable, Dict, List, Tuple
+
+# Runtime side of the lazily imported types package (lib/generate_package.py)
+
+def lazy_getattr(package: str, modules: Dict[str, Tuple[str, ...]]) -> Callable[[str], Any]:
+    # A module __getattr__ for package, whose submodules define the names listed for them in modules:
+    # imports the submodule that defines a name on first access. The value is stored in the package, so
+    # later lookups do not come back here.
+    namespace = sys.modules[package].__dict__
+    # name -> submodule, built on the first lookup rather than at import
+    defined_in: Dict[str, str] = {}
+
+    def __getattr__(name: str) -> Any:
+        if not defined_in:
+            defined_in.update((defined, module) for module, names in modules.items() for defined in names)
+        module_name = defined_in.get(name)
+        if module_name is None:
+            raise AttributeError(f'module {package!r} has no attribute {name!r}')
+        value = getattr(importlib.import_module(f'{package}.{module_name}'), name)
+        namespace[name] = value
+        return value
+    return __getattr__
+
+class LazyModelMapping:
+    # ModelMapping of a types package: path key -> path class, resolved (and imported) when first used
+    def __init__(self, resolve: Callable[[str], Any], path_classes: Dict[str, str]):
+        self._resolve = resolve
+        self._path_classes = path_classes
+
+    def __getattr__(self, key: str) -> Any:
+        try:
+            class_name = self._path_classes[key]
+        except KeyError:
+            raise AttributeError(key) from None
+        value = self._resolve(class_name)
+        setattr(self, key, value)
+        return value
+
+    def __dir__(self) -> List[str]:
+        return sorted(self._path_classes)
@@ -0,0 +1,120 @@
+import json
+import mmap
+import re
+from typing import Dict, Any, Iterator, List, Mapping, NamedTuple, Tuple
+
+from lib.json_codec import get_default_codec
+
+# Members of these objects are indexed instead of decoded: ('components', '*') covers
+# components/schemas, components/parameters, ...
+LAZY_OBJECTS = {('paths',), ('definitions',), ('components',), ('components', '*')}
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+class Span(NamedTuple):
+    # byte range of an encoded JSON value in the spec file
+    start: int
+    end: int
+
+class LazySpecFile:
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as spec_file:
+            self.data = mmap.mmap(spec_file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.loads = get_default_codec().loads
+
+    def decode(self, span: Span) -> Any:
+        return self.loads(self.data[span.start:span.end])
+
+class LazyMapping(Mapping[str, Any]):
+    # A JSON object whose members are decoded from the spec file when they are accessed. Nothing is
+    # cached: every access decodes a fresh copy, so iterating all paths or schemas only ever holds one
+    # of them in memory. Keep a decoded member around if it is needed more than once.
+    def __init__(self, source: LazySpecFile, members: Dict[str, Any]):
+        self._source = source
+        # member name -> Span, nested LazyMapping or an already decoded value
+        self._members = members
+
+    def __getitem__(self, key: str) -> Any:
+        member = self._members[key]
+        if isinstance(member, Span):
+            return self._source.decode(member)
+        return member
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._members
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._members)
+
+    def __len__(self) -> int:
+        return len(self._members)
+
+def load_lazy_spec(path: str) -> LazyMapping:
+    # Builds an index of byte offsets for every path and component in one pass over the file and
+    # returns the spec as a LazyMapping; only the small top-level members (info, servers, ...) are
+    # decoded up front. The file stays memory-mapped for as long as the mapping is alive.
+    source = LazySpecFile(path)
+    text = str(source.data, 'utf-8')
+    offsets: List[int] = []
+    document, end = index_object(source, text, WHITESPACE.match(text, 0).end(), (), offsets)
+    if WHITESPACE.match(text, end).end() != len(text):
+        raise ValueError(f'{path}: extra data after the JSON document')
+    if not text.isascii():
+        # spans were recorded as character offsets, the file is addressed in bytes
+        byte_offsets = char_to_byte_offsets(text, offsets)
+        remap_spans(document, byte_offsets)
+    return document
+
+def index_object(source: LazySpecFile, text: str, pos: int, path: Tuple[str, ...], offsets: List[int]) -> Tuple[LazyMapping, int]:
+    decoder = json.JSONDecoder()
+    if text[pos:pos + 1] != '{':
+        raise ValueError(f'{source.path}: expected an object at offset {pos}')
+    members: Dict[str, Any] = {}
+    pos = WHITESPACE.match(text, pos + 1).end()
+    if text[pos:pos + 1] == '}':
+        return LazyMapping(source, members), pos + 1
+    while True:
+        if text[pos:pos + 1] != '"':
+            raise ValueError(f'{source.path}: expected a member name at offset {pos}')
+        key, pos = json.decoder.scanstring(text, pos + 1)
+        pos = WHITESPACE.match(text, pos).end()
+        if text[pos:pos + 1] != ':':
+            raise ValueError(f"{source.path}: expected ':' at offset {pos}")
+        pos = WHITESPACE.match(text, pos + 1).end()
+
+        member_path = path + (key,)
+        if text[pos:pos + 1] == '{' and (member_path in LAZY_OBJECTS or path + ('*',) in LAZY_OBJECTS):
+            members[key], pos = index_object(source, text, pos, member_path, offsets)
+        elif path:
+            # decoded only to find where the value ends, then dropped
+            _, end = decoder.raw_decode(text, pos)
+            members[key] = Span(pos, end)
+            offsets.extend((pos, end))
+            pos = end
+        else:
+            members[key], pos = decoder.raw_decode(text, pos)
+
+        pos = WHITESPACE.match(text, pos).end()
+        separator = text[pos:pos + 1]
+        if separator == '}':
+            return LazyMapping(source, members), pos + 1
+        if separator != ',':
+            raise ValueError(f"{source.path}: expected ',' or '}}' at offset {pos}")
+        pos = WHITESPACE.match(text, pos + 1).end()
+
+def char_to_byte_offsets(text: str, offsets: List[int]) -> Dict[int, int]:
+    byte_offsets: Dict[int, int] = {}
+    previous_char, previous_byte = 0, 0
+    for offset in sorted(set(offsets)):
+        previous_byte += len(text[previous_char:offset].encode('utf-8'))
+        previous_char = offset
+        byte_offsets[offset] = previous_byte
+    return byte_offsets
+
+def remap_spans(mapping: LazyMapping, byte_offsets: Dict[int, int]) -> None:
+    for key, member in mapping._members.items():
+        if isinstance(member, Span):
+            mapping._members[key] = Span(byte_offsets[member.start], byte_offsets[member.end])
+        elif isinstance(member, LazyMapping):
+            remap_spans(member, byte_offsets)
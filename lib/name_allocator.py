@@ -0,0 +1,56 @@
+import keyword
+import re
+from typing import Dict, List, Tuple, Container
+
+def sanitize_class_name(name: str) -> str:
+    # an identifier (of a class or a module) that is not a keyword: 'class' -> 'class_', '2fa' -> '_2fa'
+    name = re.sub(r'\W|^(?=\d)', '_', name) or '_'
+    if name.startswith('__'):
+        name = '_' + name.lstrip('_')
+    if keyword.iskeyword(name):
+        name += '_'
+    return name
+
+class NameAllocator:
+    # Hands out unique identifiers: the sanitized base name if it is free, otherwise the first free
+    # `<base>_<n>`. Names are never released, so every suffix below the last one handed out for a base
+    # is known to be taken and probing resumes there instead of at 1. Suffixes are tracked per
+    # sanitized base, so bases that sanitize alike ('/a-b', '/a_b') share one sequence.
+    def __init__(self):
+        # allocated name -> the base name it was requested for
+        self.names: Dict[str, str] = {}
+        # (name, base name) in allocation order; sliced and replayed by the fragment cache
+        self.log: List[Tuple[str, str]] = []
+        self._next_suffix: Dict[str, int] = {}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.names
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def allocate(self, base_name: str) -> str:
+        name, stem, suffix = self._probe(base_name, ())
+        if suffix:
+            self._next_suffix[stem] = suffix
+        self.claim(name, base_name)
+        return name
+
+    def peek(self, base_name: str, pending: Container[str] = ()) -> str:
+        # the name allocate() would return if the names in pending were taken as well
+        return self._probe(base_name, pending)[0]
+
+    def claim(self, name: str, base_name: str) -> None:
+        self.names[name] = base_name
+        self.log.append((name, base_name))
+
+    def _probe(self, base_name: str, pending: Container[str]) -> Tuple[str, str, int]:
+        stem = sanitize_class_name(base_name)
+        if stem not in self.names and stem not in pending:
+            return stem, stem, 0
+        suffix = self._next_suffix.get(stem, 1)
+        while True:
+            name = sanitize_class_name(f'{stem}_{suffix}')
+            suffix += 1
+            if name not in self.names and name not in pending:
+                return name, stem, suffix
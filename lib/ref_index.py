@@ -0,0 +1,150 @@
+import json
+import os
+from collections.abc import Mapping
+from typing import Dict, Any, Optional, List, Set
+from urllib.parse import quote, unquote
+
+from lib.json_codec import load_json_file
+
+COMPONENT_SCHEMA_PREFIXES = ('#/components/schemas/', '#/definitions/')
+
+class UnresolvedRefError(ValueError):
+    def __init__(self, unresolved: Dict[str, str]):
+        self.unresolved = unresolved
+        details = "\n".join(f"  {ref}: {reason}" for ref, reason in sorted(unresolved.items()))
+        super().__init__(f"Unresolved $ref(s):\n{details}")
+
+def split_pointer(pointer: str) -> List[str]:
+    # RFC 6901 JSON Pointer as used in a URI fragment: percent-decoded, '~1' -> '/', '~0' -> '~'
+    pointer = unquote(pointer)
+    if not pointer:
+        return []
+    if not pointer.startswith('/'):
+        raise ValueError(f"invalid JSON pointer '{pointer}'")
+    return [token.replace('~1', '/').replace('~0', '~') for token in pointer[1:].split('/')]
+
+def walk_pointer(document: Any, tokens: List[str]) -> Any:
+    target = document
+    for token in tokens:
+        if isinstance(target, Mapping):
+            target = target[token]
+        elif isinstance(target, list):
+            target = target[int(token)]
+        else:
+            raise KeyError(token)
+    return target
+
+class RefIndex:
+    # Resolves $ref strings of an OpenAPI document. All refs found in the document are resolved once up
+    # front (prebuild), later lookups are dict hits. Lazily loaded documents (lib/lazy_spec.py) need
+    # prebuild=False, their refs are resolved and cached as they are encountered. Refs to other files are loaded relative to base_dir;
+    # loaded documents are kept in document_cache, which may be shared between indexes. The refs inside a
+    # loaded document are qualified with its absolute path when it is loaded ('#/Currency' ->
+    # '/specs/common.json#/Currency'), so they resolve against the document they came from wherever the
+    # schemas holding them end up.
+    def __init__(self, document: Dict[str, Any], base_dir: Optional[str] = None, document_cache: Optional[Dict[str, Any]] = None, prebuild: bool = True):
+        self.document = document
+        self.base_dir = os.path.abspath(base_dir) if base_dir else None
+        self.documents: Dict[str, Any] = document_cache if document_cache is not None else {}
+        self.loaded_paths: Set[str] = set()
+        self.unresolved: Dict[str, str] = {}
+        self.component_schemas: Dict[str, Any] = document.get('components', {}).get('schemas', {}) or document.get('definitions', {})
+        self._resolved: Dict[str, Any] = {}
+        self._component_names: Dict[str, Optional[str]] = {}
+        # resolve() calls, reported by GenerationStats
+        self.resolutions = 0
+        if prebuild:
+            self.resolve_all(document)
+
+    def resolve_all(self, value: Any) -> None:
+        stack = [value]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, dict):
+                ref = item.get('$ref')
+                if isinstance(ref, str):
+                    self.resolve(ref)
+                stack.extend(item.values())
+            elif isinstance(item, list):
+                stack.extend(item)
+
+    def resolve(self, ref: str) -> Dict[str, Any]:
+        self.resolutions += 1
+        resolved = self._resolved.get(ref)
+        if resolved is not None:
+            return resolved
+        try:
+            resolved = self._resolve_chain(ref)
+        except (KeyError, IndexError, ValueError, TypeError, OSError) as error:
+            self.unresolved[ref] = str(error) or type(error).__name__
+            resolved = {}
+        self._resolved[ref] = resolved
+        return resolved
+
+    def component_name(self, ref: str) -> Optional[str]:
+        # name of the component schema a local ref points at, None for anything else
+        try:
+            return self._component_names[ref]
+        except KeyError:
+            pass
+        name = None
+        for prefix in COMPONENT_SCHEMA_PREFIXES:
+            if ref.startswith(prefix):
+                tokens = split_pointer(ref[len(prefix) - 1:])
+                if len(tokens) == 1 and tokens[0] in self.component_schemas:
+                    name = tokens[0]
+                    break
+        self._component_names[ref] = name
+        return name
+
+    def _resolve_chain(self, ref: str) -> Dict[str, Any]:
+        seen: Set[str] = set()
+        target: Any = {'$ref': ref}
+        # follow alias chains like {"$ref": "#/components/schemas/Alias"} -> {"$ref": "..."}
+        while isinstance(target, Mapping) and isinstance(target.get('$ref'), str):
+            ref = target['$ref']
+            if ref in seen:
+                raise ValueError('circular $ref chain')
+            seen.add(ref)
+            target = self._lookup(ref)
+        if not isinstance(target, Mapping):
+            raise ValueError(f'target is not an object: {json.dumps(target)[:80]}')
+        return target
+
+    def _lookup(self, ref: str) -> Any:
+        location, _, pointer = ref.partition('#')
+        if location:
+            if '://' in location:
+                raise ValueError('remote $refs are not supported')
+            if self.base_dir is None and not os.path.isabs(unquote(location)):
+                raise ValueError('external $ref without a base directory')
+            document = self._load(os.path.normpath(os.path.join(self.base_dir or '', unquote(location))))
+        else:
+            document = self.document
+        return walk_pointer(document, split_pointer(pointer))
+
+    def _load(self, document_path: str) -> Any:
+        self.loaded_paths.add(document_path)
+        if document_path not in self.documents:
+            document = load_json_file(document_path)
+            qualify_refs(document, document_path)
+            self.documents[document_path] = document
+        return self.documents[document_path]
+
+def qualify_refs(document: Any, document_path: str) -> None:
+    # rewrites the refs of a document loaded from document_path (an absolute path) in place to refs
+    # with absolute locations: '#/Currency' and 'money/currency.json#/Currency' are relative to it
+    directory = os.path.dirname(document_path)
+    stack = [document]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, dict):
+            ref = item.get('$ref')
+            if isinstance(ref, str):
+                location, _, pointer = ref.partition('#')
+                if '://' not in location:
+                    path = os.path.normpath(os.path.join(directory, unquote(location))) if location else document_path
+                    item['$ref'] = f'{quote(path)}#{pointer}'
+            stack.extend(item.values())
+        elif isinstance(item, list):
+            stack.extend(item)
@@ -0,0 +1,206 @@
+import threading
+import time
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Mapping, NamedTuple, Optional, Tuple
+
+# Client-side HTTP cache for GET responses, shared by the sync (lib/typed_fetch.py) and async
+# (lib/async_fetch.py) clients: ApiClient(cache=ResponseCache()). Responses are kept as the bytes the
+# server sent, keyed by method and full URL (query included), and decoded again on every hit, so
+# callers never share a result.
+#
+# A response is fresh for its Cache-Control max-age (less its Age), or until its Expires, and served
+# without a request while it is. Once stale, a response with an ETag or Last-Modified is revalidated:
+# the request carries If-None-Match / If-Modified-Since and a 304 Not Modified refreshes the stored
+# response instead of downloading it again. Responses marked no-store, and stale ones that cannot be
+# revalidated, are not kept. The least recently used responses are evicted beyond max_entries or
+# max_bytes. A successful POST, PUT, PATCH or DELETE invalidates what is stored for its URL.
+
+CACHEABLE_METHODS = frozenset(['GET'])
+# methods that do not change anything on the server, the others invalidate
+SAFE_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS', 'TRACE'])
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+class CachePolicy(NamedTuple):
+    # per endpoint, see ResponseCache.configure
+    enabled: bool = True
+    # seconds a response is fresh, instead of what its headers say; None follows the headers
+    ttl: Optional[float] = None
+
+class CachedResponse:
+    __slots__ = ('key', 'content', 'expires', 'etag', 'last_modified')
+
+    def __init__(self, key: Tuple[str, str], content: bytes, expires: float, etag: Optional[str], last_modified: Optional[str]):
+        self.key = key
+        self.content = content
+        # time.monotonic() the response becomes stale at
+        self.expires = expires
+        self.etag = etag
+        self.last_modified = last_modified
+
+    def fresh(self) -> bool:
+        return time.monotonic() < self.expires
+
+    def revalidatable(self) -> bool:
+        return self.etag is not None or self.last_modified is not None
+
+    def validators(self) -> Dict[str, str]:
+        # headers of a conditional request for the stored response
+        headers = {}
+        if self.etag is not None:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified is not None:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+class ResponseCache:
+    # default_ttl: seconds a response without Cache-Control max-age or Expires is fresh (0: revalidate
+    # it on every call, or do not keep it when it has no ETag / Last-Modified).
+    # cache_by_default: cache every GET endpoint, or only those enabled with configure.
+    # Safe to share between threads and clients.
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, max_bytes: int = DEFAULT_MAX_BYTES, default_ttl: float = 0.0, cache_by_default: bool = True):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.default_policy = CachePolicy(enabled=cache_by_default)
+        # URL template -> policy
+        self.policies: Dict[str, CachePolicy] = {}
+        # least recently used first
+        self._entries: 'OrderedDict[Tuple[str, str], CachedResponse]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def configure(self, endpoint: Any, enabled: bool = True, ttl: Optional[float] = None) -> None:
+        # endpoint: a generated *_GET_Method class (e.g. ModelMapping._pet_petId.GET) or its URL template.
+        # ttl overrides the freshness the server sends, no-store is still honoured.
+        url_template = endpoint if isinstance(endpoint, str) else endpoint.URL
+        self.policies[url_template] = CachePolicy(enabled, ttl)
+
+    def policy(self, url_template: Optional[str]) -> CachePolicy:
+        if url_template is None:
+            return self.default_policy
+        return self.policies.get(url_template, self.default_policy)
+
+    def caches(self, method: str, url_template: Optional[str] = None) -> bool:
+        return method.upper() in CACHEABLE_METHODS and self.policy(url_template).enabled
+
+    def lookup(self, method: str, url: str, url_template: Optional[str] = None) -> Optional[CachedResponse]:
+        # the stored response for a call, fresh or revalidatable; None when there is none or the
+        # endpoint is not cached
+        if not self.caches(method, url_template):
+            return None
+        key = (method.upper(), url)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if not entry.fresh() and not entry.revalidatable():
+                self._remove(entry)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def update(self, method: str, url: str, url_template: Optional[str], status: int, content: bytes, headers: Mapping[str, str]) -> None:
+        # after a success response from the server
+        if method.upper() not in SAFE_METHODS:
+            self.invalidate(url)
+        else:
+            self.store(method, url, url_template, status, content, headers)
+
+    def store(self, method: str, url: str, url_template: Optional[str], status: int, content: bytes, headers: Mapping[str, str]) -> None:
+        # keeps a 200 response if its endpoint is cached and its headers allow it
+        if status != 200 or not self.caches(method, url_template) or len(content) > self.max_bytes:
+            return
+        policy = self.policy(url_template)
+        directives = cache_control(headers.get('Cache-Control'))
+        if 'no-store' in directives or headers.get('Vary', '').strip() == '*':
+            return
+        lifetime = policy.ttl if policy.ttl is not None else freshness_lifetime(directives, headers, self.default_ttl)
+        entry = CachedResponse((method.upper(), url), content, time.monotonic() + lifetime, headers.get('ETag'), headers.get('Last-Modified'))
+        if lifetime <= 0 and not entry.revalidatable():
+            return
+        with self._lock:
+            previous = self._entries.get(entry.key)
+            if previous is not None:
+                self._remove(previous)
+            self._entries[entry.key] = entry
+            self._bytes += len(content)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries.values())))
+
+    def revalidated(self, entry: CachedResponse, headers: Mapping[str, str], url_template: Optional[str] = None) -> None:
+        # a 304 Not Modified for entry: fresh again for the lifetime the 304 gives
+        policy = self.policy(url_template)
+        lifetime = policy.ttl if policy.ttl is not None else freshness_lifetime(cache_control(headers.get('Cache-Control')), headers, self.default_ttl)
+        with self._lock:
+            entry.expires = time.monotonic() + lifetime
+            entry.etag = headers.get('ETag') or entry.etag
+            entry.last_modified = headers.get('Last-Modified') or entry.last_modified
+
+    def invalidate(self, url: str) -> None:
+        # after a successful non-GET call to url, which may have changed what it returns
+        with self._lock:
+            for method in CACHEABLE_METHODS:
+                entry = self._entries.get((method, url))
+                if entry is not None:
+                    self._remove(entry)
+
+    def purge_expired(self) -> int:
+        # drops stale responses that cannot be revalidated, returns how many
+        with self._lock:
+            expired = [entry for entry in self._entries.values() if not entry.fresh() and not entry.revalidatable()]
+            for entry in expired:
+                self._remove(entry)
+        return len(expired)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def _remove(self, entry: CachedResponse) -> None:
+        # with the lock held
+        del self._entries[entry.key]
+        self._bytes -= len(entry.content)
+
+def cache_control(value: Optional[str]) -> Dict[str, Optional[str]]:
+    # 'max-age=60, no-cache' -> {'max-age': '60', 'no-cache': None}
+    directives: Dict[str, Optional[str]] = {}
+    if not value:
+        return directives
+    for directive in value.split(','):
+        name, _, argument = directive.partition('=')
+        name = name.strip().lower()
+        if name:
+            directives[name] = argument.strip().strip('"') if argument else None
+    return directives
+
+def freshness_lifetime(directives: Dict[str, Optional[str]], headers: Mapping[str, str], default_ttl: float) -> float:
+    # seconds a response stays fresh from now
+    if 'no-cache' in directives:
+        return 0.0
+    max_age = directives.get('max-age')
+    if max_age is not None:
+        try:
+            age = float(headers.get('Age') or 0)
+            return max(0.0, float(max_age) - age)
+        except ValueError:
+            return 0.0
+    expires = headers.get('Expires')
+    if expires:
+        try:
+            date = headers.get('Date')
+            now = parsedate_to_datetime(date).timestamp() if date else time.time()
+            return max(0.0, parsedate_to_datetime(expires).timestamp() - now)
+        except (TypeError, ValueError):
+            # an invalid Expires ('0', '-1') means already expired
+            return 0.0
+    return default_ttl
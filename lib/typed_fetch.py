@@ -0,0 +1,203 @@
+import threading
+import time
+from typing import Any, Collection, Dict, Optional, Type, TypeVar
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+from lib.fetch_common import Timeout, DEFAULT_TIMEOUT, DEFAULT_RETRY_STATUSES, IDEMPOTENT_METHODS, build_url
+from lib.fetch_metrics import FetchCall, FetchObserver, url_path
+from lib.response_cache import CachedResponse, ResponseCache
+from lib.json_codec import JsonCodec, get_default_codec
+from lib.validation import Validator
+from lib.dataclass_conversion import Converter
+
+T = TypeVar('T')
+
+# seconds the current thread spent opening connections, read by ApiClient.send for its observer;
+# urllib3 connects in the thread making the request
+_connect_time = threading.local()
+
+class TimedConnection:
+    def connect(self) -> None:
+        # DNS, TCP and, for https, the TLS handshake
+        start = time.perf_counter()
+        super().connect()  # type: ignore[misc]
+        _connect_time.seconds = getattr(_connect_time, 'seconds', 0.0) + time.perf_counter() - start
+
+class TimedHTTPConnection(TimedConnection, HTTPConnection):
+    pass
+
+class TimedHTTPSConnection(TimedConnection, HTTPSConnection):
+    pass
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+class TimedHTTPAdapter(HTTPAdapter):
+    # HTTPAdapter whose pools time opening connections, a timestamp pair per new connection
+    def init_poolmanager(self, *args: Any, **kwargs: Any) -> None:
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {'http': TimedHTTPConnectionPool, 'https': TimedHTTPSConnectionPool}
+
+class ApiClient:
+    # Owns one requests.Session: connections are kept alive and pooled per host, so repeated calls skip
+    # the TCP/TLS handshake. Create one per process and share it.
+    #
+    # pool_connections: number of hosts a pool is kept for, pool_maxsize: connections kept per host.
+    # Failed connects are retried for every method; read errors and retry_statuses only for idempotent
+    # methods, so a POST is never sent twice once the server may have seen it.
+    # Bodies are encoded and responses decoded from bytes with codec (lib/json_codec.py).
+    # observer (lib/fetch_metrics.py) is told about every call, e.g. a MetricsAggregator; None skips that.
+    # cache (lib/response_cache.py) keeps GET responses as their Cache-Control / ETag / Last-Modified allow.
+    def __init__(self, domain: str = '', pool_connections: int = 10, pool_maxsize: int = 10, retries: int = 3, backoff_factor: float = 0.1, retry_statuses: Collection[int] = DEFAULT_RETRY_STATUSES, timeout: Timeout = DEFAULT_TIMEOUT, codec: Optional[JsonCodec] = None, observer: Optional[FetchObserver] = None, cache: Optional[ResponseCache] = None):
+        self.domain = domain
+        self.timeout = timeout
+        self.codec = codec or get_default_codec()
+        self.observer = observer
+        self.cache = cache
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=retry_statuses,
+            allowed_methods=IDEMPOTENT_METHODS,
+            # after the last retry the response is returned and reported like any other error status
+            raise_on_status=False,
+        )
+        adapter = TimedHTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers['Content-Type'] = 'application/json'
+
+    def fetch(self, url_template: str, method: str, response_200: Type[T], query: Optional[Dict[str, Any]] = None, path: Any = None, body: Any = None, domain: Optional[str] = None, validator: Optional[Validator] = None, converter: Optional[Converter] = None) -> T:
+        return self.send(method, build_url('', url_template, path, query), response_200, body=body, domain=domain, validator=validator, converter=converter, url_template=url_template)
+
+    def send(self, method: str, url: str, response_200: Type[T], body: Any = None, domain: Optional[str] = None, validator: Optional[Validator] = None, converter: Optional[Converter] = None, url_template: Optional[str] = None) -> T:
+        # url is already formatted (path and query filled in), e.g. by a compile_url formatter.
+        # validator, e.g. api_types.validate_<Method>_Response_200, raises ValidationError when the
+        # response does not match its class; converter (compile_converter) then turns it into dataclasses.
+        # url_template (the URL of the endpoint's *_Method class) is what the observer groups calls by,
+        # url without its query otherwise, and selects the endpoint's cache policy.
+        full_url = (self.domain if domain is None else domain) + url
+
+        # Convert body dictionary to JSON
+        json_body = self.codec.dumps(body) if body else None
+
+        observer = self.observer
+        if observer is None:
+            return self.send_request(method, full_url, json_body, validator, converter, None, url_template)
+        call = FetchCall(method, url_template or url_path(url), full_url)
+        call.bytes_out = len(json_body) if json_body else 0
+        observer.call_started(call)
+        _connect_time.seconds = 0.0
+        try:
+            return self.send_request(method, full_url, json_body, validator, converter, call, url_template)
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            if _connect_time.seconds:
+                call.connect = _connect_time.seconds
+            call.total = time.perf_counter() - call.start
+            observer.call_finished(call)
+
+    def send_request(self, method: str, full_url: str, json_body: Any, validator: Optional[Validator], converter: Optional[Converter], call: Optional[FetchCall], url_template: Optional[str] = None) -> Any:
+        # send without the observer, call is filled in when there is one
+        headers = call.headers if call is not None and call.headers else None
+
+        cache = self.cache
+        cached: Optional[CachedResponse] = None
+        if cache is not None:
+            cached = cache.lookup(method, full_url, url_template)
+            if cached is not None and cached.fresh():
+                if call is not None:
+                    call.cache = 'hit'
+                return self.decode_response(cached.content, None, validator, converter, call)
+            if cached is not None:
+                # stale: the server answers 304 Not Modified instead of the response when it did not change
+                headers = dict(headers or {}, **cached.validators())
+            if call is not None and cache.caches(method, url_template):
+                call.cache = 'miss'
+
+        # Make the HTTP request
+        try:
+            response = self.session.request(method=method, url=full_url, data=json_body, headers=headers, timeout=self.timeout)
+            if call is not None:
+                call.status = response.status_code
+                call.bytes_in = len(response.content)
+                call.ttfb = response.elapsed.total_seconds()
+            response.raise_for_status()  # Raises HTTPError for bad responses
+        except requests.exceptions.RequestException as e:
+            try:
+                # Attempt to parse the error response body
+                error_response = self.codec.loads(e.response.content) # type: ignore
+            except (ValueError, AttributeError):
+                error_response = e.response.text if e.response else str(e)
+            raise requests.exceptions.RequestException(f"Request failed: {error_response}") from e
+
+        if cached is not None and response.status_code == 304:
+            cache.revalidated(cached, response.headers, url_template)  # type: ignore[union-attr]
+            if call is not None:
+                call.cache = 'revalidated'
+            return self.decode_response(cached.content, None, validator, converter, call)
+
+        # Check for successful request and return the response content
+        if response.status_code >= 200 and response.status_code < 300:
+            if cache is not None:
+                cache.update(method, full_url, url_template, response.status_code, response.content, response.headers)
+            return self.decode_response(response.content, response, validator, converter, call)
+        else:
+            try:
+                error_response = self.codec.loads(response.content)
+            except ValueError:
+                error_response = response.text
+            raise requests.exceptions.HTTPError(f"HTTP Error: {response.status_code} - {error_response}")
+
+    def decode_response(self, content: bytes, response: Optional[requests.Response], validator: Optional[Validator], converter: Optional[Converter], call: Optional[FetchCall]) -> Any:
+        # a success response's body, response is None when it came from the cache
+        decode_start = time.perf_counter() if call is not None else 0.0
+        try:
+            data = self.codec.loads(content)
+            result: Any = { "data": data }
+        except ValueError:
+            result = response.text if response is not None else content.decode('utf-8', 'replace')
+        if validator is not None:
+            validator(result)
+        if converter is not None:
+            result = converter(result)
+        if call is not None:
+            call.decode = time.perf_counter() - decode_start
+        return result
+
+    def close(self) -> None:
+        self.session.close()
+
+    def __enter__(self) -> 'ApiClient':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+_default_client: Optional[ApiClient] = None
+
+def get_default_client() -> ApiClient:
+    # shared by every typed_fetch call that does not pass a client of its own
+    global _default_client
+    if _default_client is None:
+        _default_client = ApiClient()
+    return _default_client
+
+def set_default_client(client: ApiClient) -> None:
+    global _default_client
+    _default_client = client
+
+def typed_fetch(domain: str, url_template: str, method: str, response_200: Type[T], query: Optional[Dict[str, Any]] = None, path: Any = None, body: Any = None, client: Optional[ApiClient] = None, validator: Optional[Validator] = None, converter: Optional[Converter] = None) -> T:
+    # url_template and method are the URL and METHOD of the endpoint's *_Method class
+    return (client or get_default_client()).fetch(url_template, method, response_200, query=query, path=path, body=body, domain=domain, validator=validator, converter=converter)
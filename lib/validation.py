@@ -0,0 +1,51 @@
+from typing import Any, Callable, Collection, Dict, List, Optional, Union
+
+# Runtime side of the validate_<Class> functions that generate_models(..., validators=True) emits next
+# to every class (see lib/generate_validators.py)
+
+class ValidationError(ValueError):
+    def __init__(self, expected: str, value: Any, path: Optional[List[Union[str, int]]] = None):
+        super().__init__(expected, value)
+        self.expected = expected
+        self.value = value
+        # keys and list indexes from the validated value down to the offending one
+        self.path: List[Union[str, int]] = path or []
+
+    @classmethod
+    def missing(cls, key: str) -> 'ValidationError':
+        return cls('required key', MISSING, [key])
+
+    def at(self, *keys: Union[str, int]) -> 'ValidationError':
+        # prepends the location of the value that failed inside its parent, the path is only
+        # assembled while the error travels up
+        self.path[:0] = keys
+        return self
+
+    def __str__(self) -> str:
+        location = ''.join(f'[{key}]' if isinstance(key, int) else f'.{key}' for key in self.path)
+        if self.value is MISSING:
+            return f'${location}: missing {self.expected}'
+        return f'${location}: expected {self.expected}, got {type(self.value).__name__} {self.value!r:.80}'
+
+class _Missing:
+    def __repr__(self) -> str:
+        return '<missing>'
+
+MISSING: Any = _Missing()
+
+Validator = Callable[[Any], None]
+
+def select_validators(types_module: Any, validators: Dict[str, str], validate: Union[bool, Collection[str]]) -> Dict[str, Validator]:
+    # validators: operation name -> name of its validator in types_module, which is only looked up for
+    # the selected operations (a lazily imported types package then only loads those).
+    # validate: True for every operation, False for none, or the names of the operations to validate
+    if validate is True:
+        selected: Collection[str] = validators
+    elif not validate:
+        return {}
+    else:
+        selected = validate
+    unknown = [name for name in selected if name not in validators]
+    if unknown:
+        raise ValueError(f"No response validator for {', '.join(sorted(unknown))}")
+    return {name: getattr(types_module, validators[name]) for name in selected}
@@ -0,0 +1,77 @@
+# the async (lib/async_fetch.py) client against a local server
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+from lib.async_fetch import AsyncApiClient, AsyncFetchError, gather_fetch
+from lib.response_cache import ResponseCache
+
+def json_response(value, status=200, **headers):
+    return status, {'Content-Type': 'application/json', **headers}, json.dumps(value).encode()
+
+class InFlight:
+    # a handler that answers after a pause and records how many requests it handled at once
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.current = self.most = 0
+
+    def __call__(self, request):
+        with self.lock:
+            self.current += 1
+            self.most = max(self.most, self.current)
+        time.sleep(0.05)
+        with self.lock:
+            self.current -= 1
+        return json_response({'path': request.path})
+
+def test_send(local_server):
+    local_server.routes[('GET', '/pet/7')] = lambda request: json_response({'id': 7})
+    local_server.routes[('POST', '/pet')] = lambda request: json_response(json.loads(request.body))
+    local_server.routes[('POST', '/fail')] = lambda request: json_response({'error': 'busy'}, 503)
+
+    async def main():
+        async with AsyncApiClient(local_server.url, backoff_factor=0) as client:
+            assert await client.fetch('/pet/{id}', 'GET', dict, path={'id': 7}) == {'data': {'id': 7}}
+            assert await client.fetch('/pet', 'POST', dict, body={'name': 'Rex'}) == {'data': {'name': 'Rex'}}
+            with pytest.raises(AsyncFetchError, match='busy'):
+                await client.fetch('/fail', 'POST', dict, body={'a': 1})
+    asyncio.run(main())
+    assert [request.path for request in local_server.requests] == ['/pet/7', '/pet', '/fail']
+
+def test_event_loop_change(local_server):
+    local_server.routes[('GET', '/pet/7')] = lambda request: json_response({'id': 7})
+    client = AsyncApiClient(local_server.url)
+    # a second asyncio.run: the session of the first loop is not reused
+    for _ in range(2):
+        assert asyncio.run(client.fetch('/pet/7', 'GET', dict)) == {'data': {'id': 7}}
+
+@pytest.mark.parametrize('limit_per_host', [0, 3])
+def test_limit_per_host(local_server, limit_per_host):
+    in_flight = local_server.routes[('GET', '/slow')] = InFlight()
+
+    async def main():
+        async with AsyncApiClient(local_server.url, limit_per_host=limit_per_host) as client:
+            return await gather_fetch(client.fetch, [{'url_template': '/slow', 'method': 'GET', 'response_200': dict, 'query': {'i': i}} for i in range(20)])
+    results = asyncio.run(main())
+    assert [result['data']['path'] for result in results] == [f'/slow?i={i}' for i in range(20)]
+    if limit_per_host:
+        assert in_flight.most == limit_per_host
+    else:
+        # 0 does not limit the requests to a host at all
+        assert in_flight.most > 3
+
+def test_cache_revalidation(local_server):
+    def pet(request):
+        if request.headers.get('If-None-Match') == '"v1"':
+            return 304, {'ETag': '"v1"'}, b''
+        return json_response({'id': 1}, ETag='"v1"')
+    local_server.routes[('GET', '/pet/1')] = pet
+
+    async def main():
+        async with AsyncApiClient(local_server.url, cache=ResponseCache()) as client:
+            return [await client.fetch('/pet/1', 'GET', dict) for _ in range(2)]
+    assert asyncio.run(main()) == [{'data': {'id': 1}}] * 2
+    assert [request.headers.get('If-None-Match') for request in local_server.requests] == [None, '"v1"']
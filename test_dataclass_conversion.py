@@ -0,0 +1,103 @@
+# model_style='dataclass': decoded JSON converted into the generated classes (lib/dataclass_conversion.py)
+import dataclasses
+
+import pytest
+
+from lib.dataclass_conversion import compile_converter
+from lib.generate_models import generate_models
+
+def animals_spec(cat, dog, discriminator=None):
+    union = {'oneOf': [{'$ref': '#/components/schemas/Cat'}, {'$ref': '#/components/schemas/Dog'}]}
+    if discriminator:
+        union['discriminator'] = discriminator
+    return {
+        'openapi': '3.0.0',
+        'paths': {
+            '/animal': {'get': {'responses': {'200': {'description': '', 'content': {'application/json': {'schema': union}}}}}},
+            '/owner': {'get': {'responses': {'200': {'description': '', 'content': {'application/json': {'schema': {'$ref': '#/components/schemas/Owner'}}}}}}},
+        },
+        'components': {
+            'schemas': {
+                'Cat': cat,
+                'Dog': dog,
+                'Owner': {'type': 'object', 'properties': {'name': {'type': 'string'}, 'pet': union}},
+            },
+        },
+    }
+
+# Cat and Dog share the name and kind fields
+CAT = {'type': 'object', 'required': ['kind'], 'properties': {'kind': {'type': 'string', 'enum': ['cat']}, 'name': {'type': 'string'}, 'lives': {'type': 'integer'}}}
+DOG = {'type': 'object', 'required': ['kind'], 'properties': {'kind': {'type': 'string', 'enum': ['dog']}, 'name': {'type': 'string'}, 'bark': {'type': 'boolean'}}}
+
+@pytest.mark.parametrize('validators', [False, True])
+def test_union_member_by_discriminator(import_code, validators):
+    types = import_code(generate_models(animals_spec(CAT, DOG), validators=validators, model_style='dataclass'))
+    convert = compile_converter(types._animal_GET_Response_200)
+
+    dog = convert({'data': {'kind': 'dog', 'name': 'Rex', 'bark': True}})['data']
+    assert type(dog) is types._animal_GET_Response_200_OneOf_1
+    assert dataclasses.asdict(dog) == {'kind': 'dog', 'name': 'Rex', 'bark': True}
+    cat = convert({'data': {'kind': 'cat', 'name': 'Tom'}})['data']
+    assert dataclasses.asdict(cat) == {'kind': 'cat', 'name': 'Tom', 'lives': None}
+    with pytest.raises(ValueError):
+        convert({'data': {'kind': 'cow'}})
+
+def test_union_property_by_discriminator(import_code):
+    types = import_code(generate_models(animals_spec(CAT, DOG), model_style='dataclass'))
+    owner = compile_converter(types.Owner)({'name': 'Ann', 'pet': {'kind': 'dog', 'bark': False}})
+    assert dataclasses.asdict(owner.pet) == {'kind': 'dog', 'name': None, 'bark': False}
+
+def test_declared_discriminator_mapping(import_code):
+    # the property is a plain string in both members, only the mapping tells them apart
+    cat = {'type': 'object', 'required': ['type'], 'properties': {'type': {'type': 'string'}, 'name': {'type': 'string'}}}
+    dog = {'type': 'object', 'required': ['type'], 'properties': {'type': {'type': 'string'}, 'name': {'type': 'string'}}}
+    discriminator = {'propertyName': 'type', 'mapping': {'meow': '#/components/schemas/Cat', 'woof': '#/components/schemas/Dog'}}
+    types = import_code(generate_models(animals_spec(cat, dog, discriminator), model_style='dataclass'))
+    convert = compile_converter(types._animal_GET_Response_200)
+    assert type(convert({'data': {'type': 'woof', 'name': 'Rex'}})['data']) is types._animal_GET_Response_200_OneOf_1
+    assert type(convert({'data': {'type': 'meow', 'name': 'Tom'}})['data']) is types._animal_GET_Response_200_OneOf_0
+
+def test_union_without_discriminator(import_code):
+    # no property tells the members apart: the first one without keys the value lacks is taken
+    cat = {'type': 'object', 'properties': {'name': {'type': 'string'}, 'lives': {'type': 'integer'}}}
+    dog = {'type': 'object', 'properties': {'name': {'type': 'string'}, 'bark': {'type': 'boolean'}}}
+    types = import_code(generate_models(animals_spec(cat, dog), model_style='dataclass'))
+    convert = compile_converter(types._animal_GET_Response_200)
+
+    assert dataclasses.asdict(convert({'data': {'name': 'Rex', 'bark': True}})['data']) == {'name': 'Rex', 'bark': True}
+    assert dataclasses.asdict(convert({'data': {'name': 'Tom', 'lives': 9}})['data']) == {'name': 'Tom', 'lives': 9}
+    with pytest.raises(ValueError):
+        convert({'data': {'name': 'Rex', 'wings': 2}})
+
+def test_literal_fields_select_member(import_code):
+    # kind is not required, so it is no discriminator, but a member whose Literal it fails is skipped
+    cat = dict(CAT, required=[])
+    dog = dict(DOG, required=[])
+    types = import_code(generate_models(animals_spec(cat, dog), model_style='dataclass'))
+    convert = compile_converter(types._animal_GET_Response_200)
+    assert dataclasses.asdict(convert({'data': {'kind': 'dog', 'name': 'Rex'}})['data']) == {'kind': 'dog', 'name': 'Rex', 'bark': None}
+
+def test_nested_classes_and_lists(import_code):
+    spec = {
+        'openapi': '3.0.0',
+        'paths': {'/order': {'get': {'responses': {'200': {'description': '', 'content': {'application/json': {'schema': {'$ref': '#/components/schemas/Order'}}}}}}}},
+        'components': {
+            'schemas': {
+                'Order': {
+                    'type': 'object',
+                    'required': ['id', 'lines'],
+                    'properties': {
+                        'id': {'type': 'integer'},
+                        'lines': {'type': 'array', 'items': {'type': 'object', 'properties': {'sku': {'type': 'string'}, 'count': {'type': 'integer'}}}},
+                        'customer': {'type': 'object', 'properties': {'name': {'type': 'string'}}},
+                    },
+                },
+            },
+        },
+    }
+    types = import_code(generate_models(spec, model_style='dataclass'))
+    order = compile_converter(types.Order)({'id': 1, 'lines': [{'sku': 'a', 'count': 2}], 'customer': {'name': 'Ann'}})
+    assert dataclasses.is_dataclass(order.lines[0]) and order.lines[0].count == 2
+    assert order.customer.name == 'Ann'
+    with pytest.raises(ValueError):
+        compile_converter(types.Order)({'lines': []})
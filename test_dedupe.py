@@ -0,0 +1,50 @@
+# dedupe='alias' / 'reuse': structurally identical inline schemas share one class
+import pytest
+
+from lib.generate_models import generate_models
+
+address = {'type': 'object', 'required': ['city'], 'properties': {'city': {'type': 'string'}, 'zip': {'type': 'string'}}}
+
+def operation(schema):
+    return {'responses': {'200': {'description': 'ok', 'content': {'application/json': {'schema': schema}}}}}
+
+spec = {
+    'openapi': '3.0.0',
+    'paths': {
+        # the same shape inline in two paths, once with documentation keywords and properties reordered
+        '/home': {'get': operation({'type': 'object', 'properties': {'address': address}})},
+        '/work': {'get': operation({'type': 'object', 'properties': {'phone': {'type': 'string'}, 'address': {
+            'type': 'object', 'description': 'where', 'required': ['city'],
+            'properties': {'zip': {'type': 'string', 'example': '12345'}, 'city': {'type': 'string'}},
+        }}})},
+        # differs in what is required
+        '/other': {'get': operation({'type': 'object', 'properties': {'address': {**address, 'required': ['zip']}}})},
+    },
+}
+
+def test_off():
+    code = generate_models(spec)
+    assert code.count('    city: ') == 3
+
+def test_alias(import_code):
+    module = import_code(generate_models(spec, dedupe='alias'))
+    assert module._work_GET_Response_Status200_Address is module._home_GET_Response_Status200_Address
+    assert module._other_GET_Response_Status200_Address is not module._home_GET_Response_Status200_Address
+
+def test_reuse(import_code):
+    code = generate_models(spec, dedupe='reuse')
+    module = import_code(code)
+    assert '_work_GET_Response_Status200_Address' not in code
+    assert module._work_GET_Response_Status200.__annotations__['address'] == module._home_GET_Response_Status200.__annotations__['address']
+
+def test_component_schemas_keep_their_class(import_code):
+    # Address and Location are both generated, the inline copies reuse the first of them
+    with_component = {**spec, 'components': {'schemas': {'Address': address, 'Location': address}}}
+    code = generate_models(with_component, dedupe='reuse')
+    module = import_code(code)
+    assert 'class Address(TypedDict)' in code and 'class Location(TypedDict)' in code
+    assert module._home_GET_Response_Status200.__annotations__['address'] == module.Optional[module.Address]
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        generate_models(spec, dedupe='sometimes')
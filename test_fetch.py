@@ -0,0 +1,51 @@
+# the sync (lib/typed_fetch.py) client against a local server
+import json
+
+import pytest
+import requests
+
+from lib.response_cache import ResponseCache
+from lib.typed_fetch import ApiClient, typed_fetch
+
+def json_response(value, status=200, **headers):
+    return status, {'Content-Type': 'application/json', **headers}, json.dumps(value).encode()
+
+def test_send_and_keep_alive(local_server):
+    local_server.routes[('GET', '/pet/7')] = lambda request: json_response({'id': 7, 'query': request.path.split('?', 1)[1]})
+    local_server.routes[('POST', '/pet')] = lambda request: json_response(json.loads(request.body))
+
+    with ApiClient(local_server.url) as client:
+        assert client.fetch('/pet/{id}', 'GET', dict, path={'id': 7}, query={'tags': ['a', 'b']}) == {'data': {'id': 7, 'query': 'tags=a&tags=b'}}
+        assert client.fetch('/pet', 'POST', dict, body={'name': 'Rex'}) == {'data': {'name': 'Rex'}}
+    assert local_server.requests[1].headers['Content-Type'] == 'application/json'
+    # one pooled connection for both calls
+    assert local_server.requests[0].client == local_server.requests[1].client
+
+def test_errors_and_retries(local_server):
+    statuses = [503, 200]
+    local_server.routes[('GET', '/flaky')] = lambda request: json_response({'ok': True}, statuses.pop(0))
+    local_server.routes[('POST', '/flaky')] = lambda request: json_response({'error': 'busy'}, 503)
+
+    client = ApiClient(local_server.url, backoff_factor=0)
+    assert typed_fetch(local_server.url, '/flaky', 'GET', dict, client=client) == {'data': {'ok': True}}
+    # a POST is not sent again
+    with pytest.raises(requests.exceptions.RequestException, match='busy'):
+        client.fetch('/flaky', 'POST', dict, body={'a': 1})
+    assert [request.method for request in local_server.requests] == ['GET', 'GET', 'POST']
+    client.close()
+
+def test_cache_revalidation(local_server):
+    def pet(request):
+        if request.headers.get('If-None-Match') == '"v1"':
+            return 304, {'ETag': '"v1"'}, b''
+        return json_response({'id': 1}, ETag='"v1"')
+    local_server.routes[('GET', '/pet/1')] = pet
+    local_server.routes[('GET', '/fresh')] = lambda request: json_response({'id': 2}, **{'Cache-Control': 'max-age=60'})
+
+    cache = ResponseCache()
+    with ApiClient(local_server.url, cache=cache) as client:
+        assert client.fetch('/pet/1', 'GET', dict) == client.fetch('/pet/1', 'GET', dict) == {'data': {'id': 1}}
+        assert client.fetch('/fresh', 'GET', dict) == client.fetch('/fresh', 'GET', dict) == {'data': {'id': 2}}
+    # the second /pet/1 was answered 304, the second /fresh came from the cache
+    assert [(request.path, request.headers.get('If-None-Match')) for request in local_server.requests] == [('/pet/1', None), ('/pet/1', '"v1"'), ('/fresh', None)]
+    assert len(cache) == 2
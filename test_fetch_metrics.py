@@ -0,0 +1,80 @@
+# call observers and per-endpoint metrics (lib/fetch_metrics.py)
+import asyncio
+import json
+
+import pytest
+import requests
+
+from lib.async_fetch import AsyncApiClient
+from lib.fetch_metrics import EndpointMetrics, FetchCall, FetchObserver, MetricsAggregator, ObserverChain
+from lib.response_cache import ResponseCache
+from lib.typed_fetch import ApiClient
+
+class Recorder(FetchObserver):
+    def __init__(self, name, events):
+        self.name = name
+        self.events = events
+
+    def call_started(self, call):
+        self.events.append((self.name, 'started'))
+        call.headers['X-Trace'] = self.name
+
+    def call_finished(self, call):
+        self.events.append((self.name, 'finished'))
+
+def pet_routes(local_server):
+    local_server.routes[('GET', '/pet/1')] = lambda request: (200, {'Cache-Control': 'max-age=60', 'X-Trace': request.headers.get('X-Trace', '')}, json.dumps({'id': 1}).encode())
+    local_server.routes[('POST', '/pet')] = lambda request: (400, {}, b'{"error": "invalid"}')
+
+def test_sync_client(local_server):
+    pet_routes(local_server)
+    metrics = MetricsAggregator()
+    events = []
+    client = ApiClient(local_server.url, observer=ObserverChain([Recorder('a', events), metrics]), cache=ResponseCache())
+    for _ in range(3):
+        client.fetch('/pet/{id}', 'GET', dict, path={'id': 1})
+    with pytest.raises(requests.exceptions.RequestException):
+        client.fetch('/pet', 'POST', dict, body={'name': 'Rex'})
+    client.close()
+
+    get = metrics.snapshot()['GET /pet/{id}']
+    assert (get['calls'], get['errors'], get['statuses'], get['cache_hits']) == (3, 0, {200: 1}, 2)
+    assert get['connects'] == 1 and get['bytes_in'] == len(b'{"id": 1}')
+    post = metrics.snapshot(reset=True)['POST /pet']
+    assert (post['calls'], post['errors'], post['statuses'], post['bytes_out']) == (1, 1, {400: 1}, len(local_server.requests[-1].body))
+    assert metrics.snapshot() == {}
+    # headers added in call_started are sent
+    assert local_server.requests[0].headers['X-Trace'] == 'a'
+    assert events[:2] == [('a', 'started'), ('a', 'finished')]
+
+def test_async_client(local_server):
+    pet_routes(local_server)
+    metrics = MetricsAggregator()
+
+    async def main():
+        async with AsyncApiClient(local_server.url, observer=metrics) as client:
+            await asyncio.gather(*(client.fetch('/pet/{id}', 'GET', dict, path={'id': 1}) for _ in range(4)))
+    asyncio.run(main())
+
+    method_class = type('_pet_id_GET_Method', (), {'URL': '/pet/{id}', 'METHOD': 'GET'})
+    endpoint = metrics.endpoint(method_class)
+    assert endpoint is not None and endpoint.calls == 4 and endpoint.responses == 4
+    assert 1 <= endpoint.connects <= 4 and endpoint.decodes == 4
+
+def test_observer_order():
+    events = []
+    chain = ObserverChain([Recorder('a', events), Recorder('b', events)])
+    call = FetchCall('get', '/pet/{id}', 'http://host/pet/1')
+    chain.call_started(call)
+    chain.call_finished(call)
+    assert events == [('a', 'started'), ('b', 'started'), ('b', 'finished'), ('a', 'finished')]
+    assert call.endpoint == ('GET', '/pet/{id}')
+
+def test_percentiles():
+    metrics = EndpointMetrics()
+    for total in [0.001] * 90 + [0.2] * 9 + [30.0]:
+        call = FetchCall('GET', '/pet', '/pet')
+        call.total = total
+        metrics.add(call)
+    assert (metrics.percentile(0.5), metrics.percentile(0.9), metrics.percentile(0.99), metrics.percentile(1.0)) == (0.005, 0.005, 0.25, 30.0)
+    assert metrics.to_dict()['latency_buckets']['inf'] == 1
@@ -0,0 +1,100 @@
+# change notification (lib/file_watcher.py) and generate_openapi.py --watch
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import pytest
+
+from lib.file_watcher import InotifyWatcher, PollingWatcher, create_watcher
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+@pytest.fixture(params=['inotify', 'polling'])
+def watcher(request):
+    if request.param == 'inotify':
+        watcher = create_watcher()
+        if not isinstance(watcher, InotifyWatcher):
+            pytest.skip('inotify is not available')
+    else:
+        watcher = PollingWatcher(interval=0.01)
+    yield watcher
+    watcher.close()
+
+def wait_for(watcher, path):
+    # the changes reported until path is among them
+    changed = set()
+    deadline = time.monotonic() + 5
+    while path not in changed and time.monotonic() < deadline:
+        changed |= watcher.wait(0.1)
+    return changed
+
+def test_changes(watcher, tmp_path):
+    watched, other = tmp_path / 'watched', tmp_path / 'other'
+    watched.mkdir()
+    other.mkdir()
+    watcher.watch([str(watched)])
+    spec = watched / 'openapi.json'
+
+    # polling tells files apart by mtime and size
+    time.sleep(0.01)
+    spec.write_text('{}')
+    (other / 'openapi.json').write_text('{}')
+    assert wait_for(watcher, str(spec)) == {str(spec)}
+
+    # saved by renaming a temporary file over it
+    (watched / 'openapi.json.tmp').write_text('{"paths": {}}')
+    os.replace(watched / 'openapi.json.tmp', spec)
+    assert str(spec) in wait_for(watcher, str(spec))
+
+    (watched / 'service').mkdir()
+    assert str(watched / 'service') in wait_for(watcher, str(watched / 'service'))
+
+    spec.unlink()
+    assert wait_for(watcher, str(spec)) == {str(spec)}
+    assert watcher.wait(0.05) == set()
+
+def test_watch_cli(tmp_path):
+    spec = {
+        'openapi': '3.0.0',
+        'paths': {'/price': {'get': {'responses': {'200': {'description': 'a price', 'content': {'application/json': {'schema': {'$ref': 'common.json#/Money'}}}}}}}},
+    }
+    (tmp_path / 'api').mkdir()
+    (tmp_path / 'api' / 'openapi.json').write_text(json.dumps(spec))
+    common = tmp_path / 'api' / 'common.json'
+    common.write_text(json.dumps({'Money': {'type': 'object', 'properties': {'amount': {'type': 'number'}}}}))
+    output = tmp_path / 'api' / '__generated_api_types.py'
+
+    def wait_until(condition):
+        deadline = time.monotonic() + 10
+        while not condition():
+            assert process.poll() is None and time.monotonic() < deadline
+            time.sleep(0.02)
+
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, 'generate_openapi.py'), str(tmp_path), '--watch', '--no-cache', '--debounce-ms', '10', '-j', '1'],
+        cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+    )
+    try:
+        # changes are seen from this line on
+        for line in process.stdout:
+            if line.startswith('--- watching'):
+                break
+        assert 'amount' in output.read_text()
+        # a file the spec $refs, with a local ref of its own
+        common.write_text(json.dumps({
+            'Money': {'type': 'object', 'properties': {'amount': {'type': 'number'}, 'currency': {'$ref': '#/Currency'}}},
+            'Currency': {'type': 'object', 'properties': {'code': {'type': 'string'}}},
+        }))
+        wait_until(lambda: 'code' in output.read_text())
+        # a new spec below the target
+        (tmp_path / 'new').mkdir()
+        (tmp_path / 'new' / 'openapi.json').write_text(json.dumps({'openapi': '3.0.0', 'paths': {'/new': {'get': {'responses': {}}}}}))
+        wait_until(lambda: (tmp_path / 'new' / '__generated_api_types.py').exists())
+    finally:
+        process.send_signal(signal.SIGINT)
+        log, _ = process.communicate(timeout=10)
+    assert process.returncode == 0, log
+    assert '--- stopped watching ---' in log
@@ -0,0 +1,76 @@
+# incremental generation (a fragment_cache reused across runs) has to give the output of a full run
+import copy
+import json
+
+from lib.generate_models import generate_models
+from lib.generation_stats import GenerationStats
+
+# Cat and Dog are told apart by their kind, an enum behind a second $ref
+spec = {
+    'openapi': '3.0.0',
+    'paths': {
+        '/animals': {
+            'get': {
+                'responses': {
+                    '200': {
+                        'description': 'an animal',
+                        'content': {'application/json': {'schema': {'oneOf': [{'$ref': '#/components/schemas/Cat'}, {'$ref': '#/components/schemas/Dog'}]}}},
+                    },
+                },
+            },
+        },
+    },
+    'components': {
+        'schemas': {
+            'Cat': {'type': 'object', 'required': ['kind'], 'properties': {'kind': {'$ref': '#/components/schemas/CatKind'}}},
+            'Dog': {'type': 'object', 'required': ['kind'], 'properties': {'kind': {'$ref': '#/components/schemas/DogKind'}}},
+            'CatKind': {'type': 'string', 'enum': ['cat']},
+            'DogKind': {'type': 'string', 'enum': ['dog']},
+            'Pet': {'oneOf': [{'$ref': '#/components/schemas/Cat'}, {'$ref': '#/components/schemas/Dog'}]},
+        },
+    },
+}
+
+def test_nested_enum_change():
+    fragment_cache: dict = {}
+    generate_models(spec, fragment_cache=fragment_cache, validators=True)
+
+    changed = copy.deepcopy(spec)
+    changed['components']['schemas']['CatKind']['enum'] = ['kitty']
+    incremental = generate_models(changed, fragment_cache=fragment_cache, validators=True)
+
+    assert incremental == generate_models(changed, validators=True)
+    assert "'kitty'" in incremental
+
+def test_unchanged_spec():
+    fragment_cache: dict = {}
+    full = generate_models(spec, fragment_cache=fragment_cache, validators=True)
+    assert generate_models(copy.deepcopy(spec), fragment_cache=fragment_cache, validators=True) == full
+
+def test_only_changed_entries_are_regenerated():
+    fragment_cache: dict = {}
+    generate_models(spec, fragment_cache=fragment_cache)
+    # the cache is JSON, as generate_openapi.py stores it between runs
+    fragment_cache = json.loads(json.dumps(fragment_cache))
+
+    changed = copy.deepcopy(spec)
+    changed['components']['schemas']['Dog']['properties']['name'] = {'type': 'string'}
+    stats = GenerationStats()
+    incremental = generate_models(changed, fragment_cache=fragment_cache, stats=stats)
+
+    assert incremental == generate_models(changed)
+    # Dog, and the path and Pet that inline a copy of it
+    assert stats.counts['fragments_generated'] == 3
+    assert stats.counts['fragments_restored'] == 3
+
+def test_renamed_schema():
+    fragment_cache: dict = {}
+    generate_models(spec, fragment_cache=fragment_cache)
+
+    renamed = copy.deepcopy(spec)
+    schemas = renamed['components']['schemas']
+    schemas['Kitten'] = schemas.pop('Cat')
+    for union in (schemas['Pet'], renamed['paths']['/animals']['get']['responses']['200']['content']['application/json']['schema']):
+        union['oneOf'][0] = {'$ref': '#/components/schemas/Kitten'}
+
+    assert generate_models(renamed, fragment_cache=fragment_cache) == generate_models(renamed)
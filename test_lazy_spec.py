@@ -0,0 +1,43 @@
+# specs loaded lazily (lib/lazy_spec.py) generate what the decoded spec does
+import json
+import os
+
+import pytest
+
+from lib.generate_models import generate_models
+from lib.lazy_spec import LazyMapping, load_lazy_spec
+from lib.ref_index import RefIndex
+
+FIXTURES = [os.path.join(os.path.dirname(__file__), 'tests', test, 'openapi.json') for test in ('test1', 'test2')]
+
+@pytest.mark.parametrize('path', FIXTURES)
+def test_same_output(path):
+    with open(path, encoding='utf-8') as spec_file:
+        spec = json.load(spec_file)
+    lazy = load_lazy_spec(path)
+    assert generate_models(lazy, ref_index=RefIndex(lazy, prebuild=False), validators=True) == generate_models(spec, validators=True)
+
+def test_index(tmp_path):
+    # non-ASCII text before the indexed members: spans are byte offsets
+    spec = {
+        'info': {'title': 'Zoo – ü'},
+        'paths': {'/ä': {'get': {'summary': 'ß'}}},
+        'components': {'schemas': {'Pet': {'type': 'object', 'description': '🐈'}}},
+    }
+    path = tmp_path / 'spec.json'
+    path.write_text(json.dumps(spec, ensure_ascii=False, indent=2), encoding='utf-8')
+    lazy = load_lazy_spec(str(path))
+
+    assert lazy['info'] == spec['info']
+    assert isinstance(lazy['paths'], LazyMapping) and isinstance(lazy['components']['schemas'], LazyMapping)
+    assert lazy['paths']['/ä'] == spec['paths']['/ä']
+    assert dict(lazy['components']['schemas']) == spec['components']['schemas']
+    # a fresh copy per access
+    assert lazy['paths']['/ä'] is not lazy['paths']['/ä']
+
+@pytest.mark.parametrize('text', ['{"paths": {"/a": 1} ', '{"paths": {"/a" 1}}', '{} []'])
+def test_invalid(tmp_path, text):
+    path = tmp_path / 'spec.json'
+    path.write_text(text)
+    with pytest.raises(ValueError):
+        load_lazy_spec(str(path))
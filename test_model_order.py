@@ -0,0 +1,53 @@
+# every class has to be importable and bound after the classes it references, also in cycles
+from typing import get_type_hints
+
+from lib.generate_models import generate_models
+
+def object_schema(**properties):
+    return {'type': 'object', 'properties': properties}
+
+def ref(name):
+    return {'$ref': f'#/components/schemas/{name}'}
+
+def spec_with(schemas):
+    return {
+        'openapi': '3.0.0',
+        'paths': {
+            '/nodes': {
+                'get': {
+                    'responses': {'200': {'description': 'a node', 'content': {'application/json': {'schema': ref(next(iter(schemas)))}}}},
+                },
+            },
+        },
+        'components': {'schemas': schemas},
+    }
+
+def test_self_reference(import_code):
+    module = import_code(generate_models(spec_with({'Node': object_schema(parent=ref('Node'))})))
+    assert get_type_hints(module.Node)['parent'].__args__[0] is module.Node
+
+def test_mutual_recursion(import_code):
+    module = import_code(generate_models(spec_with({
+        'A': object_schema(b=ref('B')),
+        'B': object_schema(a=ref('A')),
+    })))
+    assert get_type_hints(module.A)['b'].__args__[0] is module.B
+    assert get_type_hints(module.B)['a'].__args__[0] is module.A
+
+def test_deep_chain(import_code):
+    schemas = {f'Level{idx}': object_schema(child=ref(f'Level{idx + 1}')) for idx in range(2000)}
+    schemas['Level2000'] = object_schema(value={'type': 'string'})
+    module = import_code(generate_models(spec_with(schemas)))
+    assert get_type_hints(module.Level0)['child'].__args__[0] is module.Level1
+
+def test_alias_in_cycle(import_code):
+    # x and y are the same inline schema, y becomes an alias of x's class inside Node's cycle
+    inline = object_schema(n=ref('Node'))
+    spec = spec_with({'Node': object_schema(x=inline, y=inline)})
+    for validators in (False, True):
+        module = import_code(generate_models(spec, dedupe='alias', validators=validators))
+        assert module.Node_Y is module.Node_X
+        assert get_type_hints(module.Node)['y'].__args__[0] is module.Node_X
+        if validators:
+            assert module.validate_Node_Y is module.validate_Node_X
+            module.validate_Node({'x': {'n': {}}, 'y': {'n': {'y': {}}}})
@@ -0,0 +1,88 @@
+# the types as a lazily imported package (lib/generate_package.py)
+import importlib
+import sys
+
+import pytest
+
+from lib.generate_models import build_context
+from lib.generate_package import render_package, split_entries
+
+def ref(name):
+    return {'$ref': f'#/components/schemas/{name}'}
+
+def operation(tag, schema):
+    return {'tags': [tag], 'responses': {'200': {'description': 'ok', 'content': {'application/json': {'schema': schema}}}}}
+
+spec = {
+    'openapi': '3.0.0',
+    'paths': {
+        '/class/{id}': {'get': operation('class', ref('Pet'))},
+        '/import': {'get': operation('import', ref('Owner'))},
+        '/2fa': {'post': operation('2fa', {'type': 'object', 'properties': {'code': {'type': 'string'}}})},
+        '/pets': {'get': operation('Pet', {'type': 'array', 'items': ref('Pet')})},
+    },
+    'components': {
+        'schemas': {
+            'Pet': {'type': 'object', 'properties': {'name': {'type': 'string'}, 'owner': ref('Owner')}},
+            'Owner': {'type': 'object', 'properties': {'favourite': ref('Pet')}},
+        },
+    },
+}
+
+@pytest.fixture
+def import_package(tmp_path, monkeypatch):
+    # import_package(files, name) writes render_package's files as the package name and imports it
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    def import_package(files, name='generated_package'):
+        (tmp_path / name).mkdir()
+        for file_name, content in files.items():
+            (tmp_path / name / file_name).write_text(content)
+        importlib.invalidate_caches()
+        for module in [module for module in sys.modules if module == name or module.startswith(f'{name}.')]:
+            monkeypatch.delitem(sys.modules, module)
+        package = importlib.import_module(name)
+        monkeypatch.setitem(sys.modules, name, package)
+        return package
+    return import_package
+
+@pytest.mark.parametrize('split', ['tag', 'prefix'])
+def test_group_module_names(split, import_package):
+    files = render_package(build_context(spec), split_entries(spec, split))
+    # keywords and names that are no identifiers get other module names, and so does the Pet tag,
+    # whose submodule would otherwise shadow the Pet class in the package
+    modules = {file_name[:-3] for file_name in files if not file_name.startswith('__init__')}
+    assert {'class_', 'import_', '_2fa'} <= modules
+    assert 'Pet' not in modules
+    for file_name in files:
+        compile(files[file_name], file_name, 'exec')
+
+    package = import_package(files)
+    # imports the submodule of /pets first, the Pet class still resolves to the class
+    assert package.ModelMapping._pets.GET.URL == '/pets'
+    assert isinstance(package.Pet, type)
+
+def test_lazy_attributes(import_package):
+    files = render_package(build_context(spec))
+    package = import_package(files)
+    submodules = lambda: {module for module in sys.modules if module.startswith('generated_package.')}
+
+    # Pet and Owner reference each other, they share a submodule
+    assert [file_name for file_name in files if file_name.startswith('schemas_')] == ['schemas_Owner.py']
+    assert submodules() == set()
+    assert package.ModelMapping._import.GET.METHOD == 'GET'
+    loaded = submodules()
+    assert loaded and not any('2fa' in module for module in loaded)
+    # stored in the package by the first lookup
+    owner = package.Owner
+    assert vars(package)['Owner'] is owner
+    assert '_import' in dir(package.ModelMapping)
+    with pytest.raises(AttributeError):
+        package.Missing
+    with pytest.raises(AttributeError):
+        package.ModelMapping._missing
+
+def test_package_stub():
+    files = render_package(build_context(spec))
+    assert 'from .schemas_Owner import Owner as Owner, Pet as Pet' in files['__init__.pyi'].splitlines()
+    assert '    _pets = _pets_API' in files['__init__.pyi'].splitlines()
@@ -0,0 +1,56 @@
+# $refs into other files, and the local refs inside those files
+import json
+
+import pytest
+
+from lib.generate_models import generate_models
+from lib.ref_index import RefIndex, UnresolvedRefError
+
+def write_json(path, value):
+    path.write_text(json.dumps(value))
+
+def spec_with(price_schema):
+    return {
+        'openapi': '3.0.0',
+        'paths': {
+            '/price': {
+                'get': {
+                    'responses': {'200': {'description': 'a price', 'content': {'application/json': {'schema': price_schema}}}},
+                },
+            },
+        },
+    }
+
+def test_local_refs_of_external_documents(tmp_path, import_code):
+    # openapi.json -> common.json#/Money -> #/Currency (common.json's) -> types/code.json#/Code
+    (tmp_path / 'types').mkdir()
+    write_json(tmp_path / 'types' / 'code.json', {'Code': {'type': 'string', 'enum': ['EUR', 'USD']}})
+    write_json(tmp_path / 'common.json', {
+        'Money': {'type': 'object', 'required': ['amount', 'currency'], 'properties': {'amount': {'type': 'number'}, 'currency': {'$ref': '#/Currency'}}},
+        'Currency': {'type': 'object', 'required': ['code'], 'properties': {'code': {'$ref': 'types/code.json#/Code'}}},
+    })
+    # the root spec has a Currency of its own, which common.json's '#/Currency' must not pick up
+    spec = spec_with({'$ref': 'common.json#/Money'})
+    spec['Currency'] = {'type': 'string'}
+
+    ref_index = RefIndex(spec, base_dir=str(tmp_path))
+    module = import_code(generate_models(spec, ref_index=ref_index, validators=True))
+
+    money = {'amount': 1.5, 'currency': {'code': 'EUR'}}
+    module.validate__price_GET_Response_Status200(money)
+    with pytest.raises(ValueError):
+        module.validate__price_GET_Response_Status200({'amount': 1.5, 'currency': {'code': 'CZK'}})
+    assert ref_index.loaded_paths == {str(tmp_path / 'common.json'), str(tmp_path / 'types' / 'code.json')}
+
+def test_shared_document_cache(tmp_path):
+    write_json(tmp_path / 'common.json', {'Money': {'$ref': '#/Amount'}, 'Amount': {'type': 'number'}})
+    document_cache: dict = {}
+    for _ in range(2):
+        ref_index = RefIndex(spec_with({'$ref': 'common.json#/Money'}), base_dir=str(tmp_path), document_cache=document_cache)
+        assert ref_index.resolve('common.json#/Money') == {'type': 'number'}
+
+def test_unresolved_ref_inside_external_document(tmp_path):
+    write_json(tmp_path / 'common.json', {'Money': {'type': 'object', 'properties': {'currency': {'$ref': '#/Currency'}}}})
+    spec = spec_with({'$ref': 'common.json#/Money'})
+    with pytest.raises(UnresolvedRefError, match='common.json#/Currency'):
+        generate_models(spec, ref_index=RefIndex(spec, base_dir=str(tmp_path)))
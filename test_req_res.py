@@ -1,66 +1,8 @@
-
-
-# ----------------------------------------------
-# =============== typed_fetch.py ===============
-# ----------------------------------------------
-import requests
 import json
-from typing import Any, Dict, Optional, Type, TypeVar
-
-
-T = TypeVar('T')
-
-def typed_fetch(domain: str, url_template: str, method: str, response_200: Type[T], query: Optional[Dict[str, Any]] = None, path: Any = None, body: Any = None) -> T:
-    # Replace placeholders in the url_template with values from path
-    url = url_template
-    if path:
-        for key, value in path.items():
-            placeholder = f'{{{key}}}'
-            if placeholder in url:
-                url = url.replace(placeholder, str(value))
-    
-    # Convert query dictionary to query parameters
-    query_params = ''
-    if query:
-        query_params = '?' + '&'.join([f'{key}={value}' for key, value in query.items()])
-    
-    # Full URL with query parameters
-    full_url = domain + url + query_params
-    
-    # Convert body dictionary to JSON
-    headers = {'Content-Type': 'application/json'}
-    json_body = json.dumps(body) if body else None
-    
-    # Make the HTTP request
-    try:
-        response = requests.request(method=method, url=full_url, headers=headers, data=json_body)
-        response.raise_for_status()  # Raises HTTPError for bad responses
-    except requests.exceptions.RequestException as e:
-        try:
-            # Attempt to parse the error response body
-            error_response = e.response.json() # type: ignore
-        except (ValueError, AttributeError):
-            error_response = e.response.text if e.response else str(e)
-        raise requests.exceptions.RequestException(f"Request failed: {error_response}") from e
-
-    # Check for successful request and return the response content
-    if response.status_code >= 200 and response.status_code < 300:
-        try:
-            # TODO: add runtime validation against
-            data = response.json()
-            return { "data": data } # type: ignore
-        except json.JSONDecodeError:
-            return response.text # type: ignore
-    else:
-        try:
-            error_response = response.json()
-        except json.JSONDecodeError:
-            error_response = response.text
-        raise requests.exceptions.HTTPError(f"HTTP Error: {response.status_code} - {error_response}")
+import sys
 
-# ----------------------------------------------
-# =============== typed_fetch.py ===============
-# ----------------------------------------------
+# typed_fetch calls go through a shared, pooled ApiClient (lib/typed_fetch.py)
+from lib.typed_fetch import typed_fetch
 
 from tests.test1.__generated_api_types import ModelMapping
 
@@ -114,5 +56,17 @@ def main():
     opt_str = res1['data']
 
 
-main()
+def test_post_store_order(local_server, monkeypatch):
+    local_server.routes[('POST', '/store/order')] = lambda request: (200, {'Content-Type': 'application/json'}, request.body)
+    monkeypatch.setattr(sys.modules[__name__], 'domain', local_server.url)
+
+    main()
+
+    request = local_server.requests[0]
+    assert request.path == '/store/order'
+    assert json.loads(request.body)['petId'] == 2
+
+
+if __name__ == '__main__':
+    main()
 
@@ -0,0 +1,46 @@
+# iter_generate_models and write_models give the code generate_models returns, chunk by chunk
+import io
+import os
+
+from lib.generate_models import generate_models, iter_generate_models, write_models
+from lib.generation_cache import write_chunks_if_changed
+
+spec = {
+    'openapi': '3.0.0',
+    'paths': {
+        '/pets': {
+            'get': {
+                'responses': {'200': {'description': 'a pet', 'content': {'application/json': {'schema': {'$ref': '#/components/schemas/Pet'}}}}},
+            },
+        },
+    },
+    'components': {
+        'schemas': {
+            'Pet': {'type': 'object', 'required': ['name'], 'properties': {'name': {'type': 'string'}, 'owner': {'$ref': '#/components/schemas/Owner'}}},
+            'Owner': {'type': 'object', 'properties': {'pets': {'type': 'array', 'items': {'$ref': '#/components/schemas/Pet'}}}},
+        },
+    },
+}
+
+def test_chunks_join_to_generate_models():
+    full = generate_models(spec, validators=True)
+    chunks = list(iter_generate_models(spec, validators=True))
+    assert len(chunks) > 3
+    assert ''.join(chunks) == full
+
+    output = io.StringIO()
+    write_models(spec, output, validators=True)
+    assert output.getvalue() == full
+
+def test_spec_without_paths(import_code):
+    module = import_code(generate_models({'openapi': '3.0.0', 'paths': {}, 'components': {'schemas': spec['components']['schemas']}}))
+    assert set(module.Pet.__annotations__) == {'name', 'owner'}
+    assert not hasattr(module.ModelMapping, '_pets')
+
+def test_write_chunks_if_changed(tmp_path):
+    path = str(tmp_path / 'types.py')
+    assert write_chunks_if_changed(path, iter_generate_models(spec))
+    modified = os.stat(path).st_mtime_ns
+    assert not write_chunks_if_changed(path, iter_generate_models(spec))
+    assert os.stat(path).st_mtime_ns == modified
+    assert os.listdir(tmp_path) == ['types.py']
@@ -0,0 +1,99 @@
+# URL parameter serialization (lib/url_builder.py), against the examples of the OpenAPI 3 style table
+import pytest
+
+from lib.generate_client import generate_client
+from lib.url_builder import ParameterStyle, compile_url, parameter_style
+
+color = ['blue', 'black', 'brown']
+rgb = {'R': 100, 'G': 200, 'B': 150}
+
+@pytest.mark.parametrize('style, explode, value, expected', [
+    ('simple', False, 'blue', 'blue'),
+    ('simple', False, color, 'blue,black,brown'),
+    ('simple', False, rgb, 'R,100,G,200,B,150'),
+    ('simple', True, rgb, 'R=100,G=200,B=150'),
+    ('label', False, 'blue', '.blue'),
+    ('label', False, color, '.blue,black,brown'),
+    ('label', True, color, '.blue.black.brown'),
+    ('label', False, rgb, '.R,100,G,200,B,150'),
+    ('label', True, rgb, '.R=100.G=200.B=150'),
+    ('matrix', False, 'blue', ';color=blue'),
+    ('matrix', False, color, ';color=blue,black,brown'),
+    ('matrix', True, color, ';color=blue;color=black;color=brown'),
+    ('matrix', False, rgb, ';color=R,100,G,200,B,150'),
+    ('matrix', True, rgb, ';R=100;G=200;B=150'),
+])
+def test_path_styles(style, explode, value, expected):
+    format_url = compile_url('/colors/{color}', path_styles={'color': ParameterStyle(style, explode)})
+    assert format_url({'color': value}) == f'/colors/{expected}'
+
+@pytest.mark.parametrize('style, explode, value, expected', [
+    ('form', True, 'blue', 'color=blue'),
+    ('form', False, color, 'color=blue,black,brown'),
+    ('form', True, color, 'color=blue&color=black&color=brown'),
+    ('form', False, rgb, 'color=R,100,G,200,B,150'),
+    ('form', True, rgb, 'R=100&G=200&B=150'),
+    ('spaceDelimited', False, color, 'color=blue%20black%20brown'),
+    ('pipeDelimited', False, color, 'color=blue|black|brown'),
+    ('deepObject', True, rgb, 'color[R]=100&color[G]=200&color[B]=150'),
+])
+def test_query_styles(style, explode, value, expected):
+    format_url = compile_url('/colors', query_styles={'color': ParameterStyle(style, explode)})
+    assert format_url(None, {'color': value}) == f'/colors?{expected}'
+
+def test_encoding():
+    format_url = compile_url('/files/{dir}/{name}', path_styles={'dir': ParameterStyle('simple', False, allow_reserved=True)})
+    url = format_url({'dir': 'a/b c', 'name': 'ž?.txt'}, {'q': 'x&y=z', 'flag': True, 'skip': None, 'tags': []})
+    assert url == '/files/a/b%20c/%C5%BE%3F.txt?q=x%26y%3Dz&flag=true'
+
+def test_defaults():
+    assert parameter_style('path') == ParameterStyle('simple', False)
+    assert parameter_style('query') == ParameterStyle('form', True)
+    assert parameter_style('query', 'pipeDelimited') == ParameterStyle('pipeDelimited', False)
+    format_url = compile_url('/pet/{petId}')
+    assert format_url({'petId': 7}, {'status': ['a', 'b']}) == '/pet/7?status=a&status=b'
+    with pytest.raises(KeyError):
+        format_url(None)
+    with pytest.raises(ValueError):
+        compile_url('/pet/{petId}', path_styles={'petId': ParameterStyle('form', True)})
+
+def test_generated_client_styles():
+    spec = {
+        'openapi': '3.0.0',
+        'paths': {
+            '/pet/{petId}': {
+                'get': {
+                    'operationId': 'getPet',
+                    'parameters': [
+                        {'name': 'petId', 'in': 'path', 'required': True, 'style': 'label', 'schema': {'type': 'integer'}},
+                        {'name': 'tags', 'in': 'query', 'style': 'pipeDelimited', 'explode': False, 'schema': {'type': 'array', 'items': {'type': 'string'}}},
+                        {'name': 'status', 'in': 'query', 'schema': {'type': 'string'}},
+                    ],
+                    'responses': {'200': {'description': 'a pet'}},
+                },
+            },
+        },
+    }
+    code = generate_client(spec)
+    # only the parameters whose style is not the default for their location
+    assert "compile_url('/pet/{petId}', path_styles={'petId': ParameterStyle('label', False, False)}, query_styles={'tags': ParameterStyle('pipeDelimited', False, False)})" in code
+
+def test_swagger_2_collection_formats():
+    spec = {
+        'swagger': '2.0',
+        'paths': {
+            '/pets': {
+                'get': {
+                    'operationId': 'findPets',
+                    'parameters': [
+                        {'name': 'tags', 'in': 'query', 'type': 'array', 'items': {'type': 'string'}, 'collectionFormat': 'pipes'},
+                        {'name': 'ids', 'in': 'query', 'type': 'array', 'items': {'type': 'integer'}, 'collectionFormat': 'multi'},
+                    ],
+                    'responses': {'200': {'description': 'pets'}},
+                },
+            },
+        },
+    }
+    code = generate_client(spec)
+    # multi is form + explode, the query default
+    assert "compile_url('/pets', query_styles={'tags': ParameterStyle('pipeDelimited', False, False)})" in code
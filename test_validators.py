@@ -0,0 +1,92 @@
+# the validate_<Class> functions and discriminator tables of generate_models(..., validators=True)
+import pytest
+
+from lib.generate_models import generate_models
+from lib.validation import ValidationError
+
+def ref(name):
+    return {'$ref': f'#/components/schemas/{name}'}
+
+def spec_with(response_schema, schemas):
+    return {
+        'openapi': '3.0.0',
+        'paths': {
+            '/pets': {
+                'get': {
+                    'responses': {'200': {'description': 'pets', 'content': {'application/json': {'schema': response_schema}}}},
+                },
+            },
+        },
+        'components': {'schemas': schemas},
+    }
+
+cat = {'type': 'object', 'required': ['kind'], 'properties': {'kind': {'type': 'string', 'enum': ['cat']}, 'lives': {'type': 'integer'}}}
+dog = {'type': 'object', 'required': ['kind', 'status'], 'properties': {'kind': {'type': 'string', 'enum': ['dog']}, 'status': {'type': 'string', 'enum': ['a', 'b']}}}
+
+def validation_error(validator, value) -> str:
+    with pytest.raises(ValidationError) as info:
+        validator(value)
+    return str(info.value)
+
+def test_object_checks(import_code):
+    module = import_code(generate_models(spec_with(
+        {
+            'type': 'object',
+            'required': ['tags'],
+            'properties': {'tags': {'type': 'array', 'items': {'type': 'string'}}, 'dog': ref('Dog'), 'weight': {'type': 'number'}},
+        },
+        {'Dog': dog},
+    ), validators=True))
+    validate = module.validate__pets_GET_Response_Status200
+
+    validate({'tags': ['x'], 'dog': {'kind': 'dog', 'status': 'a'}, 'weight': 1})
+    validate({'tags': [], 'weight': 1.5, 'dog': None})
+    assert validation_error(validate, []) == '$: expected object, got list []'
+    assert validation_error(validate, {}) == '$.tags: missing required key'
+    assert validation_error(validate, {'tags': ['x', 3]}) == '$.tags[1]: expected str, got int 3'
+    assert validation_error(validate, {'tags': [], 'weight': '1'}) == "$.weight: expected int or float, got str '1'"
+    assert validation_error(validate, {'tags': [], 'dog': {'kind': 'dog', 'status': 'c'}}) == "$.dog.status: expected one of 'a', 'b', got str 'c'"
+
+def test_declared_discriminator(import_code):
+    pet = {'oneOf': [ref('Cat'), ref('Dog')], 'discriminator': {'propertyName': 'kind', 'mapping': {'cat': '#/components/schemas/Cat'}}}
+    # kind is any string here, the discriminator alone tells the members apart
+    schemas = {'Pet': pet, 'Cat': cat, 'Dog': dog}
+    for member in ('Cat', 'Dog'):
+        schemas[member] = {**schemas[member], 'properties': {**schemas[member]['properties'], 'kind': {'type': 'string'}}}
+    module = import_code(generate_models(spec_with(ref('Pet'), schemas), validators=True))
+
+    # mapped explicitly, and by component name
+    assert set(module.Pet_Discriminator) == {'cat', 'Dog'}
+    module.validate_Pet({'kind': 'cat'})
+    assert validation_error(module.validate_Pet, {'kind': 'Dog', 'status': 'x'}) == "$.status: expected one of 'a', 'b', got str 'x'"
+    assert validation_error(module.validate_Pet, {'kind': 'bird'}).startswith("$.kind: expected discriminator of ")
+
+def test_inferred_discriminator(import_code):
+    pet = {'oneOf': [ref('Cat'), ref('Dog')]}
+    module = import_code(generate_models(spec_with(ref('Pet'), {'Pet': pet, 'Cat': cat, 'Dog': dog}), validators=True))
+
+    assert set(module.Pet_Discriminator) == {'cat', 'dog'}
+    module.validate_Pet({'kind': 'dog', 'status': 'b'})
+    # the tag selects Dog only, Cat would have accepted it
+    assert validation_error(module.validate_Pet, {'kind': 'dog'}) == '$.status: missing required key'
+    # True is not the entry of 1
+    assert validation_error(module.validate_Pet, {'kind': True}).startswith('$.kind: expected discriminator')
+
+def test_union_without_discriminator(import_code):
+    pet = {'oneOf': [{'type': 'string'}, ref('Dog')]}
+    module = import_code(generate_models(spec_with(ref('Pet'), {'Pet': pet, 'Dog': dog}), validators=True))
+
+    assert not hasattr(module, 'Pet_Discriminator')
+    module.validate_Pet('a name')
+    module.validate_Pet({'kind': 'dog', 'status': 'a'})
+    assert validation_error(module.validate_Pet, 3).startswith('$: expected one of ')
+
+def test_alias_in_cycle(import_code):
+    # y's schema is an alias of x's inside Node's reference cycle, so is its validator
+    inline = {'type': 'object', 'properties': {'n': ref('Node')}}
+    node = {'type': 'object', 'properties': {'x': inline, 'y': inline}}
+    module = import_code(generate_models(spec_with(ref('Node'), {'Node': node}), dedupe='alias', validators=True))
+
+    assert module.validate_Node_Y is module.validate_Node_X
+    module.validate_Node({'y': {'n': {'x': {}}}})
+    assert validation_error(module.validate_Node, {'y': {'n': {'x': []}}}) == '$.y.n.x: expected object, got list []'
@@ -46,7 +46,23 @@ class User(TypedDict):
     userStatus: Optional[int]
 
 
+class _pet_petId_uploadImage_POST_PathParams(TypedDict):
+    petId: int
+
+
+class _pet_petId_uploadImage_POST_Response_Status200(TypedDict):
+    code: Optional[int]
+    type: Optional[str]
+    message: Optional[str]
+
+
+class _pet_petId_uploadImage_POST_Response_200(TypedDict):
+    data: _pet_petId_uploadImage_POST_Response_Status200
+
+
 class _pet_petId_uploadImage_POST_Method:
+    path = _pet_petId_uploadImage_POST_PathParams
+    response_200 = _pet_petId_uploadImage_POST_Response_200
     URL: Literal["/pet/{petId}/uploadImage"] = "/pet/{petId}/uploadImage"
     METHOD: Literal["POST"] = "POST"
 
@@ -55,12 +71,32 @@ class _pet_petId_uploadImage_API:
     POST = _pet_petId_uploadImage_POST_Method
 
 
+class _pet_POST_RequestBody(TypedDict):
+    id: Optional[int]
+    category: Optional[Category]
+    name: str
+    photoUrls: List[str]
+    tags: Optional[List[Any]]
+    status: Optional[Literal["available", "pending", "sold"]]
+
+
 class _pet_POST_Method:
+    request_body = _pet_POST_RequestBody
     URL: Literal["/pet"] = "/pet"
     METHOD: Literal["POST"] = "POST"
 
 
+class _pet_PUT_RequestBody(TypedDict):
+    id: Optional[int]
+    category: Optional[Category]
+    name: str
+    photoUrls: List[str]
+    tags: Optional[List[Any]]
+    status: Optional[Literal["available", "pending", "sold"]]
+
+
 class _pet_PUT_Method:
+    request_body = _pet_PUT_RequestBody
     URL: Literal["/pet"] = "/pet"
     METHOD: Literal["PUT"] = "PUT"
 
@@ -70,7 +106,21 @@ class _pet_API:
     PUT = _pet_PUT_Method
 
 
+class _pet_findByStatus_GET_QueryParams(TypedDict):
+    status: List
+
+
+class _pet_findByStatus_GET_Response_Status200(TypedDict):
+    pass
+
+
+class _pet_findByStatus_GET_Response_200(TypedDict):
+    data: _pet_findByStatus_GET_Response_Status200
+
+
 class _pet_findByStatus_GET_Method:
+    query = _pet_findByStatus_GET_QueryParams
+    response_200 = _pet_findByStatus_GET_Response_200
     URL: Literal["/pet/findByStatus"] = "/pet/findByStatus"
     METHOD: Literal["GET"] = "GET"
 
@@ -79,7 +129,21 @@ class _pet_findByStatus_API:
     GET = _pet_findByStatus_GET_Method
 
 
+class _pet_findByTags_GET_QueryParams(TypedDict):
+    tags: List
+
+
+class _pet_findByTags_GET_Response_Status200(TypedDict):
+    pass
+
+
+class _pet_findByTags_GET_Response_200(TypedDict):
+    data: _pet_findByTags_GET_Response_Status200
+
+
 class _pet_findByTags_GET_Method:
+    query = _pet_findByTags_GET_QueryParams
+    response_200 = _pet_findByTags_GET_Response_200
     URL: Literal["/pet/findByTags"] = "/pet/findByTags"
     METHOD: Literal["GET"] = "GET"
 
@@ -88,17 +152,46 @@ class _pet_findByTags_API:
     GET = _pet_findByTags_GET_Method
 
 
+class _pet_petId_GET_PathParams(TypedDict):
+    petId: int
+
+
+class _pet_petId_GET_Response_Status200(TypedDict):
+    id: Optional[int]
+    category: Optional[Category]
+    name: str
+    photoUrls: List[str]
+    tags: Optional[List[Any]]
+    status: Optional[Literal["available", "pending", "sold"]]
+
+
+class _pet_petId_GET_Response_200(TypedDict):
+    data: _pet_petId_GET_Response_Status200
+
+
 class _pet_petId_GET_Method:
+    path = _pet_petId_GET_PathParams
+    response_200 = _pet_petId_GET_Response_200
     URL: Literal["/pet/{petId}"] = "/pet/{petId}"
     METHOD: Literal["GET"] = "GET"
 
 
+class _pet_petId_POST_PathParams(TypedDict):
+    petId: int
+
+
 class _pet_petId_POST_Method:
+    path = _pet_petId_POST_PathParams
     URL: Literal["/pet/{petId}"] = "/pet/{petId}"
     METHOD: Literal["POST"] = "POST"
 
 
+class _pet_petId_DELETE_PathParams(TypedDict):
+    petId: int
+
+
 class _pet_petId_DELETE_Method:
+    path = _pet_petId_DELETE_PathParams
     URL: Literal["/pet/{petId}"] = "/pet/{petId}"
     METHOD: Literal["DELETE"] = "DELETE"
 
@@ -109,7 +202,16 @@ class _pet_petId_API:
     DELETE = _pet_petId_DELETE_Method
 
 
+class _store_inventory_GET_Response_Status200(TypedDict):
+    pass
+
+
+class _store_inventory_GET_Response_200(TypedDict):
+    data: _store_inventory_GET_Response_Status200
+
+
 class _store_inventory_GET_Method:
+    response_200 = _store_inventory_GET_Response_200
     URL: Literal["/store/inventory"] = "/store/inventory"
     METHOD: Literal["GET"] = "GET"
 
@@ -118,7 +220,31 @@ class _store_inventory_API:
     GET = _store_inventory_GET_Method
 
 
+class _store_order_POST_RequestBody(TypedDict):
+    id: Optional[int]
+    petId: Optional[int]
+    quantity: Optional[int]
+    shipDate: Optional[str]
+    status: Optional[Literal["placed", "approved", "delivered"]]
+    complete: Optional[bool]
+
+
+class _store_order_POST_Response_Status200(TypedDict):
+    id: Optional[int]
+    petId: Optional[int]
+    quantity: Optional[int]
+    shipDate: Optional[str]
+    status: Optional[Literal["placed", "approved", "delivered"]]
+    complete: Optional[bool]
+
+
+class _store_order_POST_Response_200(TypedDict):
+    data: _store_order_POST_Response_Status200
+
+
 class _store_order_POST_Method:
+    request_body = _store_order_POST_RequestBody
+    response_200 = _store_order_POST_Response_200
     URL: Literal["/store/order"] = "/store/order"
     METHOD: Literal["POST"] = "POST"
 
@@ -127,12 +253,36 @@ class _store_order_API:
     POST = _store_order_POST_Method
 
 
+class _store_order_orderId_GET_PathParams(TypedDict):
+    orderId: int
+
+
+class _store_order_orderId_GET_Response_Status200(TypedDict):
+    id: Optional[int]
+    petId: Optional[int]
+    quantity: Optional[int]
+    shipDate: Optional[str]
+    status: Optional[Literal["placed", "approved", "delivered"]]
+    complete: Optional[bool]
+
+
+class _store_order_orderId_GET_Response_200(TypedDict):
+    data: _store_order_orderId_GET_Response_Status200
+
+
 class _store_order_orderId_GET_Method:
+    path = _store_order_orderId_GET_PathParams
+    response_200 = _store_order_orderId_GET_Response_200
     URL: Literal["/store/order/{orderId}"] = "/store/order/{orderId}"
     METHOD: Literal["GET"] = "GET"
 
 
+class _store_order_orderId_DELETE_PathParams(TypedDict):
+    orderId: int
+
+
 class _store_order_orderId_DELETE_Method:
+    path = _store_order_orderId_DELETE_PathParams
     URL: Literal["/store/order/{orderId}"] = "/store/order/{orderId}"
     METHOD: Literal["DELETE"] = "DELETE"
 
@@ -142,7 +292,12 @@ class _store_order_orderId_API:
     DELETE = _store_order_orderId_DELETE_Method
 
 
+class _user_createWithList_POST_RequestBody(TypedDict):
+    pass
+
+
 class _user_createWithList_POST_Method:
+    request_body = _user_createWithList_POST_RequestBody
     URL: Literal["/user/createWithList"] = "/user/createWithList"
     METHOD: Literal["POST"] = "POST"
 
@@ -151,17 +306,60 @@ class _user_createWithList_API:
     POST = _user_createWithList_POST_Method
 
 
+class _user_username_GET_PathParams(TypedDict):
+    username: str
+
+
+class _user_username_GET_Response_Status200(TypedDict):
+    id: Optional[int]
+    username: Optional[str]
+    firstName: Optional[str]
+    lastName: Optional[str]
+    email: Optional[str]
+    password: Optional[str]
+    phone: Optional[str]
+    userStatus: Optional[int]
+
+
+class _user_username_GET_Response_200(TypedDict):
+    data: _user_username_GET_Response_Status200
+
+
 class _user_username_GET_Method:
+    path = _user_username_GET_PathParams
+    response_200 = _user_username_GET_Response_200
     URL: Literal["/user/{username}"] = "/user/{username}"
     METHOD: Literal["GET"] = "GET"
 
 
+class _user_username_PUT_PathParams(TypedDict):
+    username: str
+
+
+class _user_username_PUT_RequestBody(TypedDict):
+    id: Optional[int]
+    username: Optional[str]
+    firstName: Optional[str]
+    lastName: Optional[str]
+    email: Optional[str]
+    password: Optional[str]
+    phone: Optional[str]
+    userStatus: Optional[int]
+
+
 class _user_username_PUT_Method:
+    path = _user_username_PUT_PathParams
+    request_body = _user_username_PUT_RequestBody
     URL: Literal["/user/{username}"] = "/user/{username}"
     METHOD: Literal["PUT"] = "PUT"
 
 
+class _user_username_DELETE_PathParams(TypedDict):
+    username: str
+
+
 class _user_username_DELETE_Method:
+    path = _user_username_DELETE_PathParams
     URL: Literal["/user/{username}"] = "/user/{username}"
     METHOD: Literal["DELETE"] = "DELETE"
 
@@ -172,7 +370,22 @@ class _user_username_API:
     DELETE = _user_username_DELETE_Method
 
 
+class _user_login_GET_QueryParams(TypedDict):
+    username: str
+    password: str
+
+
+class _user_login_GET_Response_Status200(TypedDict):
+    pass
+
+
+class _user_login_GET_Response_200(TypedDict):
+    data: _user_login_GET_Response_Status200
+
+
 class _user_login_GET_Method:
+    query = _user_login_GET_QueryParams
+    response_200 = _user_login_GET_Response_200
     URL: Literal["/user/login"] = "/user/login"
     METHOD: Literal["GET"] = "GET"
 
@@ -190,7 +403,12 @@ class _user_logout_API:
     GET = _user_logout_GET_Method
 
 
+class _user_createWithArray_POST_RequestBody(TypedDict):
+    pass
+
+
 class _user_createWithArray_POST_Method:
+    request_body = _user_createWithArray_POST_RequestBody
     URL: Literal["/user/createWithArray"] = "/user/createWithArray"
     METHOD: Literal["POST"] = "POST"
 
@@ -199,7 +417,19 @@ class _user_createWithArray_API:
     POST = _user_createWithArray_POST_Method
 
 
+class _user_POST_RequestBody(TypedDict):
+    id: Optional[int]
+    username: Optional[str]
+    firstName: Optional[str]
+    lastName: Optional[str]
+    email: Optional[str]
+    password: Optional[str]
+    phone: Optional[str]
+    userStatus: Optional[int]
+
+
 class _user_POST_Method:
+    request_body = _user_POST_RequestBody
     URL: Literal["/user"] = "/user"
     METHOD: Literal["POST"] = "POST"
 
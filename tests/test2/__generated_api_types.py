@@ -20,12 +20,32 @@ class Tag(TypedDict):
     name: Optional[str]
 
 
+class _pet_POST_RequestBody(TypedDict):
+    id: Optional[int]
+    category: Optional[Category]
+    name: str
+    photoUrls: List[str]
+    tags: Optional[List[Any]]
+    status: Optional[Literal["available", "pending", "sold"]]
+
+
 class _pet_POST_Method:
+    request_body = _pet_POST_RequestBody
     URL: Literal["/pet"] = "/pet"
     METHOD: Literal["POST"] = "POST"
 
 
+class _pet_PUT_RequestBody(TypedDict):
+    id: Optional[int]
+    category: Optional[Category]
+    name: str
+    photoUrls: List[str]
+    tags: Optional[List[Any]]
+    status: Optional[Literal["available", "pending", "sold"]]
+
+
 class _pet_PUT_Method:
+    request_body = _pet_PUT_RequestBody
     URL: Literal["/pet"] = "/pet"
     METHOD: Literal["PUT"] = "PUT"
 